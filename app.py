@@ -1,15 +1,37 @@
-from flask import Flask, render_template, jsonify, session, request
-from backend.node_calc import (
-    run_gurobi_output,
-    run_cqm_output,
-    run_nlq_output,
-    run_dummy_output, #run_iqm_output, run_ionq_output,
-)
-#from backend.solver_5node.run_5node_ionq import result
+import gzip
+import json
+
+from flask import Flask, Response, render_template, jsonify, session, request
+from backend import solver_registry
+from backend.FullModelV1.sensitivity import what_if_cost, what_if_demand
+from backend.hierarchy import HierarchyManager
+from backend.jobs import JobManager, DONE
+from backend.node_calc import solution_key
+from backend.solution_cache import SolutionCache
+from backend.sweeps import SweepManager, parse_sweep
+from backend.topology_store import TopologyStore
+from backend.wire_format import MIMETYPE as BINARY_MIMETYPE, encode_grid_binary
 
 app = Flask(__name__)
 app.secret_key = "some_random_secret_key"
 
+# Solver jobs run in a bounded worker pool, not in the request thread.
+# Pool size / per-solver limits: JOBS_MAX_WORKERS, JOBS_CONCURRENCY="cqm=1,gurobi=2"
+# Results are cached by grid + solver + parameters: SOLUTION_CACHE_DIR,
+# SOLUTION_CACHE_ITEMS (in memory), SOLUTION_CACHE_SIZE_MB (on disk)
+solution_cache = SolutionCache.from_env()
+jobs = JobManager.from_env(cache=solution_cache)
+
+# Scenario sweeps: one job per scenario in the same pool
+sweeps = SweepManager(jobs)
+
+# Hierarchical plans: aggregated grid, then one job per sink cluster
+hierarchy = HierarchyManager(jobs)
+
+# Solved topologies live server-side (TOPOLOGY_DB); the session only keeps
+# the version id, which is also the ETag served by /get-topology
+topology_store = TopologyStore.from_env()
+
 
 # ================================
 # PAGE ROUTES
@@ -32,7 +54,8 @@ def operations():
 @app.route("/settings")
 def settings():
     saved = session.get("solver", "gurobi")
-    return render_template("settings.html", active="settings", saved_solver=saved)
+    return render_template("settings.html", active="settings", saved_solver=saved,
+                           solvers=solver_registry.plugins("payload"))
 
 
 # ================================
@@ -45,42 +68,281 @@ def set_solver():
 
 
 # ================================
-# RUN SOLVER + SAVE TOPOLOGY
+# SOLVER BACKENDS
+# ================================
+# Registered backends with their capabilities and whether their packages
+# are installed (checked without importing them).
+@app.route("/solvers")
+def solvers():
+    return jsonify({"ok": True, "solvers": [plugin.to_dict() for plugin in solver_registry.plugins()]})
+
+
+# ================================
+# RESPONSE ENCODING
+# ================================
+# ?format=binary opts into the columnar wire format (backend/wire_format.py);
+# JSON is the default. Bodies are gzip-encoded for clients that accept it.
+def wants_binary():
+    return request.args.get("format") == "binary"
+
+
+def encoded_response(body, mimetype, headers=None, gzipped=False):
+    """Response for `body` (already gzip-compressed if gzipped=True)."""
+    if not request.accept_encodings["gzip"]:
+        return Response(gzip.decompress(body) if gzipped else body, mimetype=mimetype, headers=headers)
+
+    response = Response(body if gzipped else gzip.compress(body, compresslevel=6),
+                        mimetype=mimetype, headers=headers)
+    response.headers["Content-Encoding"] = "gzip"
+    return response
+
+
+# ================================
+# RUN SOLVER (submit job) + JOB STATUS
 # ================================
+def save_latest_topology(job):
+    """SAVE LATEST GRID (for topology page) once a solver job has a usable payload."""
+    # Jobs with params (sweep scenarios, hierarchy levels) return result
+    # rows without nodes / flows: they must not replace the grid
+    if job.params is None and job.status == DONE and job.result and job.result.get("ok"):
+        session["topology_version"] = topology_store.save({
+            "nodes": job.result.get("nodes", {}),
+            "flows": job.result.get("flows", [])
+        })
+
+
 @app.route("/run-solver", methods=["POST"])
 def run_solver():
-
     solver = session.get("solver", "gurobi")
+    fresh = request.args.get("fresh") == "1"  # bypass the solution cache
+    job = jobs.submit(solver, key=solution_key(solver), use_cache=not fresh)
+    save_latest_topology(job)  # cache hits are done right away
+    return jsonify({"ok": True, **job.to_dict()}), 202
+
+
+@app.route("/jobs/<job_id>")
+def job_status(job_id):
+    job = jobs.get(job_id)
+    if job is None:
+        return jsonify({"ok": False, "error": "Unknown job."}), 404
+
+    save_latest_topology(job)
+    include_result = request.args.get("result") != "0"
+    return jsonify({"ok": True, **job.to_dict(include_result=include_result)})
+
+
+@app.route("/jobs/<job_id>/result")
+def job_result(job_id):
+    """Solver payload of a finished job (JSON, or ?format=binary)."""
+    job = jobs.get(job_id)
+    if job is None:
+        return jsonify({"ok": False, "error": "Unknown job."}), 404
+    if job.status != DONE:
+        return jsonify({"ok": False, "error": f"Job is {job.status}."}), 409
+
+    save_latest_topology(job)
+    if wants_binary():
+        return encoded_response(encode_grid_binary(job.result), BINARY_MIMETYPE)
+    return jsonify(job.result)
+
+
+@app.route("/jobs/<job_id>/events")
+def job_events(job_id):
+    """
+    Server-Sent Events stream of solver progress (incumbents, bounds,
+    D-Wave states, QAOA energies), closed by an "end" event with the
+    final job status. Reconnects resume from Last-Event-ID.
+    """
+    job = jobs.get(job_id)
+    if job is None:
+        return jsonify({"ok": False, "error": "Unknown job."}), 404
+
+    seq = request.headers.get("Last-Event-ID", type=int, default=0)
+
+    def stream(seq):
+        while True:
+            events, next_seq, finished = jobs.wait_events(job, seq, timeout=15)
+            for n, event in enumerate(events, start=next_seq - len(events)):
+                yield f"id: {n + 1}\nevent: {event['event']}\ndata: {json.dumps(event)}\n\n"
+            seq = next_seq
+
+            if finished:
+                yield f"event: end\ndata: {json.dumps(job.to_dict(include_result=False))}\n\n"
+                return
+            if not events:
+                yield ": keep-alive\n\n"
+
+    return Response(stream(seq), mimetype="text/event-stream",
+                    headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
+
+
+@app.route("/jobs/<job_id>/cancel", methods=["POST"])
+def cancel_job(job_id):
+    job = jobs.cancel(job_id)
+    if job is None:
+        return jsonify({"ok": False, "error": "Unknown job."}), 404
+    return jsonify({"ok": True, **job.to_dict(include_result=False)})
+
+
+# ================================
+# WHAT-IF (from the cached duals, no re-solve)
+# ================================
+@app.route("/what-if", methods=["POST"])
+def what_if():
+    """
+    {"node": "TS_D3", "delta": 500} or {"source": "S5", "cost_delta": 0.5},
+    answered from the sensitivity ranges of a solved job ("job_id") or of
+    the cached solution of the selected solver. Outside the valid range the
+    answer has "requires_resolve": true.
+    """
+    body = request.get_json(silent=True) or {}
+    if body.get("job_id"):
+        job = jobs.get(body["job_id"])
+        if job is None:
+            return jsonify({"ok": False, "error": "Unknown job."}), 404
+        payload = job.result if job.status == DONE else None
+    else:
+        solver = session.get("solver", "gurobi")
+        key = solution_key(solver)
+        payload = solution_cache.get(key) if key else None
+
+    duals = (payload or {}).get("duals")
+    if not duals or "demand_range" not in duals:
+        return jsonify({"ok": False, "error": "No solution with sensitivity ranges yet (run the Gurobi solver)."}), 409
 
     try:
-        # Select solver
-        if solver == "gurobi":
-            result = run_gurobi_output()
-        elif solver == "cqm":
-            result = run_cqm_output()
-        elif solver == "nlq":
-            result = run_nlq_output()
-        elif solver == "iqm":
-            result = run_iqm_output()
-        elif solver == "ionq":
-            result = run_ionq_output()
+        if "node" in body:
+            answer = what_if_demand(duals, body["node"], float(body.get("delta", 0)))
+        elif "source" in body:
+            answer = what_if_cost(duals, body["source"], float(body.get("cost_delta", 0)))
         else:
-            result = run_dummy_output()
+            return jsonify({"ok": False, "error": "Expected 'node' or 'source'."}), 400
+    except KeyError as e:
+        return jsonify({"ok": False, "error": e.args[0]}), 400
+    except (TypeError, ValueError):
+        return jsonify({"ok": False, "error": "delta / cost_delta must be a number."}), 400
+
+    return jsonify({"ok": True, **answer})
+
+
+# ================================
+# HIERARCHICAL PLANS (aggregated grid -> per-cluster distribution)
+# ================================
+@app.route("/hierarchical", methods=["POST"])
+def submit_hierarchical():
+    body = request.get_json(silent=True) or {}
+    try:
+        plan = hierarchy.submit(body.get("solver") or session.get("solver", "gurobi"),
+                                use_cache=request.args.get("fresh") != "1")
+    except ValueError as e:
+        return jsonify({"ok": False, "error": str(e)}), 400
+    return jsonify({"ok": True, **plan.to_dict(include_clusters=False)}), 202
+
+
+@app.route("/hierarchical/<plan_id>")
+def hierarchical_status(plan_id):
+    """Plan progress, top-level result and one row per cluster (?flows=1: with the line flows)."""
+    plan = hierarchy.get(plan_id)
+    if plan is None:
+        return jsonify({"ok": False, "error": "Unknown plan."}), 404
+    return jsonify({"ok": True, **plan.to_dict(include_flows=request.args.get("flows") == "1")})
+
+
+@app.route("/hierarchical/<plan_id>/events")
+def hierarchical_events(plan_id):
+    """
+    Server-Sent Events stream: one "top" event with the aggregated solve,
+    one "cluster" event per cluster as it finishes (with its line flows),
+    then an "end" event with the plan summary.
+    """
+    plan = hierarchy.get(plan_id)
+    if plan is None:
+        return jsonify({"ok": False, "error": "Unknown plan."}), 404
+
+    def stream():
+        while not hierarchy.wait_top(plan, timeout=15):
+            yield ": keep-alive\n\n"
+        yield f"event: top\ndata: {json.dumps(plan.to_dict(include_clusters=False))}\n\n"
+
+        seen = set()
+        while len(seen) < len(plan.clusters):
+            rows = hierarchy.wait_clusters(plan, seen, timeout=15)
+            for row in rows:
+                yield f"event: cluster\ndata: {json.dumps(row)}\n\n"
+            if not rows:
+                yield ": keep-alive\n\n"
+        yield f"event: end\ndata: {json.dumps(plan.to_dict())}\n\n"
+
+    return Response(stream(), mimetype="text/event-stream",
+                    headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
+
+
+@app.route("/hierarchical/<plan_id>/cancel", methods=["POST"])
+def cancel_hierarchical(plan_id):
+    plan = hierarchy.cancel(plan_id)
+    if plan is None:
+        return jsonify({"ok": False, "error": "Unknown plan."}), 404
+    return jsonify({"ok": True, **plan.to_dict(include_clusters=False)})
+
+
+# ================================
+# SCENARIO SWEEPS (demand / cost sensitivity)
+# ================================
+@app.route("/sweeps", methods=["POST"])
+def submit_sweep():
+    try:
+        solver, scenarios = parse_sweep(request.get_json(silent=True), default_solver=session.get("solver", "gurobi"))
+    except ValueError as e:
+        return jsonify({"ok": False, "error": str(e)}), 400
+
+    fresh = request.args.get("fresh") == "1"  # bypass the solution cache
+    sweep = sweeps.submit(solver, scenarios, use_cache=not fresh)
+    return jsonify({"ok": True, **sweep.to_dict(include_table=False)}), 202
+
+
+@app.route("/sweeps/<sweep_id>")
+def sweep_status(sweep_id):
+    """Sweep progress and its columnar result table (rows of unfinished scenarios are None)."""
+    sweep = sweeps.get(sweep_id)
+    if sweep is None:
+        return jsonify({"ok": False, "error": "Unknown sweep."}), 404
+    return jsonify({"ok": True, **sweep.to_dict()})
+
+
+@app.route("/sweeps/<sweep_id>/events")
+def sweep_events(sweep_id):
+    """
+    Server-Sent Events stream with one "row" event per scenario as it
+    finishes, closed by an "end" event with the full table. A reconnect
+    replays the rows finished so far (rows carry their index).
+    """
+    sweep = sweeps.get(sweep_id)
+    if sweep is None:
+        return jsonify({"ok": False, "error": "Unknown sweep."}), 404
+
+    def stream():
+        seen = set()
+        while True:
+            rows = sweeps.wait_rows(sweep, seen, timeout=15)
+            for row in rows:
+                yield f"event: row\ndata: {json.dumps(row)}\n\n"
 
-        # If failed, return
-        if not result.get("ok"):
-            return jsonify(result)
+            if len(seen) == len(sweep.jobs):
+                yield f"event: end\ndata: {json.dumps(sweep.to_dict())}\n\n"
+                return
+            if not rows:
+                yield ": keep-alive\n\n"
 
-        # SAVE LATEST GRID (for topology page)
-        session["latest_topology"] = {
-            "nodes": result.get("nodes", {}),
-            "flows": result.get("flows", [])
-        }
+    return Response(stream(), mimetype="text/event-stream",
+                    headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
 
-        return jsonify(result)
 
-    except Exception as e:
-        return jsonify({"ok": False, "error": str(e)})
+@app.route("/sweeps/<sweep_id>/cancel", methods=["POST"])
+def cancel_sweep(sweep_id):
+    sweep = sweeps.cancel(sweep_id)
+    if sweep is None:
+        return jsonify({"ok": False, "error": "Unknown sweep."}), 404
+    return jsonify({"ok": True, **sweep.to_dict(include_table=False)})
 
 
 # ================================
@@ -88,12 +350,28 @@ def run_solver():
 # ================================
 @app.route("/get-topology")
 def get_topology():
-    topo = session.get("latest_topology")
+    """
+    Latest solved topology, served from the topology store. The version id
+    is the ETag, so an unchanged topology costs a 304 with an empty body.
+    """
+    version = session.get("topology_version")
+    body = topology_store.load_gzip(version) if version else None
 
-    if not topo:
+    if body is None:
         return jsonify({"ok": False, "error": "No solved topology available yet."})
 
-    return jsonify({"ok": True, **topo})
+    binary = wants_binary()
+    etag = f"{version}.bin" if binary else version
+    headers = {"Cache-Control": "private, no-cache", "Vary": "Accept-Encoding, Cookie"}
+    if etag in request.if_none_match:
+        response = Response(status=304, headers=headers)
+    elif binary:
+        topology = json.loads(gzip.decompress(body))
+        response = encoded_response(encode_grid_binary(topology), BINARY_MIMETYPE, headers)
+    else:
+        response = encoded_response(body, "application/json", headers, gzipped=True)
+    response.set_etag(etag)
+    return response
 
 
 # ================================
@@ -17,54 +17,64 @@
 #   - 15 "Sink TS" Nodes must satisfy a large, fixed demand.
 #
 # Objective: Minimize total generation cost to meet all demand.
+#
+# Offline (no token, or DWAVE_SAMPLER=local) the CQM goes to the local
+# simulated-annealing sampler (local_annealer.py) instead, which has the
+# same sample_cqm() interface.
 
 import dimod
 from dwave.system import LeapHybridCQMSampler
 import sys
 import json
 import os
+import time
 from dotenv import load_dotenv
 
+import numpy as np
+
+try:
+    from . import frontend_result
+    from . import local_annealer
+    from . import presolve
+    from . import progress
+    from .grid_spec import default_grid_spec
+except ImportError:  # run as a script from this folder
+    import frontend_result
+    import local_annealer
+    import presolve
+    import progress
+    from grid_spec import default_grid_spec
+
 # --- 1. CONFIGURATION ---
 load_dotenv()
 # !! REPLACE WITH YOUR D-WAVE API TOKEN !!
 # from src import APITOKEN <- changed to .env
 TEACHER_TOKEN = os.getenv("DWAVE_API_KEY")  # Use your own token
 TIME_LIMIT_SEC = 25
+POLL_INTERVAL_SEC = 1.0  # progress "waiting" events while the hybrid solver runs
+
+# "leap", "local" (simulated annealing, offline) or "auto" (local without a token)
+SAMPLER = os.getenv("DWAVE_SAMPLER", "auto")
+# Local runs are a fixed number of sweeps with a fixed seed, not a time
+# limit: the same grid always gives the same (cached) plan
+LOCAL_NUM_SWEEPS = 1000
+LOCAL_SEED = 0
+
+# --- 2. Problem Data (shared GridSpec, see grid_spec.py) ---
+
+SPEC = default_grid_spec()
+
+NUM_SOURCES = SPEC.num_sources
+TOTAL_MAX_GEN = SPEC.total_max_gen  # 52,000
 
-# --- 2. Hard-Coded Problem Data ---
-
-# 8 Source Nodes: (type, cost per unit, max generation)
-SOURCE_DATA = [
-    # Solar/Wind (Cheapest)
-    {"type": "Solar", "cost": 2.0, "max_gen": 3000},
-    {"type": "Solar", "cost": 2.1, "max_gen": 3000},
-    {"type": "Wind", "cost": 2.2, "max_gen": 4000},
-    {"type": "Wind", "cost": 2.3, "max_gen": 4000},
-    # Nuclear/Thermal (Intermediate)
-    {"type": "Nuclear", "cost": 3.0, "max_gen": 10000},
-    {"type": "Thermal", "cost": 3.5, "max_gen": 8000},
-    {"type": "Thermal", "cost": 3.6, "max_gen": 8000},
-    # Hydro (Costliest - Peaker)
-    {"type": "Hydro", "cost": 5.0, "max_gen": 12000}
-]
-NUM_SOURCES = len(SOURCE_DATA)
-TOTAL_MAX_GEN = sum(s["max_gen"] for s in SOURCE_DATA)  # 52,000
-
-# 2 Battery Nodes: (max storage capacity)
-BATTERY_DATA = [
-    {"max_cap": 10000, "initial_cap": 10000, "min_cap": 1000},  # Starts full (100%), min 10%
-    {"max_cap": 8000, "initial_cap": 8000, "min_cap": 800}  # Starts full (100%), min 10%
-]
-NUM_BATTERIES = len(BATTERY_DATA)
-TOTAL_INITIAL_STORAGE = sum(b["initial_cap"] for b in BATTERY_DATA)  # 18,000
+NUM_BATTERIES = SPEC.num_batteries
+TOTAL_INITIAL_STORAGE = SPEC.total_initial_storage  # 18,000
 
 # 15 Sink (Downstream) Trans-shipment Nodes
 # Each represents 1000 sinks with an average demand of 4.5 units
-DEMAND_PER_SINK_NODE = 1000 * 4.5  # 4,500 units per node
-NUM_SINK_NODES = 15
+NUM_SINK_NODES = SPEC.num_sinks
 # Total demand is 15 * 4,500 = 67,500
-TOTAL_DEMAND = NUM_SINK_NODES * DEMAND_PER_SINK_NODE
+TOTAL_DEMAND = SPEC.total_demand
 
 # CRITICAL CONSTRAINT: Total Demand (67,500) > Total Max Gen (52,000)
 # This forces the batteries to discharge to meet the 15,500 unit deficit.
@@ -75,94 +85,170 @@ TOTAL_DEMAND = NUM_SINK_NODES * DEMAND_PER_SINK_NODE
 # TS Node 0-7:   Connected to Sources
 # TS Node 8-9:   Connected to Batteries
 # TS Node 10-24: Connected to Sinks
-NODE_NAMES = [f"TS_S{i}" for i in range(NUM_SOURCES)] + \
-             [f"TS_B{j}" for j in range(NUM_BATTERIES)] + \
-             [f"TS_D{k}" for k in range(NUM_SINK_NODES)]
-NUM_TS_NODES = len(NODE_NAMES)  # 25
+NODE_NAMES = SPEC.node_names
+NUM_TS_NODES = SPEC.num_nodes  # 25
+
+
+def build_large_cqm(spec=SPEC):
+    """
+    Builds the Minimum Cost Flow CQM for `spec` (25 nodes / 610 variables by
+    default) with dimod's bulk APIs. Same CQM as build_large_cqm_loop(),
+    down to the variable order: variables are added in runs with equal
+    bounds, every balance constraint from its label / coefficient lists.
+    Returns (cqm, {(k_name, l_name): arc variable label}).
+    """
+    print("--- Building Large-Scale Complex CQM ---")
+    cqm = dimod.ConstrainedQuadraticModel()
+
+    num_src = spec.num_sources
+    num_gs = num_src + spec.num_batteries
+
+    # Labels and bounds per spec column [g; s; x]
+    arc_names = spec.arc_names()
+    labels = np.array(
+        [f"g{i}" for i in range(num_src)]
+        + [f"s{j}" for j in range(spec.num_batteries)]
+        + [f"x_{k_name}_{l_name}" for k_name, l_name in arc_names],
+        dtype=object,
+    )
+    lb, ub = spec.var_bounds()
+
+    # --- Constraint terms, row by row: in-arcs (+1), out-arcs (-1), then
+    # the node's own g (+1) or s (-1), whose column index equals the row ---
+    A = spec.incidence_matrix().tocsr()
+    rows = np.repeat(np.arange(spec.num_nodes), np.diff(A.indptr))
+    own = np.arange(num_gs)
+    term_row = np.concatenate([rows, own])
+    term_col = np.concatenate([num_gs + A.indices, own])
+    term_coef = np.concatenate([A.data, np.where(own < num_src, 1.0, -1.0)])
+    term_rank = np.concatenate([(A.data < 0).astype(np.int64), np.full(num_gs, 2)])
+    order = np.lexsort((term_rank, term_row))  # stable: arc order kept within each rank
+    term_row, term_col, term_coef = term_row[order], term_col[order], term_coef[order]
+
+    # --- 2a. Define Decision Variables ---
+    # In order of first use (objective g's, then constraint by constraint)
+    seq = np.concatenate([np.arange(num_src), term_col])
+    cols, first = np.unique(seq, return_index=True)
+    var_order = cols[np.argsort(first)]
+
+    lo, hi = lb[var_order], ub[var_order]
+    breaks = np.flatnonzero((np.diff(lo) != 0) | (np.diff(hi) != 0)) + 1
+    for run in np.split(np.arange(len(var_order)), breaks):
+        cqm.add_variables(dimod.INTEGER, labels[var_order[run]].tolist(),
+                          lower_bound=float(lo[run[0]]), upper_bound=float(hi[run[0]]))
 
-# Max flow for any single arc in the mesh
-MAX_ARC_FLOW = 10000  # 10,000 units
+    print(f"Total variables: {num_src} (gen) + {spec.num_batteries} (storage) + {spec.num_arcs} (arcs) "
+          f"= {spec.num_vars}")
 
+    # --- 2b. Define Objective Function ---
+    cqm.set_objective(zip(labels[:num_src].tolist(), spec.source_cost.tolist()))
+
+    # --- 2c. Add Constraints (Flow Conservation at each TS Node) ---
+    # Source rows: ... + g == 0; battery rows: ... + initial - s == 0
+    # (initial as the lhs offset, like the loop builder); sink rows: == demand
+    rhs = np.where(np.arange(spec.num_nodes) < num_gs, 0.0, spec.balance_rhs())
+    bounds = np.searchsorted(term_row, np.arange(spec.num_nodes + 1)).tolist()
+
+    for k_idx, k_name in enumerate(spec.node_names):
+        row = slice(bounds[k_idx], bounds[k_idx + 1])  # lists per row only, to keep the peak low
+        label = cqm.add_constraint_from_iterable(
+            zip(labels[term_col[row]].tolist(), term_coef[row].tolist()), "==", rhs=float(rhs[k_idx]),
+            label=f"balance_{k_name}"
+        )
+        if num_src <= k_idx < num_gs:
+            cqm.constraints[label].lhs.offset = float(spec.battery_initial_cap[k_idx - num_src])
+
+    print(f"Total constraints: {len(cqm.constraints)}")
 
-def build_large_cqm():
+    return cqm, dict(zip(arc_names, labels[num_gs:].tolist()))
+
+
+def build_large_cqm_loop(spec=SPEC):
     """
-    Builds the 25-node, 610-variable Minimum Cost Flow CQM.
+    Original per-variable builder (one dimod.Integer per arc, quicksum per
+    node). Kept as the reference for equivalence checks and build
+    benchmarks (benchmarks/bench_cqm_build.py).
     """
     print("--- Building Large-Scale Complex CQM ---")
     cqm = dimod.ConstrainedQuadraticModel()
 
     # --- 2a. Define Decision Variables ---
 
-    # 8 Integer variables for generation
-    # *** FIX IS HERE: Use keyword arguments 'lower_bound' and 'upper_bound' ***
-    g = [dimod.Integer(f"g{i}", lower_bound=0, upper_bound=SOURCE_DATA[i]["max_gen"]) for i in range(NUM_SOURCES)]
+    # Integer variables for generation
+    g = [
+        dimod.Integer(f"g{i}", lower_bound=0, upper_bound=float(max_gen))
+        for i, max_gen in enumerate(spec.source_max_gen)
+    ]
 
-    # 2 Integer variables for final battery storage
-    # *** FIX IS HERE: Use keyword arguments 'lower_bound' and 'upper_bound' ***
-    s = [dimod.Integer(f"s{j}", lower_bound=BATTERY_DATA[j]["min_cap"], upper_bound=BATTERY_DATA[j]["max_cap"]) for j in
-         range(NUM_BATTERIES)]
+    # Integer variables for final battery storage
+    s = [
+        dimod.Integer(f"s{j}", lower_bound=float(min_cap), upper_bound=float(max_cap))
+        for j, (min_cap, max_cap) in enumerate(zip(spec.battery_min_cap, spec.battery_max_cap))
+    ]
 
-    # 600 (25 * 24) Integer variables for arc flow in the trans-shipment mesh
+    # Integer variables for arc flow in the trans-shipment mesh
     # x[k][l] = flow from TS Node k to TS Node l
-    # *** FIX IS HERE: Use keyword arguments 'lower_bound' and 'upper_bound' ***
-    x = {}
-    for k_idx, k_name in enumerate(NODE_NAMES):
-        for l_idx, l_name in enumerate(NODE_NAMES):
-            if k_idx == l_idx:
-                continue  # No self-loops
-            x[(k_name, l_name)] = dimod.Integer(f"x_{k_name}_{l_name}", lower_bound=0, upper_bound=MAX_ARC_FLOW)
+    x = {
+        (k_name, l_name): dimod.Integer(f"x_{k_name}_{l_name}", lower_bound=0, upper_bound=float(cap))
+        for (k_name, l_name), cap in zip(spec.arc_names(), spec.arc_cap)
+    }
+    x_list = list(x.values())
 
     print(f"Total variables: {len(g)} (gen) + {len(s)} (storage) + {len(x)} (arcs) = {len(g) + len(s) + len(x)}")
 
     # --- 2b. Define Objective Function ---
     # Minimize total generation cost
-    objective = dimod.quicksum(SOURCE_DATA[i]["cost"] * g[i] for i in range(NUM_SOURCES))
+    objective = dimod.quicksum(float(cost) * g[i] for i, cost in enumerate(spec.source_cost))
     cqm.set_objective(objective)
 
     # --- 2c. Add Constraints (Flow Conservation at each TS Node) ---
     #
     # General Formula:
     # Sum(Flow In) - Sum(Flow Out) + Local_Supply = Local_Demand
+    #
+    # The in/out arcs of each node are read off the incidence matrix row
+    # (+1 = arc enters, -1 = arc leaves) instead of scanning all node pairs.
+    A = spec.incidence_matrix()
+    first_sink = spec.num_sources + spec.num_batteries
 
-    # Loop over all 25 TS nodes
-    for k_idx, k_name in enumerate(NODE_NAMES):
-
-        # Sum(Flow In) = Sum(flow from all other nodes 'l' *to* 'k')
-        flow_in = dimod.quicksum(x[(l_name, k_name)] for l_idx, l_name in enumerate(NODE_NAMES) if l_idx != k_idx)
+    for k_idx, k_name in enumerate(spec.node_names):
+        row = slice(A.indptr[k_idx], A.indptr[k_idx + 1])
+        arcs, signs = A.indices[row], A.data[row]
 
-        # Sum(Flow Out) = Sum(flow from 'k' *to* all other nodes 'l')
-        flow_out = dimod.quicksum(x[(k_name, l_name)] for l_idx, l_name in enumerate(NODE_NAMES) if l_idx != k_idx)
+        flow_in = dimod.quicksum(x_list[a] for a in arcs[signs > 0])
+        flow_out = dimod.quicksum(x_list[a] for a in arcs[signs < 0])
 
         # The rest depends on the node type
 
-        if 0 <= k_idx < 8:
-            # --- Type 1: Source TS Node (Nodes 0-7) ---
+        if k_idx < spec.num_sources:
+            # --- Type 1: Source TS Node ---
             # Local_Supply = Generation g[k_idx]
             # Local_Demand = 0
             # Constraint: flow_in - flow_out + g[k_idx] == 0
             cqm.add_constraint(flow_in - flow_out + g[k_idx] == 0, label=f"balance_{k_name}")
 
-        elif 8 <= k_idx < 10:
-            # --- Type 2: Battery TS Node (Nodes 8-9) ---
+        elif k_idx < first_sink:
+            # --- Type 2: Battery TS Node ---
             # Local_Supply/Demand = Net discharge
             # Net Discharge = Initial_Storage - Final_Storage
-            j = k_idx - 8  # Battery index (0 or 1)
-            initial_storage = BATTERY_DATA[j]["initial_cap"]
+            j = k_idx - spec.num_sources
+            initial_storage = float(spec.battery_initial_cap[j])
             final_storage_var = s[j]
             # Constraint: flow_in - flow_out + (initial - final) == 0
             cqm.add_constraint(flow_in - flow_out + (initial_storage - final_storage_var) == 0,
                                label=f"balance_{k_name}")
 
         else:
-            # --- Type 3: Sink TS Node (Nodes 10-24) ---
+            # --- Type 3: Sink TS Node ---
             # Local_Supply = 0
-            # Local_Demand = DEMAND_PER_SINK_NODE
-            # Constraint: flow_in - flow_out == DEMAND_PER_SINK_NODE
-            cqm.add_constraint(flow_in - flow_out == DEMAND_PER_SINK_NODE, label=f"balance_{k_name}")
+            # Local_Demand = sink demand
+            # Constraint: flow_in - flow_out == demand
+            cqm.add_constraint(flow_in - flow_out == float(spec.sink_demand[k_idx - first_sink]),
+                               label=f"balance_{k_name}")
 
     print(f"Total constraints: {len(cqm.constraints)}")
 
-    return cqm, x
+    return cqm, {key: next(iter(var.variables)) for key, var in x.items()}
 
 
 def print_solution(sampleset, x_vars):
@@ -188,16 +274,16 @@ def print_solution(sampleset, x_vars):
     for i in range(NUM_SOURCES):
         gen = int(sample[f"g{i}"])
         total_gen += gen
-        max_gen = SOURCE_DATA[i]['max_gen']
-        cost = SOURCE_DATA[i]['cost']
-        print(f"  - S{i} ({SOURCE_DATA[i]['type']:<7} Cost ${cost:.2f}): {gen: >7,} / {max_gen: >7,} units")
+        max_gen = int(SPEC.source_max_gen[i])
+        cost = SPEC.source_cost[i]
+        print(f"  - S{i} ({SPEC.source_type[i]:<7} Cost ${cost:.2f}): {gen: >7,} / {max_gen: >7,} units")
     print(f"  Total Generation: {total_gen:,.0f} units")
 
     print("\nBattery Storage:")
     total_discharge = 0
     for j in range(NUM_BATTERIES):
         final = int(sample[f"s{j}"])
-        initial = BATTERY_DATA[j]['initial_cap']
+        initial = int(SPEC.battery_initial_cap[j])
         discharged = initial - final
         total_discharge += discharged
 
@@ -215,8 +301,8 @@ def print_solution(sampleset, x_vars):
     print("\n--- Non-Zero Arc Flows (Top 50) ---")
     count = 0
     total_flow = 0
-    for (k_name, l_name), x_var in x_vars.items():
-        flow = int(sample[list(x_var.variables)[0]])
+    for (k_name, l_name), label in x_vars.items():
+        flow = int(sample[label])
         total_flow += flow
         if flow > 0:
             count += 1
@@ -227,31 +313,89 @@ def print_solution(sampleset, x_vars):
     print(f"  Total flow across all {len(x_vars)} arcs: {total_flow:,.0f} units")
 
 
+def make_sampler(token=TEACHER_TOKEN):
+    """LeapHybridCQMSampler, or the local annealer when offline (see SAMPLER)."""
+    if SAMPLER == "local" or (SAMPLER == "auto" and not token):
+        return local_annealer.SimulatedAnnealingCQMSampler(seed=LOCAL_SEED, num_sweeps=LOCAL_NUM_SWEEPS)
+    return LeapHybridCQMSampler(token=token)
+
+
+def solve_cqm(cqm, token=TEACHER_TOKEN, time_limit=TIME_LIMIT_SEC, sampler=None):
+    """
+    Submit to LeapHybridCQMSampler (or `sampler`) and wait for the
+    sampleset, reporting the submit / wait / done states. sample_cqm()
+    returns a sampleset that resolves in the background, so we can poll
+    it while waiting.
+    """
+    if sampler is None:
+        sampler = LeapHybridCQMSampler(token=token)
+    where = getattr(sampler, "display_name", "D-Wave")
+    sweeps = getattr(sampler, "num_sweeps", None)
+    budget = f"{sweeps} sweeps" if sweeps else f"time limit {time_limit}s"
+    progress.report("status", message=f"Submitting CQM to {where} ({budget})...", state="submitting")
+    sampleset = sampler.sample_cqm(
+        cqm,
+        time_limit=time_limit,
+        label="Large-Complex-Network-Solve"
+    )
+
+    t0 = time.time()
+    progress.report("status", message=f"Submitted to {where}, waiting for results...", state="submitted")
+    while not sampleset.done():
+        time.sleep(POLL_INTERVAL_SEC)
+        progress.report("status", message=f"Waiting for {where} ({time.time() - t0:.0f}s)...",
+                        state="waiting", elapsed=time.time() - t0)
+
+    sampleset.resolve()
+    progress.report("status", message=f"{where} solve complete.", state="done")
+    return sampleset
+
+
+def build_payload(sampleset, spec=SPEC, presolved=None):
+    """
+    Frontend payload of the best feasible sample. With `presolved` the CQM
+    was built from presolved.spec and the sample is mapped back to `spec`.
+    """
+    feasible_sampleset = sampleset.filter(lambda d: d.is_feasible)
+    if not feasible_sampleset:
+        return {"ok": False, "error": "No feasible solution found (CQM sampler)."}
+
+    model_spec = spec if presolved is None else presolved.spec
+    sample = feasible_sampleset.first.sample
+    gen = [sample[f"g{i}"] for i in range(model_spec.num_sources)]
+    storage = [sample[f"s{j}"] for j in range(model_spec.num_batteries)]
+    flow = [sample[f"x_{k_name}_{l_name}"] for k_name, l_name in model_spec.arc_names()]
+    if presolved is not None:
+        gen, storage, flow = presolved.postsolve(gen, storage, flow)
+    return frontend_result.build_frontend_result(spec, gen, storage, flow)
+
+
+def main(spec=SPEC):
+    """Presolve, build the CQM, sample it (Leap, or the local annealer offline) and return the payload."""
+    presolved = presolve.presolve(spec)
+    progress.report("status", message=presolved.describe())
+    cqm, _ = build_large_cqm(presolved.spec)
+    sampleset = solve_cqm(cqm, sampler=make_sampler())
+    return build_payload(sampleset, spec, presolved)
+
+
 # --- Main Execution ---
 if __name__ == "__main__":
 
     # 1. Build the large-scale model
     cqm, x_vars = build_large_cqm()
 
-    # 2. Check for API Token
-    if not TEACHER_TOKEN or "YOUR_TOKEN_HERE" in TEACHER_TOKEN:
-        print("Error: TEACHER_TOKEN is not set. Please add your API key.")
-        sys.exit(1)
-
-    # 3. Set up the Hybrid Sampler
-    print(f"\n--- Submitting to LeapHybridCQMSampler (Time Limit: {TIME_LIMIT_SEC}s) ---")
-    sampler = LeapHybridCQMSampler(token=TEACHER_TOKEN)
-
+    # 2. Set up the Hybrid Sampler (local annealer without an API token)
+    sampler = make_sampler()
+    local = isinstance(sampler, local_annealer.SimulatedAnnealingCQMSampler)
+    budget = f"{LOCAL_NUM_SWEEPS} sweeps, seed {LOCAL_SEED}" if local else f"Time Limit: {TIME_LIMIT_SEC}s"
+    print(f"\n--- Submitting to {type(sampler).__name__} ({budget}) ---")
     try:
-        # 4. Solve the CQM
-        sampleset = sampler.sample_cqm(
-            cqm,
-            time_limit=TIME_LIMIT_SEC,
-            label="Large-Complex-Network-Solve"
-        )
+        # 3. Solve the CQM
+        sampleset = solve_cqm(cqm, sampler=sampler)
         print("...Solving complete.")
 
-        # 5. Print the formatted solution
+        # 4. Print the formatted solution
         print_solution(sampleset, x_vars)
 
     except Exception as e:
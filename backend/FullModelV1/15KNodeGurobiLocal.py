@@ -8,433 +8,414 @@ import gurobipy as gp
 from gurobipy import GRB
 import sys
 import time
+from contextlib import contextmanager
+
+try:
+    from . import frontend_result
+    from . import progress
+    from . import sensitivity
+    from .grid_spec import default_grid_spec
+except ImportError:  # run as a script from this folder
+    import frontend_result
+    import progress
+    import sensitivity
+    from grid_spec import default_grid_spec
+
+# --- 0. Gurobi Environment ---
+#
+# One environment per process, started on first use and kept for the
+# life of the process (job workers are long-lived), so the license check
+# and environment start-up are paid once instead of on every request.
 
-# --- 1. Hard-Coded Problem Data ---
-
-SOURCE_DATA = [
-    {"type": "Solar",   "cost": 2.0, "max_gen": 3000},
-    {"type": "Solar",   "cost": 2.1, "max_gen": 3000},
-    {"type": "Wind",    "cost": 2.2, "max_gen": 4000},
-    {"type": "Wind",    "cost": 2.3, "max_gen": 4000},
-    {"type": "Nuclear", "cost": 3.0, "max_gen": 10000},
-    {"type": "Thermal", "cost": 3.5, "max_gen": 8000},
-    {"type": "Thermal", "cost": 3.6, "max_gen": 8000},
-    {"type": "Hydro",   "cost": 5.0, "max_gen": 12000}
-]
-NUM_SOURCES = len(SOURCE_DATA)
+_ENV = None
 
-BATTERY_DATA = [
-    {"max_cap": 10000, "initial_cap": 10000, "min_cap": 1000},
-    {"max_cap": 8000,  "initial_cap":  8000, "min_cap": 800}
-]
-NUM_BATTERIES = len(BATTERY_DATA)
 
-DEMAND_PER_SINK_NODE = 4500
-NUM_SINK_NODES = 15
-TOTAL_DEMAND = NUM_SINK_NODES * DEMAND_PER_SINK_NODE
+def get_env():
+    global _ENV
+    if _ENV is None:
+        _ENV = gp.Env()
+    return _ENV
 
-NODE_NAMES = [f"TS_S{i}" for i in range(NUM_SOURCES)] + \
-             [f"TS_B{j}" for j in range(NUM_BATTERIES)] + \
-             [f"TS_D{k}" for k in range(NUM_SINK_NODES)]
 
-NUM_TS_NODES = len(NODE_NAMES)
-MAX_ARC_FLOW = 10000
+# --- 1. Problem Data (shared GridSpec, see grid_spec.py) ---
 
+SPEC = default_grid_spec()
 
-# -----------------------------------------------------------
-# VISUALIZATION: Extract large non-zero flows
-# -----------------------------------------------------------
+NUM_SOURCES = SPEC.num_sources
+NUM_BATTERIES = SPEC.num_batteries
+NUM_SINK_NODES = SPEC.num_sinks
+TOTAL_DEMAND = int(SPEC.total_demand)
 
-def get_visual_flows(x_vars, min_flow=2000):
-    flow_list = []
-    for (src, dst), xvar in x_vars.items():
-        f = int(xvar.X)
-        if f >= min_flow:
-            flow_list.append({
-                "src": src,
-                "dst": dst,
-                "flow": f
-            })
-    return flow_list
+NODE_NAMES = SPEC.node_names
+NUM_TS_NODES = SPEC.num_nodes
 
 
 # -----------------------------------------------------------
 # BUILD MODEL
 # -----------------------------------------------------------
 
-def build_and_solve_gurobi():
+def split_columns(spec, v):
+    """g, s and x slices of the [g; s; x] MVar."""
+    num_gs = spec.num_sources + spec.num_batteries
+    return v[:spec.num_sources], v[spec.num_sources:num_gs], v[num_gs:]
+
+
+def build_matrix_model(spec=SPEC, env=None):
+    """Returns (model, v, balance) with v = [g; s; x] and balance the MConstr rows."""
+    lb, ub = spec.var_bounds()
+
+    model = gp.Model("Large_Network_Flow_Gurobi", env=env or get_env())
+    v = model.addMVar(spec.num_vars, vtype=GRB.INTEGER, lb=lb, ub=ub, name=spec.var_names())
+
+    # OBJECTIVE (min cost)
+    model.setObjective(spec.objective() @ v, GRB.MINIMIZE)
+
+    # FLOW BALANCE CONSTRAINTS
+    balance = model.addMConstr(spec.balance_matrix(), v, "=", spec.balance_rhs())
+
+    return model, v, balance
+
+
+def build_gurobi_model(spec=SPEC):
+    """
+    Matrix-form builder: one MVar holds g, s and x (in that order) and all
+    flow balance rows are added at once as [G S A] @ [g; s; x] == b.
+    Produces the same variables, bounds, objective and constraints as
+    build_gurobi_model_loop(), in the same order.
+    """
+    model, v, _ = build_matrix_model(spec)
+    g, s, x = split_columns(spec, v)
+    return model, g, s, x, spec.arc_names()
+
+
+def build_gurobi_model_loop(spec=SPEC):
+    """
+    Original per-variable builder (one addVar per arc, quicksum per node
+    over the full mesh). Kept as the reference for equivalence checks and
+    build benchmarks; assumes spec holds the full mesh.
+    """
+    node_names = spec.node_names
+    max_arc_flow = float(spec.arc_cap.max())
+    model = gp.Model("Large_Network_Flow_Gurobi")
+
+    # GENERATION VARS
+    g = {
+        i: model.addVar(
+            vtype=GRB.INTEGER,
+            lb=0,
+            ub=spec.source_max_gen[i],
+            name=f"g{i}"
+        )
+        for i in range(spec.num_sources)
+    }
 
-    try:
-        model = gp.Model("Large_Network_Flow_Gurobi")
+    # BATTERY VARS
+    s = {
+        j: model.addVar(
+            vtype=GRB.INTEGER,
+            lb=spec.battery_min_cap[j],
+            ub=spec.battery_max_cap[j],
+            name=f"s{j}"
+        )
+        for j in range(spec.num_batteries)
+    }
+
+    # ARC FLOWS
+    x = {}
+    for k_idx, k_name in enumerate(node_names):
+        for l_idx, l_name in enumerate(node_names):
+            if k_idx == l_idx:
+                continue
 
-        # GENERATION VARS
-        g = {
-            i: model.addVar(
+            x[(k_name, l_name)] = model.addVar(
                 vtype=GRB.INTEGER,
                 lb=0,
-                ub=SOURCE_DATA[i]["max_gen"],
-                name=f"g{i}"
+                ub=max_arc_flow,
+                name=f"x_{k_name}_{l_name}"
             )
-            for i in range(NUM_SOURCES)
-        }
 
-        # BATTERY VARS
-        s = {
-            j: model.addVar(
-                vtype=GRB.INTEGER,
-                lb=BATTERY_DATA[j]["min_cap"],
-                ub=BATTERY_DATA[j]["max_cap"],
-                name=f"s{j}"
-            )
-            for j in range(NUM_BATTERIES)
-        }
-
-        # ARC FLOWS
-        x = {}
-        for k_idx, k_name in enumerate(NODE_NAMES):
-            for l_idx, l_name in enumerate(NODE_NAMES):
-                if k_idx == l_idx:
-                    continue
-
-                x[(k_name, l_name)] = model.addVar(
-                    vtype=GRB.INTEGER,
-                    lb=0,
-                    ub=MAX_ARC_FLOW,
-                    name=f"x_{k_name}_{l_name}"
-                )
-
-        # OBJECTIVE (min cost)
-        model.setObjective(
-            gp.quicksum(
-                SOURCE_DATA[i]["cost"] * g[i]
-                for i in range(NUM_SOURCES)
-            ),
-            GRB.MINIMIZE
-        )
-
-        # FLOW BALANCE CONSTRAINTS
-        for k_idx, k_name in enumerate(NODE_NAMES):
+    # OBJECTIVE (min cost)
+    model.setObjective(
+        gp.quicksum(
+            spec.source_cost[i] * g[i]
+            for i in range(spec.num_sources)
+        ),
+        GRB.MINIMIZE
+    )
 
-            flow_in = gp.quicksum(
-                x[(l_name, k_name)]
-                for l_idx, l_name in enumerate(NODE_NAMES)
-                if l_idx != k_idx
-            )
-            flow_out = gp.quicksum(
-                x[(k_name, l_name)]
-                for l_idx, l_name in enumerate(NODE_NAMES)
-                if l_idx != k_idx
-            )
+    # FLOW BALANCE CONSTRAINTS
+    for k_idx, k_name in enumerate(node_names):
 
-            # Source node
-            if k_idx < 8:
-                model.addConstr(flow_in - flow_out + g[k_idx] == 0)
+        flow_in = gp.quicksum(
+            x[(l_name, k_name)]
+            for l_idx, l_name in enumerate(node_names)
+            if l_idx != k_idx
+        )
+        flow_out = gp.quicksum(
+            x[(k_name, l_name)]
+            for l_idx, l_name in enumerate(node_names)
+            if l_idx != k_idx
+        )
 
-            # Battery node
-            elif 8 <= k_idx < 10:
-                j = k_idx - 8
-                initial_storage = BATTERY_DATA[j]["initial_cap"]
-                model.addConstr(flow_in - flow_out + (initial_storage - s[j]) == 0)
+        # Source node
+        if k_idx < spec.num_sources:
+            model.addConstr(flow_in - flow_out + g[k_idx] == 0)
 
-            # Sink node
-            else:
-                model.addConstr(flow_in - flow_out == DEMAND_PER_SINK_NODE)
+        # Battery node
+        elif k_idx < spec.num_sources + spec.num_batteries:
+            j = k_idx - spec.num_sources
+            initial_storage = spec.battery_initial_cap[j]
+            model.addConstr(flow_in - flow_out + (initial_storage - s[j]) == 0)
 
-        # SOLVE
-        model.optimize()
-        return model, g, s, x
+        # Sink node
+        else:
+            model.addConstr(flow_in - flow_out == spec.sink_demand[k_idx - spec.num_sources - spec.num_batteries])
 
-    except Exception as e:
-        print("ERROR:", e)
-        sys.exit(1)
+    return model, g, s, x
 
 
 # -----------------------------------------------------------
-# HUMAN-READABLE DESCRIPTION FUNCTIONS
+# MODEL TEMPLATE POOL
 # -----------------------------------------------------------
-
-def describe_generators(g_vars):
-    lines = []
-    for i in range(NUM_SOURCES):
-        gen = int(g_vars[i].X)
-        info = SOURCE_DATA[i]
-        max_gen = info["max_gen"]
-        typ = info["type"]
-        util = gen / max_gen if max_gen else 0
-
-        if gen == 0:
-            lines.append(f"Switch OFF {typ} generator S{i} (0 / {max_gen:,} units).")
-        elif util < 0.3:
-            lines.append(f"Run {typ} generator S{i} at LOW output ({gen:,}/{max_gen:,}).")
-        elif util < 0.9:
-            lines.append(f"Run {typ} generator S{i} at MEDIUM output ({gen:,}/{max_gen:,}).")
+#
+# Building the model is the expensive part for large grids; the structure
+# (variables, balance matrix) only depends on the topology. Templates are
+# built once per topology and kept per process. A request checks one out,
+# overwrites only the data (bounds, costs, balance RHS), reoptimizes warm
+# from the previous solution and returns it to the pool.
+
+# Idle templates kept per topology
+MAX_TEMPLATES_PER_TOPOLOGY = 2
+
+
+class ModelTemplate:
+
+    def __init__(self, spec, env=None):
+        self.topology = spec.topology_fingerprint()
+        self.model, self.v, self.balance = build_matrix_model(spec, env)
+        self.spec = spec
+        self.solves = 0
+
+    def update(self, spec):
+        """Load the data of `spec` (same topology) into the model."""
+        if spec.topology_fingerprint() != self.topology:
+            raise ValueError("Spec topology does not match the model template.")
+        if spec is self.spec and self.solves:
+            return
+
+        lb, ub = spec.var_bounds()
+        self.v.LB = lb
+        self.v.UB = ub
+        self.v.Obj = spec.objective()
+        self.balance.RHS = spec.balance_rhs()
+        self.spec = spec
+
+    def warm_start(self):
+        """Previous solution as MIP start (Gurobi repairs or drops it if now infeasible)."""
+        if self.model.SolCount > 0:
+            self.v.Start = self.v.X
+
+    def optimize(self, callback=None):
+        self.warm_start()
+        if callback is None:
+            self.model.optimize()
         else:
-            lines.append(f"Run {typ} generator S{i} at FULL output ({gen:,}/{max_gen:,}).")
+            self.model.optimize(callback)
+        self.solves += 1
 
-    return lines
 
+class ModelTemplatePool:
 
-def describe_batteries(s_vars):
-    lines = []
-    for j in range(NUM_BATTERIES):
-        final = int(s_vars[j].X)
-        initial = BATTERY_DATA[j]["initial_cap"]
-        max_cap = BATTERY_DATA[j]["max_cap"]
-        delta = final - initial
-        pct = final / max_cap * 100
+    def __init__(self, max_per_topology=MAX_TEMPLATES_PER_TOPOLOGY):
+        self.max_per_topology = max_per_topology
+        self._idle = {}
 
-        if delta < 0:
-            lines.append(f"Discharge Battery {j} by {abs(delta):,} units ({final}/{max_cap}, {pct:.1f}%).")
-        elif delta > 0:
-            lines.append(f"Charge Battery {j} by {delta:,} units ({final}/{max_cap}, {pct:.1f}%).")
-        else:
-            lines.append(f"Battery {j} remains unchanged ({final}/{max_cap}, {pct:.1f}%).")
+    def acquire(self, spec):
+        idle = self._idle.get(spec.topology_fingerprint())
+        template = idle.pop() if idle else ModelTemplate(spec, get_env())
+        template.update(spec)
+        return template
 
-    return lines
+    def release(self, template):
+        idle = self._idle.setdefault(template.topology, [])
+        if len(idle) < self.max_per_topology:
+            idle.append(template)
+        else:
+            template.model.dispose()
+
+    @contextmanager
+    def checkout(self, spec):
+        template = self.acquire(spec)
+        try:
+            yield template
+        except Exception:
+            template.model.dispose()  # state unknown: do not pool it
+            raise
+        else:
+            self.release(template)
+
+
+TEMPLATES = ModelTemplatePool()
+
+
+# Min. seconds between two "bound" progress events
+PROGRESS_INTERVAL_SEC = 0.5
+
+
+def make_progress_callback(spec, g, s):
+    """
+    Gurobi callback that reports every new incumbent (with the generator
+    and battery state, so the UI can fill its tables early) and, at most
+    every PROGRESS_INTERVAL_SEC, the MIP bound / gap / node count.
+    """
+    g_vars = g.tolist()
+    s_vars = s.tolist()
+    last_report = [0.0]
+
+    def gap(incumbent, bound):
+        if abs(incumbent) >= GRB.INFINITY or abs(bound) >= GRB.INFINITY:
+            return None
+        return abs(incumbent - bound) / max(abs(incumbent), 1e-10)
+
+    def callback(model, where):
+        if where == GRB.Callback.MIPSOL:
+            incumbent = model.cbGet(GRB.Callback.MIPSOL_OBJ)
+            bound = model.cbGet(GRB.Callback.MIPSOL_OBJBND)
+            values = model.cbGetSolution(g_vars + s_vars)
+            view = frontend_result.SolutionView(spec, values[:len(g_vars)], values[len(g_vars):])
+            progress.report(
+                "incumbent",
+                objective=incumbent,
+                bound=bound,
+                gap=gap(incumbent, bound),
+                nodes=int(model.cbGet(GRB.Callback.MIPSOL_NODCNT)),
+                generators=frontend_result.build_generator_state(view),
+                batteries=frontend_result.build_battery_state(view),
+                summary=frontend_result.build_summary(view),
+            )
+        elif where == GRB.Callback.MIP:
+            now = time.time()
+            if now - last_report[0] < PROGRESS_INTERVAL_SEC:
+                return
+            last_report[0] = now
+            incumbent = model.cbGet(GRB.Callback.MIP_OBJBST)
+            bound = model.cbGet(GRB.Callback.MIP_OBJBND)
+            progress.report(
+                "bound",
+                incumbent=incumbent if incumbent < GRB.INFINITY else None,
+                bound=bound,
+                gap=gap(incumbent, bound),
+                nodes=int(model.cbGet(GRB.Callback.MIP_NODCNT)),
+            )
 
+    return callback
 
-def describe_major_flows(x_vars, top_n=10, min_threshold=5000):
-    flows = [
-        (int(xvar.X), src, dst)
-        for (src, dst), xvar in x_vars.items()
-        if int(xvar.X) >= min_threshold
-    ]
 
-    flows.sort(reverse=True)
-    flows = flows[:top_n]
+def build_and_solve_gurobi(spec=SPEC):
 
-    return [f"Send {amt:,} units from {s} → {d}" for amt, s, d in flows]
+    try:
+        progress.report("status", message="Building Gurobi model...")
+        model, g, s, x_vec, arcs = build_gurobi_model(spec)
 
+        # SOLVE
+        progress.report("status", message=f"Solving {spec.num_vars:,} variables with Gurobi...")
+        if progress.enabled():
+            model.optimize(make_progress_callback(spec, g, s))
+        else:
+            model.optimize()
 
-def explain_cost_logic(g_vars):
-    lines = ["Cheapest generators used first:"]
-    sorted_idx = sorted(range(NUM_SOURCES), key=lambda i: SOURCE_DATA[i]["cost"])
+        # Arc lookup by (src, dst) for the description helpers
+        x = dict(zip(arcs, x_vec.tolist()))
+        return model, g, s, x
 
-    for i in sorted_idx:
-        gen = int(g_vars[i].X)
-        max_gen = SOURCE_DATA[i]["max_gen"]
-        cost = SOURCE_DATA[i]["cost"]
-        pct = gen / max_gen * 100
-        lines.append(f"- {SOURCE_DATA[i]['type']} S{i}: {gen:,}/{max_gen:,} units (cost ${cost}, {pct:.1f}%)")
+    except Exception as e:
+        print("ERROR:", e)
+        sys.exit(1)
 
-    return lines
 
+def solve_template(spec, template):
+    """Optimize a checked-out template: (status, view), view None without a solution."""
+    g, s, _ = split_columns(spec, template.v)
+    progress.report("status", message=f"Solving {spec.num_vars:,} variables with Gurobi"
+                                      f" (model re-used {template.solves}x)...")
+    template.optimize(make_progress_callback(spec, g, s) if progress.enabled() else None)
 
-# -----------------------------------------------------------
-# VISUALIZATION NODE POSITIONS
-# -----------------------------------------------------------
+    status = template.model.Status
+    if template.model.SolCount == 0:
+        return status, None
 
-def get_node_positions():
-    return {
-
-        # ============================
-        # GENERATORS (Left Column)
-        # ============================
-        "GEN_SOLAR":   {"x": 120, "y": 120, "type": "Solar"},
-        "GEN_WIND":    {"x": 120, "y": 220, "type": "Wind"},
-        "GEN_NUCLEAR": {"x": 120, "y": 320, "type": "Nuclear"},
-        "GEN_THERMAL": {"x": 120, "y": 420, "type": "Thermal"},
-
-        # ============================
-        # STORAGE / BATTERY (Center)
-        # ============================
-        "BATTERY_1": {"x": 350, "y": 220, "type": "Storage"},
-        "BATTERY_2": {"x": 350, "y": 340, "type": "Storage"},
-
-        # ============================
-        # CONSUMERS (Right Column)
-        # ============================
-
-        # Special consumer
-        "LOAD_RAILWAY": {"x": 600, "y": 120, "type": "Railway"},
-
-        # Factories
-        "FACTORY_1": {"x": 600, "y": 200, "type": "Factory"},
-        "FACTORY_2": {"x": 600, "y": 260, "type": "Factory"},
-        "FACTORY_3": {"x": 600, "y": 320, "type": "Factory"},
-        "FACTORY_4": {"x": 600, "y": 380, "type": "Factory"},
-        "FACTORY_5": {"x": 600, "y": 440, "type": "Factory"},
-
-        # Residential (10)
-        "RES_1": {"x": 800, "y": 120, "type": "Residential"},
-        "RES_2": {"x": 800, "y": 170, "type": "Residential"},
-        "RES_3": {"x": 800, "y": 220, "type": "Residential"},
-        "RES_4": {"x": 800, "y": 270, "type": "Residential"},
-        "RES_5": {"x": 800, "y": 320, "type": "Residential"},
-        "RES_6": {"x": 800, "y": 370, "type": "Residential"},
-        "RES_7": {"x": 800, "y": 420, "type": "Residential"},
-        "RES_8": {"x": 800, "y": 470, "type": "Residential"},
-        "RES_9": {"x": 800, "y": 520, "type": "Residential"},
-        "RES_10": {"x": 800, "y": 570, "type": "Residential"},
-    }
+    # The template's columns are exactly [g; s; x]
+    return status, frontend_result.SolutionView.from_gurobi(spec, template.model)
 
 
-def get_primary_edges():
-    return [
+def solve_gurobi(spec=SPEC):
+    """
+    Pooled solve: returns (status, view), view being a SolutionView or
+    None if no solution is available. The model goes back to the pool.
+    """
+    with TEMPLATES.checkout(spec) as template:
+        return solve_template(spec, template)
 
-        # GENERATION → STORAGE
-        ("GEN_SOLAR", "BATTERY_1"),
-        ("GEN_WIND", "BATTERY_1"),
-        ("GEN_NUCLEAR", "BATTERY_2"),
-        ("GEN_THERMAL", "BATTERY_2"),
 
-        # STORAGE → RAILWAY
-        ("BATTERY_1", "LOAD_RAILWAY"),
+def build_and_solve_gurobi_payload(spec=SPEC):
+    """Payload plus node prices and sensitivity ranges (payload["duals"])."""
+    with TEMPLATES.checkout(spec) as template:
+        status, view = solve_template(spec, template)
+        if status != GRB.OPTIMAL:
+            return {"ok": False, "error": "No optimal solution"}
 
-        # STORAGE → FACTORIES
-        ("BATTERY_1", "FACTORY_1"),
-        ("BATTERY_1", "FACTORY_2"),
-        ("BATTERY_1", "FACTORY_3"),
-        ("BATTERY_2", "FACTORY_4"),
-        ("BATTERY_2", "FACTORY_5"),
+        progress.report("status", message="Computing node prices and sensitivity ranges...")
+        duals = sensitivity.gurobi_duals(spec, template.model)
 
-        # STORAGE → RESIDENTIAL BLOCKS
-        ("BATTERY_1", "RES_1"),
-        ("BATTERY_1", "RES_2"),
-        ("BATTERY_1", "RES_3"),
-        ("BATTERY_2", "RES_4"),
-        ("BATTERY_2", "RES_5"),
-        ("BATTERY_2", "RES_6"),
-        ("BATTERY_2", "RES_7"),
-        ("BATTERY_2", "RES_8"),
-        ("BATTERY_1", "RES_9"),
-        ("BATTERY_1", "RES_10"),
-    ]
+    payload = frontend_result.build_view_result(view)
+    if duals is not None:
+        payload["duals"] = duals
+    return payload
 
 
+# -----------------------------------------------------------
+# SOLUTION VALUES
+# -----------------------------------------------------------
 
+def solution_view(model, g_vars, s_vars, x_vars, spec=SPEC):
+    """All g/s/x values in one getAttr("X") call (x in spec arc order)."""
+    variables = g_vars.tolist() + s_vars.tolist() + list(x_vars.values())
+    return frontend_result.SolutionView.from_gurobi(spec, model, variables)
 
 
 # -----------------------------------------------------------
 # FRONTEND JSON BUILDER
 # -----------------------------------------------------------
 
-def build_frontend_result(model, g_vars, s_vars, x_vars):
-    return {
-        "ok": True,
-
-        # For drawing the grid
-        "nodes": get_node_positions(),
-        "primary_edges": get_primary_edges(),
-        "flows": get_visual_flows(x_vars),
-
-        # For driving the UI
-        "generators": build_generator_state(g_vars),
-        "batteries": build_battery_state(s_vars),
-        "summary": build_summary(g_vars, s_vars),
-
-        # Narrative list of actions (you already had this)
-        "actions": (
-            describe_generators(g_vars)
-            + describe_batteries(s_vars)
-            + describe_major_flows(x_vars)
-            + explain_cost_logic(g_vars)
-        ),
-    }
+def build_frontend_result(model, g_vars, s_vars, x_vars, spec=SPEC):
+    return frontend_result.build_view_result(solution_view(model, g_vars, s_vars, x_vars, spec))
 
 
 # -----------------------------------------------------------
 # PRINT HUMAN-READABLE
 # -----------------------------------------------------------
 
-def print_solution_gurobi(model, g_vars, s_vars, x_vars):
+def print_solution_gurobi(model, g_vars, s_vars, x_vars, spec=SPEC):
+    view = solution_view(model, g_vars, s_vars, x_vars, spec)
 
     print("\n=== Human-Readable Operational Plan ===\n")
 
     print("Generator Actions:")
-    for line in describe_generators(g_vars):
+    for line in frontend_result.describe_generators(view):
         print("  -", line)
 
     print("\nBattery Actions:")
-    for line in describe_batteries(s_vars):
+    for line in frontend_result.describe_batteries(view):
         print("  -", line)
 
     print("\nMajor Routing Decisions:")
-    for line in describe_major_flows(x_vars):
+    for line in frontend_result.describe_major_flows(view):
         print("  -", line)
 
     print("\nReasoning:")
-    for line in explain_cost_logic(g_vars):
+    for line in frontend_result.explain_cost_logic(view):
         print(" ", line)
 
-def build_generator_state(g_vars):
-    """Return structured info for each generator, for the UI."""
-    generators = []
-    for i in range(NUM_SOURCES):
-        gen = int(g_vars[i].X)
-        info = SOURCE_DATA[i]
-        max_gen = info["max_gen"]
-        util = gen / max_gen if max_gen else 0.0
-
-        if gen == 0:
-            status = "OFF"
-        elif util < 0.3:
-            status = "LOW"
-        elif util < 0.9:
-            status = "MEDIUM"
-        else:
-            status = "FULL"
-
-        generators.append({
-            "id": f"S{i}",
-            "node": f"TS_S{i}",
-            "type": info["type"],
-            "gen": gen,
-            "max_gen": max_gen,
-            "util_pct": round(util * 100, 1),
-            "status": status,
-        })
-    return generators
-
-
-def build_battery_state(s_vars):
-    """Return structured info for each battery node."""
-    batteries = []
-    for j in range(NUM_BATTERIES):
-        final = int(s_vars[j].X)
-        initial = BATTERY_DATA[j]["initial_cap"]
-        max_cap = BATTERY_DATA[j]["max_cap"]
-        delta = final - initial
-        pct = final / max_cap * 100 if max_cap else 0.0
-
-        if delta < 0:
-            action = f"Discharge {abs(delta):,} units"
-        elif delta > 0:
-            action = f"Charge {delta:,} units"
-        else:
-            action = "No change"
-
-        batteries.append({
-            "id": f"B{j}",
-            "node": f"TS_B{j}",
-            "initial": initial,
-            "final": final,
-            "delta": delta,
-            "soc_pct": round(pct, 1),
-            "action": action,
-        })
-    return batteries
-
-
-def build_summary(g_vars, s_vars):
-    """High-level energy balance summary."""
-    total_gen = sum(int(g_vars[i].X) for i in range(NUM_SOURCES))
-    total_discharge = 0
-    for j in range(NUM_BATTERIES):
-        final = int(s_vars[j].X)
-        initial = BATTERY_DATA[j]["initial_cap"]
-        total_discharge += max(0, initial - final)
-
-    total_supply = total_gen + total_discharge
-
-    return {
-        "total_generation": total_gen,
-        "total_discharge": total_discharge,
-        "total_supply": total_supply,
-        "total_demand": TOTAL_DEMAND,
-        "surplus": total_supply - TOTAL_DEMAND,
-    }
-
 # -----------------------------------------------------------
 # MAIN (debug mode)
 # -----------------------------------------------------------
@@ -5,6 +5,10 @@
 #
 # This is a translation of the CQM version to the Non-Linear (NL)
 # dwave.optimization.Model API.
+#
+# Offline (no token, or DWAVE_SAMPLER=local) the same flow model is
+# annealed locally (local_annealer.py, built from the GridSpec arrays the
+# NL model is built from) and the best state is loaded into the model.
 
 from dwave.optimization import Model
 # We will use Python's built-in `sum()` function, so `quicksum` is not needed.
@@ -13,62 +17,65 @@ from dwave.system import LeapHybridNLSampler
 import sys
 import json
 import os
+import time
 import traceback  # <-- Import traceback for better error logging
+
+import numpy as np
 #from src import APITOKEN  # <-- Changed to .env
 from dotenv import load_dotenv
 
+try:
+    from . import frontend_result
+    from . import local_annealer
+    from . import presolve
+    from . import progress
+    from .grid_spec import default_grid_spec
+except ImportError:  # run as a script from this folder
+    import frontend_result
+    import local_annealer
+    import presolve
+    import progress
+    from grid_spec import default_grid_spec
+
 # --- 1. CONFIGURATION ---
 load_dotenv()
 # !! REPLACE WITH YOUR D-WAVE API TOKEN !!
 TEACHER_TOKEN = os.getenv("DWAVE_API_TOKEN")  # <-- Changed per user request
 TIME_LIMIT_SEC = 25  # <-- Changed per user request
+POLL_INTERVAL_SEC = 1.0  # progress "waiting" events while the hybrid solver runs
 
-# --- 2. Hard-Coded Problem Data ---
+# "leap", "local" (simulated annealing, offline) or "auto" (local without a token)
+SAMPLER = os.getenv("DWAVE_SAMPLER", "auto")
+# Local runs are a fixed number of sweeps with a fixed seed, not a time
+# limit: the same grid always gives the same (cached) plan
+LOCAL_NUM_SWEEPS = 1000
+LOCAL_SEED = 0
+
+# --- 2. Problem Data (shared GridSpec, see grid_spec.py) ---
 # (Data is identical to the CQM version)
 
-# 8 Source Nodes: (type, cost per unit, max generation)
-SOURCE_DATA = [
-    # Solar/Wind (Cheapest)
-    {"type": "Solar", "cost": 2.0, "max_gen": 3000},
-    {"type": "Solar", "cost": 2.1, "max_gen": 3000},
-    {"type": "Wind", "cost": 2.2, "max_gen": 4000},
-    {"type": "Wind", "cost": 2.3, "max_gen": 4000},
-    # Nuclear/Thermal (Intermediate)
-    {"type": "Nuclear", "cost": 3.0, "max_gen": 10000},
-    {"type": "Thermal", "cost": 3.5, "max_gen": 8000},
-    {"type": "Thermal", "cost": 3.6, "max_gen": 8000},
-    # Hydro (Costliest - Peaker)
-    {"type": "Hydro", "cost": 5.0, "max_gen": 12000}
-]
-NUM_SOURCES = len(SOURCE_DATA)
-TOTAL_MAX_GEN = sum(s["max_gen"] for s in SOURCE_DATA)  # 52,000
-
-# 2 Battery Nodes: (max storage capacity)
-BATTERY_DATA = [
-    {"max_cap": 10000, "initial_cap": 10000, "min_cap": 1000},  # Starts full (100%), min 10%
-    {"max_cap": 8000, "initial_cap": 8000, "min_cap": 800}  # Starts full (100%), min 10%
-]
-NUM_BATTERIES = len(BATTERY_DATA)
-TOTAL_INITIAL_STORAGE = sum(b["initial_cap"] for b in BATTERY_DATA)  # 18,000
+SPEC = default_grid_spec()
+
+NUM_SOURCES = SPEC.num_sources
+TOTAL_MAX_GEN = SPEC.total_max_gen  # 52,000
+
+NUM_BATTERIES = SPEC.num_batteries
+TOTAL_INITIAL_STORAGE = SPEC.total_initial_storage  # 18,000
 
 # 15 Sink (Downstream) Trans-shipment Nodes
-DEMAND_PER_SINK_NODE = 1000 * 4.5  # 4,500 units per node
-NUM_SINK_NODES = 15
-TOTAL_DEMAND = NUM_SINK_NODES * DEMAND_PER_SINK_NODE  # 67,500
+NUM_SINK_NODES = SPEC.num_sinks
+TOTAL_DEMAND = SPEC.total_demand  # 67,500
 
 # 25 Trans-shipment (TS) nodes in total
-NODE_NAMES = [f"TS_S{i}" for i in range(NUM_SOURCES)] + \
-             [f"TS_B{j}" for j in range(NUM_BATTERIES)] + \
-             [f"TS_D{k}" for k in range(NUM_SINK_NODES)]
-NUM_TS_NODES = len(NODE_NAMES)  # 25
-
-# Max flow for any single arc in the mesh
-MAX_ARC_FLOW = 10000  # 10,000 units
+NODE_NAMES = SPEC.node_names
+NUM_TS_NODES = SPEC.num_nodes  # 25
 
 
-def build_large_nl_model():
+def build_large_nl_model(spec=SPEC):
     """
-    Builds the 25-node, 610-variable Minimum Cost Flow NL Model.
+    Builds the Minimum Cost Flow NL Model for `spec` (25 nodes / 610 variables by default).
+    g, s and x are each a single integer array symbol whose bounds come
+    straight from the GridSpec arrays.
     """
     print("--- Building Large-Scale Complex NL Model ---")
     # Use dwave.optimization.Model
@@ -76,123 +83,104 @@ def build_large_nl_model():
 
     # --- 2a. Define Decision Variables ---
 
-    # We must use setattr() to dynamically assign labeled variables to the model
-
-    # 8 Integer variables for generation
-    g = []
-    for i in range(NUM_SOURCES):
-        var_label = f"g{i}"
-        # Create variable with keywords only (no positional args)
-        var = model.integer(lower_bound=0, upper_bound=SOURCE_DATA[i]["max_gen"])
-        # Attach it to the model so the library can find its label
-        setattr(model, var_label, var)
-        g.append(var)
-
-    # 2 Integer variables for final battery storage
-    s = []
-    for j in range(NUM_BATTERIES):
-        var_label = f"s{j}"
-        var = model.integer(lower_bound=BATTERY_DATA[j]["min_cap"], upper_bound=BATTERY_DATA[j]["max_cap"])
-        setattr(model, var_label, var)
-        s.append(var)
-
-    # 600 (25 * 24) Integer variables for arc flow
-    x = {}
-    for k_idx, k_name in enumerate(NODE_NAMES):
-        for l_idx, l_name in enumerate(NODE_NAMES):
-            if k_idx == l_idx:
-                continue  # No self-loops
-            var_label = f"x_{k_name}_{l_name}"
-            var = model.integer(lower_bound=0, upper_bound=MAX_ARC_FLOW)
-            setattr(model, var_label, var)
-            x[(k_name, l_name)] = var
-
-    print(f"Total variables: {len(g)} (gen) + {len(s)} (storage) + {len(x)} (arcs) = {len(g) + len(s) + len(x)}")
+    # One integer array for generation (one entry per source)
+    g = model.integer(spec.num_sources, lower_bound=0, upper_bound=spec.source_max_gen)
 
-    # --- 2b. Define Objective Function ---
-    # Use Python's built-in `sum()` function
-    objective = sum(SOURCE_DATA[i]["cost"] * g[i] for i in range(NUM_SOURCES))
-    model.minimize(objective)
+    # One integer array for final battery storage
+    s = model.integer(spec.num_batteries, lower_bound=spec.battery_min_cap, upper_bound=spec.battery_max_cap)
 
-    # --- 2c. Add Constraints (Flow Conservation at each TS Node) ---
+    # One integer array for arc flow (entry a = flow on spec arc a)
+    x = model.integer(spec.num_arcs, lower_bound=0, upper_bound=spec.arc_cap)
 
-    # Loop over all 25 TS nodes
-    for k_idx, k_name in enumerate(NODE_NAMES):
+    print(f"Total variables: {spec.num_sources} (gen) + {spec.num_batteries} (storage) + "
+          f"{spec.num_arcs} (arcs) = {spec.num_vars}")
 
-        # Use Python's built-in `sum()` function
-        flow_in = sum(x[(l_name, k_name)] for l_idx, l_name in enumerate(NODE_NAMES) if l_idx != k_idx)
-        flow_out = sum(x[(k_name, l_name)] for l_idx, l_name in enumerate(NODE_NAMES) if l_idx != k_idx)
-
-        # Use model.add_constraint()
-
-        if 0 <= k_idx < 8:
-            # --- Type 1: Source TS Node (Nodes 0-7) ---
-            model.add_constraint(flow_in - flow_out + g[k_idx] == 0)
+    # --- 2b. Define Objective Function ---
+    objective = (model.constant(spec.source_cost) * g).sum()
+    model.minimize(objective)
 
-        elif 8 <= k_idx < 10:
-            # --- Type 2: Battery TS Node (Nodes 8-9) ---
-            j = k_idx - 8  # Battery index (0 or 1)
-            initial_storage = BATTERY_DATA[j]["initial_cap"]
-            final_storage_var = s[j]
-            model.add_constraint(flow_in - flow_out + (initial_storage - final_storage_var) == 0)
+    # --- 2c. Add Constraints (Flow Conservation at each TS Node) ---
+    # In/out arcs of each node come from the incidence matrix row
+    # (+1 = arc enters, -1 = arc leaves) and are summed with one
+    # indexed sum each.
+    A = spec.incidence_matrix()
+    first_sink = spec.num_sources + spec.num_batteries
+
+    for k_idx in range(spec.num_nodes):
+        row = slice(A.indptr[k_idx], A.indptr[k_idx + 1])
+        arcs, signs = A.indices[row], A.data[row]
+
+        terms = []
+        if (signs > 0).any():
+            terms.append(x[arcs[signs > 0]].sum())
+        if (signs < 0).any():
+            terms.append(-x[arcs[signs < 0]].sum())
+
+        if k_idx < spec.num_sources:
+            # --- Type 1: Source TS Node ---
+            terms.append(g[k_idx])
+            rhs = 0.0
+
+        elif k_idx < first_sink:
+            # --- Type 2: Battery TS Node ---
+            j = k_idx - spec.num_sources
+            terms.append(-s[j])
+            rhs = -float(spec.battery_initial_cap[j])
 
         else:
-            # --- Type 3: Sink TS Node (Nodes 10-24) ---
-            model.add_constraint(flow_in - flow_out == DEMAND_PER_SINK_NODE)
+            # --- Type 3: Sink TS Node ---
+            rhs = float(spec.sink_demand[k_idx - first_sink])
 
-    # The `dwave.optimization.Model` object uses the `.num_constraints` property
-    print(f"Total constraints: {model.num_constraints}")
+        balance = terms[0]
+        for term in terms[1:]:
+            balance = balance + term
+        model.add_constraint(balance == rhs)
 
-    # Return all the variable lists/dicts so we can read their .state() later
+    print(f"Total constraints: {model.num_constraints()}")
+
+    # Return the array symbols so we can read their .state() later
     return model, g, s, x
 
 
-def print_solution(model, g_vars, s_vars, x_vars):
+def print_solution(model, g_vars, s_vars, x_vars, spec=SPEC):
     """
     Prints a formatted summary of the best solution.
-    Reads results directly from the .state() of the model's variables.
+    Reads results directly from the .state() of the model's array symbols.
     """
 
     # Check if a solution was found (the state will be populated)
-    # We can check the state of the first variable.
     try:
-        # Try to read the state. If it's None, no solution was found.
-        first_state = g_vars[0].state()
-        if first_state is None:
-            print("\n--- ERROR: No feasible solutions found! ---")
-            print("This could mean the problem is infeasible or the time limit was too short.")
-            return
+        gen_state = g_vars.state()
+        storage_state = s_vars.state()
+        flow_state = x_vars.state()
     except Exception as e:
         print(f"\n--- ERROR: Failed to read solution state. Details: {e} ---")
+        print("This could mean the problem is infeasible or the time limit was too short.")
         return
 
-    # --- THIS IS THE FIX ---
     # Manually recalculate the energy from the decision variable states,
     # as model.objective.state() is not available.
     energy = 0
     total_gen = 0
     print("\nSource Generation:")
-    for i in range(NUM_SOURCES):
-        # Read the .state() from the variable object
-        gen = int(g_vars[i].state())
-        cost = SOURCE_DATA[i]['cost']
+    for i in range(spec.num_sources):
+        gen = int(gen_state[i])
+        cost = spec.source_cost[i]
         energy += gen * cost  # Recalculate cost
 
         total_gen += gen
-        max_gen = SOURCE_DATA[i]['max_gen']
-        print(f"  - S{i} ({SOURCE_DATA[i]['type']:<7} Cost ${cost:.2f}): {gen: >7,} / {max_gen: >7,} units")
+        max_gen = int(spec.source_max_gen[i])
+        print(f"  - S{i} ({spec.source_type[i]:<7} Cost ${cost:.2f}): {gen: >7,} / {max_gen: >7,} units")
 
     print("\n--- Optimal Solution Found ---")
     print(f"Minimal Generation Cost: ${energy:,.2f}")
     print(f"  Total Generation: {total_gen:,.0f} units")
-    # --- END FIX ---
 
     print("\nBattery Storage:")
     total_discharge = 0
-    for j in range(NUM_BATTERIES):
-        # Read the .state() from the variable object
-        final = int(s_vars[j].state())
-        initial = BATTERY_DATA[j]['initial_cap']
+    for j in range(spec.num_batteries):
+        final = int(storage_state[j])
+        initial = int(spec.battery_initial_cap[j])
         discharged = initial - final
         total_discharge += discharged
 
@@ -204,25 +192,99 @@ def print_solution(model, g_vars, s_vars, x_vars):
     print("\n--- Energy Balance Check ---")
     total_supply = total_gen + total_discharge
     print(f"  Total Supply (Gen + Discharge): {total_supply:,.0f}")
-    print(f"  Total Demand (Sinks):         {TOTAL_DEMAND:,.0f}")
-    print(f"  Surplus/Deficit:              {total_supply - TOTAL_DEMAND:,.0f}")
+    print(f"  Total Demand (Sinks):         {spec.total_demand:,.0f}")
+    print(f"  Surplus/Deficit:              {total_supply - spec.total_demand:,.0f}")
 
     print("\n--- Non-Zero Arc Flows (Top 50) ---")
     count = 0
-    total_flow = 0
-    for (k_name, l_name), x_var in x_vars.items():
-
-        # Read the .state() from the variable object
-        flow = int(x_var.state())
-        total_flow += flow
-
+    for (k_name, l_name), flow in zip(spec.arc_names(), flow_state.astype(int).tolist()):
         if flow > 0:
             count += 1
             if count <= 50:  # Only print the first 50 to avoid spam
                 print(f"  {k_name: <7} -> {l_name: <7} : {flow:,.0f} units")
     if count > 50:
         print(f"  ...and {count - 50} more non-zero flows.")
-    print(f"  Total flow across all {len(x_vars)} arcs: {total_flow:,.0f} units")
+    print(f"  Total flow across all {spec.num_arcs} arcs: {flow_state.sum():,.0f} units")
+
+
+def solve_nl(model, token=TEACHER_TOKEN, time_limit=TIME_LIMIT_SEC):
+    """
+    Submit to LeapHybridNLSampler and block until the result has been
+    loaded into `model`, reporting the submit / wait / done states.
+    """
+    sampler = LeapHybridNLSampler(token=token)
+    progress.report("status", message=f"Submitting NL model to D-Wave (time limit {time_limit}s)...",
+                    state="submitting")
+    future = sampler.sample(
+        model,
+        time_limit=time_limit,
+        label="Large-Complex-Network-Solve-NL"
+    )
+
+    t0 = time.time()
+    progress.report("status", message="Submitted to D-Wave, waiting for results...", state="submitted")
+    while not future.done():
+        time.sleep(POLL_INTERVAL_SEC)
+        progress.report("status", message=f"Waiting for D-Wave ({time.time() - t0:.0f}s)...",
+                        state="waiting", elapsed=time.time() - t0)
+
+    result = future.result()
+    progress.report("status", message="D-Wave solve complete.", state="done")
+    return result
+
+
+def use_local_sampler(token=TEACHER_TOKEN):
+    return SAMPLER == "local" or (SAMPLER == "auto" and not token)
+
+
+def solve_nl_local(model, g_vars, s_vars, x_vars, spec=SPEC, num_sweeps=LOCAL_NUM_SWEEPS, seed=LOCAL_SEED):
+    """
+    Offline stand-in for solve_nl(): anneal the flow model (same GridSpec
+    arrays as the NL model) and load the best state into the symbols.
+    """
+    progress.report("status", message=f"Annealing locally ({num_sweeps} sweeps)...", state="submitting")
+    lb, ub = spec.var_bounds()
+    problem = local_annealer.LinearProblem(spec.objective(), spec.balance_matrix(), spec.balance_rhs(), lb, ub)
+    result = local_annealer.anneal(problem, num_sweeps=num_sweeps, seed=seed)
+
+    values = result.samples[result.best]
+    num_gs = spec.num_sources + spec.num_batteries
+    if not model.is_locked():
+        model.lock()
+    model.states.resize(1)
+    g_vars.set_state(0, values[:spec.num_sources])
+    s_vars.set_state(0, values[spec.num_sources:num_gs])
+    x_vars.set_state(0, values[num_gs:])
+    progress.report("status", message="Local annealing complete.", state="done")
+    return result
+
+
+def build_payload(g_vars, s_vars, x_vars, spec=SPEC, presolved=None):
+    """
+    Frontend payload of the model's first state (if it is feasible). With
+    `presolved` the model was built from presolved.spec and the state is
+    mapped back to `spec`.
+    """
+    model_spec = spec if presolved is None else presolved.spec
+    gen, storage, flow = g_vars.state(), s_vars.state(), x_vars.state()
+    residual = model_spec.balance_matrix() @ np.concatenate([gen, storage, flow]) - model_spec.balance_rhs()
+    if residual.size and np.abs(residual).max() > 1e-6:
+        return {"ok": False, "error": "No feasible solution found (NL sampler)."}
+    if presolved is not None:
+        gen, storage, flow = presolved.postsolve(gen, storage, flow)
+    return frontend_result.build_frontend_result(spec, gen, storage, flow)
+
+
+def main(spec=SPEC):
+    """Presolve, build the NL model, solve it (Leap, or locally offline) and return the payload."""
+    presolved = presolve.presolve(spec)
+    progress.report("status", message=presolved.describe())
+    model, g_vars, s_vars, x_vars = build_large_nl_model(presolved.spec)
+    if use_local_sampler():
+        solve_nl_local(model, g_vars, s_vars, x_vars, presolved.spec)
+    else:
+        solve_nl(model)
+    return build_payload(g_vars, s_vars, x_vars, spec, presolved)
 
 
 # --- Main Execution ---
@@ -232,29 +294,21 @@ if __name__ == "__main__":
     # Get the model AND all the variable lists/dicts back
     model, g_vars, s_vars, x_vars = build_large_nl_model()
 
-    # 2. Check for API Token
-    if not TEACHER_TOKEN:
-        print("Error: TEACHER_TOKEN is not set. Please add your API key.")
-        sys.exit(1)
-
-    # 3. Set up the Hybrid Sampler
-    print(f"\n--- Submitting to LeapHybridNLSampler (Time Limit: {TIME_LIMIT_SEC}s) ---")
-    # Use LeapHybridNLSampler
-    sampler = LeapHybridNLSampler(token=TEACHER_TOKEN)
-
+    # 2. Set up the Hybrid Sampler (local annealing without an API token)
+    local = use_local_sampler()
+    sampler_name = "local annealer" if local else "LeapHybridNLSampler"
+    budget = f"{LOCAL_NUM_SWEEPS} sweeps, seed {LOCAL_SEED}" if local else f"Time Limit: {TIME_LIMIT_SEC}s"
+    print(f"\n--- Submitting to {sampler_name} ({budget}) ---")
     try:
-        # 4. Solve the NL Model (API Call)
-        future = sampler.sample(
-            model,
-            time_limit=TIME_LIMIT_SEC,
-            label="Large-Complex-Network-Solve-NL"
-        )
+        # 3. Solve the NL Model (API Call, or locally)
+        print("...Waiting for results...")
 
-        print("...Waiting for D-Wave server to return results...")
-
-        # Call .result() to block. This populates the `model` object.
+        # Blocks until done. This populates the `model` object.
         # We can discard the return value, as we don't need it.
-        result_object = future.result()
+        if local:
+            solve_nl_local(model, g_vars, s_vars, x_vars)
+        else:
+            result_object = solve_nl(model)
 
         print("...Solving complete.")
 
@@ -265,7 +319,7 @@ if __name__ == "__main__":
         sys.exit(1)
 
     try:
-        # 5. Print the formatted solution (Local Code)
+        # 4. Print the formatted solution (Local Code)
 
         # Pass the stateful 'model' and the variable lists
         # to the new print_solution function.
@@ -0,0 +1,312 @@
+# --- Frontend JSON Payload (solver-agnostic) ---
+#
+# Human-readable plan and UI state built from plain solution arrays:
+#   gen[i]     = generation of source i
+#   storage[j] = final storage of battery j
+#   flow[a]    = flow on spec arc a
+#
+# Every backend (Gurobi, network simplex, ...) maps its own solution onto
+# these arrays and calls build_frontend_result(), so the UI always gets
+# the same payload no matter which solver ran.
+#
+# The arrays are read once into a SolutionView (integer NumPy arrays; for
+# Gurobi a single getAttr("X") call) and every helper below reads from
+# that view, so building a payload stays cheap at 100k+ arcs.
+
+import numpy as np
+
+try:
+    from . import layout
+except ImportError:  # run as a script from this folder
+    import layout
+
+
+def as_int_values(values):
+    """Round solver values to the nearest integer unit."""
+    return np.rint(np.asarray(values, dtype=np.float64)).astype(np.int64)
+
+
+# -----------------------------------------------------------
+# SOLUTION VIEW
+# -----------------------------------------------------------
+
+class SolutionView:
+    """
+    One solution as integer arrays over the spec's columns. flow may be
+    None when only generator / battery values were read (e.g. for a MIP
+    incumbent); flow queries then return nothing.
+    """
+
+    def __init__(self, spec, gen, storage, flow=None):
+        self.spec = spec
+        self.gen = as_int_values(gen)
+        self.storage = as_int_values(storage)
+        self.flow = as_int_values(flow) if flow is not None else np.zeros(0, dtype=np.int64)
+
+    @classmethod
+    def from_columns(cls, spec, values):
+        """View of a [g; s; x] value vector (the spec's column order)."""
+        values = np.asarray(values, dtype=np.float64)
+        num_gs = spec.num_sources + spec.num_batteries
+        flow = values[num_gs:] if values.size > num_gs else None
+        return cls(spec, values[:spec.num_sources], values[spec.num_sources:num_gs], flow)
+
+    @classmethod
+    def from_gurobi(cls, spec, model, variables=None):
+        """
+        Read all values with one model.getAttr("X", ...) call. variables
+        defaults to model.getVars(), i.e. a model whose columns are [g; s; x].
+        """
+        if variables is None:
+            variables = model.getVars()
+        return cls.from_columns(spec, model.getAttr("X", variables))
+
+    def flows_at_least(self, min_flow):
+        """Arc indices with flow >= min_flow, in arc order."""
+        return np.flatnonzero(self.flow >= min_flow)
+
+    def top_flows(self, top_n, min_flow=0):
+        """
+        Indices of the top_n largest flows >= min_flow, largest first and
+        equal flows in arc order (argpartition, then a sort of the top_n only).
+        """
+        arcs = self.flows_at_least(min_flow)
+        if top_n <= 0:
+            return arcs[:0]
+        if arcs.size > top_n:
+            values = self.flow[arcs]
+            kth = values[np.argpartition(-values, top_n - 1)[top_n - 1]]
+            above = arcs[values > kth]
+            arcs = np.concatenate([above, arcs[values == kth][:top_n - above.size]])
+        return arcs[np.lexsort((arcs, -self.flow[arcs]))]
+
+    def utilization(self):
+        """gen / max_gen per source (0 for sources without capacity)."""
+        max_gen = self.spec.source_max_gen
+        return np.divide(self.gen, max_gen, out=np.zeros(len(max_gen)), where=max_gen != 0)
+
+
+# -----------------------------------------------------------
+# VISUALIZATION: Extract large non-zero flows
+# -----------------------------------------------------------
+
+def get_visual_flows(view, min_flow=2000):
+    spec = view.spec
+    names = spec.node_names
+    arcs = view.flows_at_least(min_flow)
+    return [
+        {"src": names[tail], "dst": names[head], "flow": amount}
+        for tail, head, amount in zip(
+            spec.arc_tail[arcs].tolist(), spec.arc_head[arcs].tolist(), view.flow[arcs].tolist()
+        )
+    ]
+
+
+# -----------------------------------------------------------
+# HUMAN-READABLE DESCRIPTION FUNCTIONS
+# -----------------------------------------------------------
+
+def generator_level(g, util):
+    if g == 0:
+        return "OFF"
+    if util < 0.3:
+        return "LOW"
+    if util < 0.9:
+        return "MEDIUM"
+    return "FULL"
+
+
+def describe_generators(view):
+    spec = view.spec
+    lines = []
+    for i, (g, max_gen, util) in enumerate(zip(
+            view.gen.tolist(), spec.source_max_gen.astype(np.int64).tolist(), view.utilization().tolist())):
+        typ = spec.source_type[i]
+        level = generator_level(g, util)
+
+        if level == "OFF":
+            lines.append(f"Switch OFF {typ} generator S{i} (0 / {max_gen:,} units).")
+        else:
+            lines.append(f"Run {typ} generator S{i} at {level} output ({g:,}/{max_gen:,}).")
+
+    return lines
+
+
+def describe_batteries(view):
+    spec = view.spec
+    lines = []
+    for j, (final, initial, max_cap) in enumerate(zip(
+            view.storage.tolist(),
+            spec.battery_initial_cap.astype(np.int64).tolist(),
+            spec.battery_max_cap.astype(np.int64).tolist())):
+        delta = final - initial
+        pct = final / max_cap * 100 if max_cap else 0.0
+
+        if delta < 0:
+            lines.append(f"Discharge Battery {j} by {abs(delta):,} units ({final}/{max_cap}, {pct:.1f}%).")
+        elif delta > 0:
+            lines.append(f"Charge Battery {j} by {delta:,} units ({final}/{max_cap}, {pct:.1f}%).")
+        else:
+            lines.append(f"Battery {j} remains unchanged ({final}/{max_cap}, {pct:.1f}%).")
+
+    return lines
+
+
+def describe_major_flows(view, top_n=10, min_threshold=5000):
+    spec = view.spec
+    names = spec.node_names
+    arcs = view.top_flows(top_n, min_threshold)
+    return [
+        f"Send {amount:,} units from {names[tail]} → {names[head]}"
+        for tail, head, amount in zip(
+            spec.arc_tail[arcs].tolist(), spec.arc_head[arcs].tolist(), view.flow[arcs].tolist()
+        )
+    ]
+
+
+def explain_cost_logic(view):
+    spec = view.spec
+    lines = ["Cheapest generators used first:"]
+    gen = view.gen.tolist()
+    max_gen = spec.source_max_gen.astype(np.int64).tolist()
+    cost = spec.source_cost.tolist()
+
+    for i in spec.source_cost.argsort(kind="stable").tolist():
+        pct = gen[i] / max_gen[i] * 100 if max_gen[i] else 0.0
+        lines.append(f"- {spec.source_type[i]} S{i}: {gen[i]:,}/{max_gen[i]:,} units (cost ${cost[i]}, {pct:.1f}%)")
+
+    return lines
+
+
+# -----------------------------------------------------------
+# VISUALIZATION NODE POSITIONS (layout.py)
+# -----------------------------------------------------------
+
+# Largest flows drawn as the grid's primary edges
+MAX_PRIMARY_EDGES = 2000
+
+
+def get_node_positions(view):
+    """{name: {x, y, type}} for every spec node, laid out along the solved flows."""
+    spec = view.spec
+    x, y = layout.grid_layout(spec, view.flow if view.flow.size else np.zeros(spec.num_arcs))
+    return {
+        name: {"x": px, "y": py, "type": typ}
+        for name, px, py, typ in zip(
+            spec.node_names, np.round(x, 1).tolist(), np.round(y, 1).tolist(), layout.node_types(spec)
+        )
+    }
+
+
+def get_primary_edges(view, top_n=MAX_PRIMARY_EDGES):
+    """(src, dst) of the largest flows, largest first."""
+    spec = view.spec
+    names = spec.node_names
+    arcs = view.top_flows(top_n, min_flow=1)
+    return [
+        (names[tail], names[head])
+        for tail, head in zip(spec.arc_tail[arcs].tolist(), spec.arc_head[arcs].tolist())
+    ]
+
+
+# -----------------------------------------------------------
+# UI STATE
+# -----------------------------------------------------------
+
+def build_generator_state(view):
+    """Return structured info for each generator, for the UI."""
+    spec = view.spec
+    generators = []
+    for i, (g, max_gen, util) in enumerate(zip(
+            view.gen.tolist(), spec.source_max_gen.astype(np.int64).tolist(), view.utilization().tolist())):
+        generators.append({
+            "id": f"S{i}",
+            "node": f"TS_S{i}",
+            "type": spec.source_type[i],
+            "gen": g,
+            "max_gen": max_gen,
+            "util_pct": round(util * 100, 1),
+            "status": generator_level(g, util),
+        })
+    return generators
+
+
+def build_battery_state(view):
+    """Return structured info for each battery node."""
+    spec = view.spec
+    batteries = []
+    for j, (final, initial, max_cap) in enumerate(zip(
+            view.storage.tolist(),
+            spec.battery_initial_cap.astype(np.int64).tolist(),
+            spec.battery_max_cap.astype(np.int64).tolist())):
+        delta = final - initial
+        pct = final / max_cap * 100 if max_cap else 0.0
+
+        if delta < 0:
+            action = f"Discharge {abs(delta):,} units"
+        elif delta > 0:
+            action = f"Charge {delta:,} units"
+        else:
+            action = "No change"
+
+        batteries.append({
+            "id": f"B{j}",
+            "node": f"TS_B{j}",
+            "initial": initial,
+            "final": final,
+            "delta": delta,
+            "soc_pct": round(pct, 1),
+            "action": action,
+        })
+    return batteries
+
+
+def build_summary(view):
+    """High-level energy balance summary."""
+    spec = view.spec
+    total_gen = int(view.gen.sum())
+    discharge = spec.battery_initial_cap - view.storage
+    total_discharge = int(np.maximum(discharge, 0).sum())
+
+    total_supply = total_gen + total_discharge
+    total_demand = int(round(spec.total_demand))
+
+    return {
+        "total_generation": total_gen,
+        "total_discharge": total_discharge,
+        "total_supply": total_supply,
+        "total_demand": total_demand,
+        "surplus": total_supply - total_demand,
+    }
+
+
+# -----------------------------------------------------------
+# FRONTEND JSON BUILDER
+# -----------------------------------------------------------
+
+def build_frontend_result(spec, gen, storage, flow):
+    return build_view_result(SolutionView(spec, gen, storage, flow))
+
+
+def build_view_result(view):
+    return {
+        "ok": True,
+
+        # For drawing the grid
+        "nodes": get_node_positions(view),
+        "primary_edges": get_primary_edges(view),
+        "flows": get_visual_flows(view),
+
+        # For driving the UI
+        "generators": build_generator_state(view),
+        "batteries": build_battery_state(view),
+        "summary": build_summary(view),
+
+        # Narrative list of actions
+        "actions": (
+            describe_generators(view)
+            + describe_batteries(view)
+            + describe_major_flows(view)
+            + explain_cost_logic(view)
+        ),
+    }
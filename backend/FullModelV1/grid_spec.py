@@ -0,0 +1,374 @@
+# --- Grid Specification (shared by all full-model solver backends) ---
+#
+# One columnar, array-backed description of the minimum-cost-flow grid:
+#   - sources:   type, cost per unit, max generation
+#   - batteries: min / initial / max storage
+#   - sinks:     demand per sink-facing TS node
+#   - arcs:      tail / head node index, capacity, cost per unit
+#
+# Every builder (Gurobi, CQM, NL) reads the same GridSpec instead of
+# walking its own lists of dicts, so coefficient setup can be vectorized
+# and the grid can grow to the real 15,000-sink network.
+#
+# Node order is always: sources, then batteries, then sinks.
+
+import hashlib
+
+import numpy as np
+import scipy.sparse as sp
+
+# --- Hard-Coded Problem Data (25 TS nodes / 600 arcs) ---
+
+# 8 Source Nodes: (type, cost per unit, max generation)
+SOURCE_DATA = [
+    # Solar/Wind (Cheapest)
+    {"type": "Solar",   "cost": 2.0, "max_gen": 3000},
+    {"type": "Solar",   "cost": 2.1, "max_gen": 3000},
+    {"type": "Wind",    "cost": 2.2, "max_gen": 4000},
+    {"type": "Wind",    "cost": 2.3, "max_gen": 4000},
+    # Nuclear/Thermal (Intermediate)
+    {"type": "Nuclear", "cost": 3.0, "max_gen": 10000},
+    {"type": "Thermal", "cost": 3.5, "max_gen": 8000},
+    {"type": "Thermal", "cost": 3.6, "max_gen": 8000},
+    # Hydro (Costliest - Peaker)
+    {"type": "Hydro",   "cost": 5.0, "max_gen": 12000}
+]
+
+# 2 Battery Nodes: both start full (100%), min 10%
+BATTERY_DATA = [
+    {"max_cap": 10000, "initial_cap": 10000, "min_cap": 1000},
+    {"max_cap": 8000,  "initial_cap":  8000, "min_cap": 800}
+]
+
+# 15 Sink (Downstream) TS nodes, each representing 1000 sinks of 4.5 units
+SINKS_PER_TS_NODE = 1000
+DEMAND_PER_SINK = 4.5
+DEMAND_PER_SINK_NODE = SINKS_PER_TS_NODE * DEMAND_PER_SINK  # 4,500 units
+NUM_SINK_NODES = 15
+
+# Max flow for any single arc in the mesh
+MAX_ARC_FLOW = 10000
+
+SOURCE = 0
+BATTERY = 1
+SINK = 2
+
+
+class GridSpec:
+    """
+    Columnar grid description. All per-node and per-arc data are
+    contiguous NumPy arrays; node names are derived, not stored per dict.
+    """
+
+    def __init__(self, source_type, source_cost, source_max_gen,
+                 battery_min_cap, battery_initial_cap, battery_max_cap,
+                 sink_demand, arc_tail, arc_head, arc_cap, arc_cost=None, node_xy=None):
+        self.source_type = np.asarray(source_type, dtype=object)
+        self.source_cost = np.ascontiguousarray(source_cost, dtype=np.float64)
+        self.source_max_gen = np.ascontiguousarray(source_max_gen, dtype=np.float64)
+
+        self.battery_min_cap = np.ascontiguousarray(battery_min_cap, dtype=np.float64)
+        self.battery_initial_cap = np.ascontiguousarray(battery_initial_cap, dtype=np.float64)
+        self.battery_max_cap = np.ascontiguousarray(battery_max_cap, dtype=np.float64)
+
+        self.sink_demand = np.ascontiguousarray(sink_demand, dtype=np.float64)
+
+        self.arc_tail = np.ascontiguousarray(arc_tail, dtype=np.int64)
+        self.arc_head = np.ascontiguousarray(arc_head, dtype=np.int64)
+        self.arc_cap = np.ascontiguousarray(
+            np.broadcast_to(arc_cap, self.arc_tail.shape), dtype=np.float64
+        )
+        if arc_cost is None:
+            arc_cost = 0.0
+        self.arc_cost = np.ascontiguousarray(
+            np.broadcast_to(arc_cost, self.arc_tail.shape), dtype=np.float64
+        )
+
+        # Optional (num_nodes, 2) coordinates, used by distance-based arc selection
+        self.node_xy = None if node_xy is None else np.ascontiguousarray(node_xy, dtype=np.float64)
+
+        self._incidence = None
+        self._node_names = None
+        self._fingerprint = None
+        self._topology_fingerprint = None
+
+    # -------------------------------------------------------
+    # SIZES / INDEX RANGES
+    # -------------------------------------------------------
+
+    @property
+    def num_sources(self):
+        return len(self.source_cost)
+
+    @property
+    def num_batteries(self):
+        return len(self.battery_max_cap)
+
+    @property
+    def num_sinks(self):
+        return len(self.sink_demand)
+
+    @property
+    def num_nodes(self):
+        return self.num_sources + self.num_batteries + self.num_sinks
+
+    @property
+    def num_arcs(self):
+        return len(self.arc_tail)
+
+    @property
+    def num_vars(self):
+        """g, s and x columns of the flow model."""
+        return self.num_sources + self.num_batteries + self.num_arcs
+
+    @property
+    def battery_rows(self):
+        return np.arange(self.num_sources, self.num_sources + self.num_batteries)
+
+    @property
+    def sink_rows(self):
+        return np.arange(self.num_sources + self.num_batteries, self.num_nodes)
+
+    @property
+    def node_kind(self):
+        return np.repeat(
+            np.array([SOURCE, BATTERY, SINK], dtype=np.int8),
+            [self.num_sources, self.num_batteries, self.num_sinks]
+        )
+
+    @property
+    def total_demand(self):
+        return float(self.sink_demand.sum())
+
+    @property
+    def total_max_gen(self):
+        return float(self.source_max_gen.sum())
+
+    @property
+    def total_initial_storage(self):
+        return float(self.battery_initial_cap.sum())
+
+    # -------------------------------------------------------
+    # NAMES
+    # -------------------------------------------------------
+
+    @property
+    def node_names(self):
+        if self._node_names is None:
+            self._node_names = [f"TS_S{i}" for i in range(self.num_sources)] + \
+                               [f"TS_B{j}" for j in range(self.num_batteries)] + \
+                               [f"TS_D{k}" for k in range(self.num_sinks)]
+        return self._node_names
+
+    def arc_names(self):
+        """(src, dst) name pairs, one per arc."""
+        names = self.node_names
+        return [(names[k], names[l]) for k, l in zip(self.arc_tail.tolist(), self.arc_head.tolist())]
+
+    def var_names(self):
+        """Variable names in column order: g0.., s0.., x_<src>_<dst>.."""
+        return [f"g{i}" for i in range(self.num_sources)] + \
+               [f"s{j}" for j in range(self.num_batteries)] + \
+               [f"x_{src}_{dst}" for src, dst in self.arc_names()]
+
+    # -------------------------------------------------------
+    # MATRIX FORM
+    # -------------------------------------------------------
+
+    def incidence_matrix(self):
+        """Sparse node-arc incidence matrix: +1 where the arc enters, -1 where it leaves."""
+        if self._incidence is None:
+            self._incidence = build_incidence_matrix(self.num_nodes, self.arc_tail, self.arc_head)
+        return self._incidence
+
+    def balance_rhs(self):
+        """
+        Right-hand side b of the flow balance rows:
+          Source rows:  in - out + g = 0
+          Battery rows: in - out + (initial - s) = 0  ->  in - out - s = -initial
+          Sink rows:    in - out = demand
+        """
+        b = np.zeros(self.num_nodes)
+        b[self.battery_rows] = -self.battery_initial_cap
+        b[self.sink_rows] = self.sink_demand
+        return b
+
+    def balance_matrix(self):
+        """Balance rows over all columns [g; s; x]: K = [G S A]."""
+        n = self.num_nodes
+        G = sp.csr_matrix(
+            (np.ones(self.num_sources), (np.arange(self.num_sources), np.arange(self.num_sources))),
+            shape=(n, self.num_sources)
+        )
+        S = sp.csr_matrix(
+            (-np.ones(self.num_batteries), (self.battery_rows, np.arange(self.num_batteries))),
+            shape=(n, self.num_batteries)
+        )
+        return sp.hstack([G, S, self.incidence_matrix()], format="csr")
+
+    def var_bounds(self):
+        """Lower / upper bound arrays over all columns [g; s; x]."""
+        lb = np.concatenate([
+            np.zeros(self.num_sources),
+            self.battery_min_cap,
+            np.zeros(self.num_arcs)
+        ])
+        ub = np.concatenate([
+            self.source_max_gen,
+            self.battery_max_cap,
+            self.arc_cap
+        ])
+        return lb, ub
+
+    def objective(self):
+        """Cost vector over all columns [g; s; x]."""
+        return np.concatenate([
+            self.source_cost,
+            np.zeros(self.num_batteries),
+            self.arc_cost
+        ])
+
+    # -------------------------------------------------------
+    # CONTENT HASH
+    # -------------------------------------------------------
+
+    def fingerprint(self):
+        """
+        SHA-256 over every column (dtype, shape and bytes, in a fixed
+        order): equal grids hash equal no matter how they were built.
+        """
+        if self._fingerprint is None:
+            h = hashlib.sha256()
+            h.update("\x1f".join(map(str, self.source_type)).encode())
+            columns = [
+                self.source_cost, self.source_max_gen,
+                self.battery_min_cap, self.battery_initial_cap, self.battery_max_cap,
+                self.sink_demand,
+                self.arc_tail, self.arc_head, self.arc_cap, self.arc_cost,
+            ]
+            if self.node_xy is not None:
+                columns.append(self.node_xy)
+            for col in columns:
+                if col.dtype.kind == "f":
+                    col = col + 0.0  # -0.0 -> 0.0
+                h.update(f"|{col.dtype.str}{col.shape}|".encode())
+                h.update(col.tobytes())
+            self._fingerprint = h.hexdigest()
+        return self._fingerprint
+
+    def topology_fingerprint(self):
+        """
+        SHA-256 of the structure only (node counts and arc endpoints):
+        specs that differ only in costs, bounds and demands share it, so a
+        model built for one can be re-used for the other.
+        """
+        if self._topology_fingerprint is None:
+            h = hashlib.sha256()
+            h.update(f"{self.num_sources},{self.num_batteries},{self.num_sinks}|".encode())
+            h.update(self.arc_tail.tobytes())
+            h.update(self.arc_head.tobytes())
+            self._topology_fingerprint = h.hexdigest()
+        return self._topology_fingerprint
+
+    # -------------------------------------------------------
+    # DERIVED SPECS
+    # -------------------------------------------------------
+
+    def with_arcs(self, arc_tail, arc_head, arc_cap=None, arc_cost=None):
+        """Same nodes and data, different arc set."""
+        return GridSpec(
+            self.source_type, self.source_cost, self.source_max_gen,
+            self.battery_min_cap, self.battery_initial_cap, self.battery_max_cap,
+            self.sink_demand,
+            arc_tail, arc_head,
+            MAX_ARC_FLOW if arc_cap is None else arc_cap,
+            arc_cost,
+            self.node_xy
+        )
+
+    def with_data(self, source_max_gen=None, battery_initial_cap=None, sink_demand=None,
+                  source_cost=None):
+        """Same nodes and arcs, some node data replaced (e.g. one period of a profile)."""
+        spec = GridSpec(
+            self.source_type,
+            self.source_cost if source_cost is None else source_cost,
+            self.source_max_gen if source_max_gen is None else source_max_gen,
+            self.battery_min_cap,
+            self.battery_initial_cap if battery_initial_cap is None else battery_initial_cap,
+            self.battery_max_cap,
+            self.sink_demand if sink_demand is None else sink_demand,
+            self.arc_tail, self.arc_head, self.arc_cap, self.arc_cost,
+            self.node_xy
+        )
+        spec._incidence = self._incidence  # same arcs
+        return spec
+
+
+# -----------------------------------------------------------
+# NETWORK STRUCTURE
+# -----------------------------------------------------------
+
+def full_mesh_arcs(num_nodes):
+    """
+    Tail/head index arrays of the fully-connected mesh (no self-loops),
+    ordered by tail, then head.
+    """
+    tail = np.repeat(np.arange(num_nodes), num_nodes - 1)
+    head = np.tile(np.arange(num_nodes - 1), num_nodes)
+    head += head >= tail
+    return tail, head
+
+
+def build_incidence_matrix(num_nodes, tail, head):
+    """Sparse node-arc incidence matrix: +1 where the arc enters, -1 where it leaves."""
+    num_arcs = len(tail)
+    cols = np.arange(num_arcs)
+    return sp.csr_matrix(
+        (
+            np.concatenate([np.ones(num_arcs), -np.ones(num_arcs)]),
+            (np.concatenate([head, tail]), np.concatenate([cols, cols]))
+        ),
+        shape=(num_nodes, num_arcs)
+    )
+
+
+# -----------------------------------------------------------
+# FACTORIES
+# -----------------------------------------------------------
+
+def build_grid_spec(num_sink_nodes=NUM_SINK_NODES, demand_per_sink_node=None,
+                    max_arc_flow=MAX_ARC_FLOW, mesh=True, node_xy=None):
+    """
+    Grid with the hard-coded sources and batteries and `num_sink_nodes`
+    sink-facing TS nodes on a full mesh. Total demand is kept at
+    15 * 4,500 unless `demand_per_sink_node` is given, so e.g.
+    build_grid_spec(15000) models the 15,000 real sinks at 4.5 units each.
+    With mesh=False the spec has no arcs yet (see arc_selection.py).
+    """
+    if demand_per_sink_node is None:
+        demand_per_sink_node = NUM_SINK_NODES * DEMAND_PER_SINK_NODE / num_sink_nodes
+
+    num_nodes = len(SOURCE_DATA) + len(BATTERY_DATA) + num_sink_nodes
+    if mesh:
+        tail, head = full_mesh_arcs(num_nodes)
+    else:
+        tail = head = np.zeros(0, dtype=np.int64)
+
+    return GridSpec(
+        source_type=[src["type"] for src in SOURCE_DATA],
+        source_cost=[src["cost"] for src in SOURCE_DATA],
+        source_max_gen=[src["max_gen"] for src in SOURCE_DATA],
+        battery_min_cap=[bat["min_cap"] for bat in BATTERY_DATA],
+        battery_initial_cap=[bat["initial_cap"] for bat in BATTERY_DATA],
+        battery_max_cap=[bat["max_cap"] for bat in BATTERY_DATA],
+        sink_demand=np.full(num_sink_nodes, demand_per_sink_node, dtype=np.float64),
+        arc_tail=tail,
+        arc_head=head,
+        arc_cap=max_arc_flow,
+        node_xy=node_xy
+    )
+
+
+def default_grid_spec():
+    """The hard-coded 25 TS node / 600 arc model."""
+    return build_grid_spec(NUM_SINK_NODES, DEMAND_PER_SINK_NODE)
@@ -0,0 +1,268 @@
+# --- Hierarchical Two-Level Solve (aggregated TS nodes -> real sinks) ---
+#
+# Every TS_D* node of the grid stands in for a cluster of real sinks
+# (1,000 sinks of 4.5 units each in the default grid). A flat model over
+# all 15,000 sinks does not scale, so the plan is built in two levels:
+#
+#   1. top level:  the aggregated grid (network simplex or Gurobi on the
+#                  presolved spec), giving the net inflow of every TS_D*
+#   2. clusters:   one distribution subproblem per TS_D* node, with that
+#                  inflow as the supply at its feed point; independent of
+#                  each other, so they run in parallel
+#
+# Cluster networks are generated deterministically per cluster (sinks in a
+# disc of CLUSTER_RADIUS_KM around the feed point, lognormal demand
+# shares): a radial feeder tree (minimum spanning tree of the nearest-
+# neighbour graph) rated for its downstream demand plus TIE_CAPACITY
+# cross-ties between neighbours. Line cost is its length (flow * km, a
+# loss proxy); demand that cannot be delivered goes over a penalty arc
+# from the feed point and is reported as unserved. Each cluster is a
+# plain min-cost flow for network_simplex.solve_min_cost_flow.
+#
+# iter_clusters() streams cluster results as they finish from a process
+# pool (scripts); backend/hierarchy.py fans the clusters out over the job
+# worker pool instead and streams them to the browser.
+
+import concurrent.futures
+import multiprocessing
+import os
+import time
+
+import numpy as np
+from scipy.sparse import coo_matrix
+from scipy.sparse.csgraph import breadth_first_order, connected_components, minimum_spanning_tree
+from scipy.spatial import cKDTree
+
+try:
+    from . import network_simplex
+    from . import scenarios
+    from .grid_spec import DEMAND_PER_SINK, default_grid_spec
+except ImportError:  # run as a script from this folder
+    import network_simplex
+    import scenarios
+    from grid_spec import DEMAND_PER_SINK, default_grid_spec
+
+SPEC = default_grid_spec()
+
+# Cluster generation (seeded per cluster, so every run sees the same sinks)
+CLUSTER_SEED = 15000
+CLUSTER_RADIUS_KM = 5.0
+DEMAND_SPREAD = 0.4        # sigma of the lognormal per-sink demand factor
+NEIGHBOURS = 4             # nearest-neighbour links per sink
+TREE_HEADROOM = 1.25       # feeder tree rating / downstream demand
+TIE_CAPACITY = 4 * DEMAND_PER_SINK
+
+# Flows below this are treated as zero
+TOLERANCE = 1e-9
+
+MAX_WORKERS = os.cpu_count() or 1
+
+
+# -----------------------------------------------------------
+# LEVEL 1: AGGREGATED GRID
+# -----------------------------------------------------------
+
+def solve_top_level(solver="netsimplex", spec=SPEC):
+    """
+    Solve the aggregated grid. Returns {ok, solver, status, cost,
+    clusters}; clusters holds one task per sink TS node for solve_cluster():
+    {index, node, demand, supply (net inflow), arrivals {upstream node: flow}}.
+    """
+    if solver not in scenarios.SCENARIO_SOLVERS:
+        raise ValueError(f"Solver {solver!r} cannot solve the top level.")
+    t0 = time.perf_counter()
+    status, gen, storage, flow = scenarios.SCENARIO_SOLVERS[solver](spec)
+    result = {"ok": True, "solver": solver, "status": status}
+    if gen is None:
+        return result
+
+    inflow = spec.incidence_matrix() @ flow  # in - out per node
+    names = spec.node_names
+    carrying = np.flatnonzero((flow > TOLERANCE) & (spec.arc_head >= spec.num_sources + spec.num_batteries))
+    carrying = carrying[np.argsort(spec.arc_head[carrying], kind="stable")]
+    by_sink = np.split(carrying, np.searchsorted(spec.arc_head[carrying], spec.sink_rows[1:]))
+
+    result.update({
+        "cost": round(float(spec.objective() @ np.concatenate([gen, storage, flow])), 2),
+        "clusters": [
+            {
+                "index": k,
+                "node": names[row],
+                "demand": float(spec.sink_demand[k]),
+                "supply": float(inflow[row]),
+                "arrivals": {names[spec.arc_tail[a]]: float(flow[a]) for a in arcs.tolist()},
+            }
+            for k, (row, arcs) in enumerate(zip(spec.sink_rows.tolist(), by_sink))
+        ],
+        "solve_time_ms": round((time.perf_counter() - t0) * 1000, 3),
+    })
+    return result
+
+
+# -----------------------------------------------------------
+# LEVEL 2: CLUSTER DISTRIBUTION NETWORKS
+# -----------------------------------------------------------
+
+class ClusterNetwork:
+    """
+    Node 0 is the feed point (the TS node), nodes 1..m the sinks. Arcs
+    are the lines in both directions, then one unserved-demand arc per sink.
+    """
+
+    def __init__(self, xy, demand_share, tail, head, capacity, cost, num_lines):
+        self.xy = xy
+        self.demand_share = demand_share
+        self.tail = tail
+        self.head = head
+        self.capacity = capacity
+        self.cost = cost
+        self.num_lines = num_lines  # directed line arcs (tail[:num_lines])
+
+    @property
+    def num_sinks(self):
+        return len(self.demand_share)
+
+
+def cluster_network(index, demand):
+    """Deterministic distribution network of cluster `index` (DEMAND_PER_SINK per sink on average)."""
+    m = max(1, int(round(demand / DEMAND_PER_SINK)))
+    rng = np.random.default_rng(CLUSTER_SEED + index)
+
+    radius = CLUSTER_RADIUS_KM * np.sqrt(rng.random(m))
+    angle = rng.random(m) * 2 * np.pi
+    xy = np.vstack([[0.0, 0.0], np.column_stack([radius * np.cos(angle), radius * np.sin(angle)])])
+    share = rng.lognormal(0.0, DEMAND_SPREAD, m)
+    share /= share.sum()
+
+    # Nearest-neighbour graph (undirected, i < j)
+    n = m + 1
+    dist, nearest = cKDTree(xy).query(xy, k=min(NEIGHBOURS + 1, n))
+    i = np.repeat(np.arange(n), nearest.shape[1] - 1)
+    j = nearest[:, 1:].ravel()
+    length = dist[:, 1:].ravel()
+    i, j = np.minimum(i, j), np.maximum(i, j)
+    _, first = np.unique(i * n + j, return_index=True)
+    i, j, length = i[first], j[first], length[first]
+
+    # Components without the feed point get a line from it to their closest node
+    num_parts, part = connected_components(coo_matrix((length, (i, j)), shape=(n, n)), directed=False)
+    for p in range(num_parts):
+        if p != part[0]:
+            members = np.flatnonzero(part == p)
+            closest = members[np.argmin(np.hypot(*xy[members].T))]
+            i, j = np.append(i, 0), np.append(j, closest)
+            length = np.append(length, np.hypot(*xy[closest]))
+
+    # Feeder tree: minimum spanning tree, each line rated for its downstream demand
+    graph = coo_matrix((length, (i, j)), shape=(n, n)).tocsr()
+    tree = minimum_spanning_tree(graph)
+    order, parent = breadth_first_order(tree, 0, directed=False)
+    downstream = np.concatenate([[0.0], share])
+    for v in order[:0:-1].tolist():
+        downstream[parent[v]] += downstream[v]
+
+    in_tree = np.zeros(len(i), dtype=bool)
+    tree_key = np.minimum(order[1:], parent[order[1:]]) * n + np.maximum(order[1:], parent[order[1:]])
+    in_tree[np.isin(i * n + j, tree_key)] = True
+    child = np.where(parent[j] == i, j, i)  # the end further from the feed point
+    rating = np.where(in_tree, TREE_HEADROOM * downstream[child], np.nan)  # share of the supply
+
+    # Lines in both directions, then unserved demand straight from the feed point
+    penalty = 1.0 + 2 * length.sum()  # more than any path through the lines
+    tail = np.concatenate([i, j, np.zeros(m, dtype=np.int64)])
+    head = np.concatenate([j, i, np.arange(1, n)])
+    cost = np.concatenate([length, length, np.full(m, penalty)])
+    return ClusterNetwork(xy, share, tail, head, np.concatenate([rating, rating, share]), cost, 2 * len(i))
+
+
+def solve_cluster(task):
+    """
+    Level-2 solve of one cluster task (from solve_top_level()): distribute
+    task["supply"] to the cluster's sinks. Picklable in and out, so it
+    runs in any worker process.
+    """
+    t0 = time.perf_counter()
+    net = cluster_network(task["index"], task["demand"])
+    supply = float(task["supply"])
+
+    # Tree ratings and unserved caps are demand shares: scale to the supply
+    capacity = net.capacity * supply
+    capacity[:net.num_lines] = np.where(np.isnan(net.capacity[:net.num_lines]), TIE_CAPACITY,
+                                        np.ceil(capacity[:net.num_lines]))
+    node_supply = np.concatenate([[supply], -net.demand_share * supply])
+
+    status, x, _, iterations = network_simplex.solve_min_cost_flow(
+        net.num_sinks + 1, net.tail, net.head, capacity, net.cost, node_supply
+    )
+    result = {
+        "ok": True,
+        "cluster": task["index"],
+        "node": task["node"],
+        "status": status,
+        "sinks": net.num_sinks,
+        "supply": round(supply, 6),
+        "pivots": iterations,
+    }
+    if status == "optimal":
+        lines = slice(0, net.num_lines)
+        line_flow, line_cap = x[lines], capacity[lines]
+        unserved = x[net.num_lines:]
+        used = np.flatnonzero(line_flow > TOLERANCE)
+        # Unrated lines (capacity 0, e.g. every line when supply == 0) carry no loading
+        loading = np.divide(line_flow, line_cap, out=np.zeros_like(line_flow), where=line_cap > 0)
+        result.update({
+            "served": round(float(supply - unserved.sum()), 6),
+            "unserved": round(float(unserved.sum()), 6),
+            "unserved_sinks": (np.flatnonzero(unserved > TOLERANCE) + 1).tolist(),
+            "loss_proxy": round(float(net.cost[lines] @ line_flow), 3),  # flow * km
+            "lines_used": len(used),
+            "max_loading": round(float(loading.max(initial=0.0)), 4),
+            "congested_lines": int((line_flow[used] >= line_cap[used] - 1e-6).sum()),
+            # Full-resolution plan: [from, to, flow], node 0 = feed point, i = sink i
+            "flows": np.column_stack([net.tail[used], net.head[used], np.round(line_flow[used], 6)]).tolist(),
+        })
+    result["solve_time_ms"] = round((time.perf_counter() - t0) * 1000, 3)
+    return result
+
+
+# -----------------------------------------------------------
+# PARALLEL DRIVER (scripts; the web app uses backend/hierarchy.py)
+# -----------------------------------------------------------
+
+def iter_clusters(tasks, max_workers=MAX_WORKERS):
+    """Yield solve_cluster() results as they finish, from a pool of max_workers processes."""
+    if max_workers <= 1:
+        for task in tasks:
+            yield solve_cluster(task)
+        return
+
+    ctx = multiprocessing.get_context("spawn")
+    with concurrent.futures.ProcessPoolExecutor(max_workers, mp_context=ctx) as pool:
+        futures = [pool.submit(solve_cluster, task) for task in tasks]
+        for future in concurrent.futures.as_completed(futures):
+            yield future.result()
+
+
+def solve_hierarchical(solver="netsimplex", spec=SPEC, max_workers=MAX_WORKERS):
+    """Top level, then the clusters in parallel. Returns (top, [cluster results in finish order])."""
+    top = solve_top_level(solver, spec)
+    if "clusters" not in top:
+        return top, []
+    return top, list(iter_clusters(top["clusters"], max_workers))
+
+
+# -----------------------------------------------------------
+# MAIN (debug mode)
+# -----------------------------------------------------------
+
+if __name__ == "__main__":
+    t0 = time.perf_counter()
+    top = solve_top_level()
+    print(f"Top level: {top['status']}, cost ${top['cost']:,.2f} ({top['solve_time_ms']:.1f} ms), "
+          f"{len(top['clusters'])} clusters")
+
+    for result in iter_clusters(top["clusters"]):
+        print(f"  {result['node']:<7} {result['sinks']:>5} sinks  served {result['served']:>9,.1f}  "
+              f"unserved {result['unserved']:>6,.1f}  loss {result['loss_proxy']:>9,.1f}  "
+              f"max loading {result['max_loading']:.2f}  ({result['solve_time_ms']:.0f} ms)")
+    print(f"Total: {time.perf_counter() - t0:.2f} s with {MAX_WORKERS} worker(s)")
@@ -0,0 +1,193 @@
+# --- HiGHS LP Solver (scipy, no license) ---
+#
+# Solves the GridSpec flow model as a sparse LP with
+# scipy.optimize.linprog(method="highs"). The balance matrix is a node-arc
+# incidence matrix (totally unimodular), so with integral demands, bounds
+# and capacities the LP optimum is already integral. The integrality of
+# the LP solution is checked explicitly; only if that check fails is the
+# model re-solved as a MIP with scipy.optimize.milp (HiGHS branch & bound).
+#
+# The equality-row marginals of the LP are returned as node prices:
+# d(total cost) / d(demand) per TS node (LMP-style marginal cost).
+#
+# The plan itself is solved on the presolved spec (presolve.py) and
+# mapped back: mesh arcs cost nothing, so on the full model the LP vertex
+# is free to circulate flow around the mesh (277 arcs at MAX_ARC_FLOW on
+# the default grid for the same optimum).
+#
+# Node prices of the full model are read off that plan instead of a
+# second LP: tie every generator / battery to a ground node (generation
+# costs its price, storage is free) and take shortest-path distances from
+# ground in the residual network of the optimal plan. A distance is the
+# cost of one more unit of demand at the node, and the distances satisfy
+# complementary slackness, so they are an optimal dual of the full model.
+# The full LP is only solved if some node cannot take another unit (no
+# finite price) or the plan came from the MIP.
+
+import time
+
+import numpy as np
+from scipy.optimize import Bounds, LinearConstraint, linprog, milp
+from scipy.sparse import csr_matrix
+from scipy.sparse.csgraph import NegativeCycleError, shortest_path
+
+try:
+    from . import frontend_result
+    from . import presolve
+    from .grid_spec import default_grid_spec
+except ImportError:  # run as a script from this folder
+    import frontend_result
+    import presolve
+    from grid_spec import default_grid_spec
+
+SPEC = default_grid_spec()
+
+# Max distance from the nearest integer for a value to count as integral
+INTEGRALITY_TOL = 1e-6
+
+# Slack below which a bound counts as binding in the residual network
+RESIDUAL_TOL = 1e-9
+
+
+def solve_lp(spec=SPEC, time_limit=None):
+    """
+    Solve the flow model with HiGHS. Returns a dict with
+    status, method ("lp" or "mip"), objective, gen, storage, flow, node_prices.
+    """
+    t0 = time.perf_counter()
+
+    c = spec.objective()
+    A = spec.balance_matrix()
+    b = spec.balance_rhs()
+    lb, ub = spec.var_bounds()
+
+    options = {}
+    if time_limit is not None:
+        options["time_limit"] = time_limit
+
+    res = linprog(
+        c, A_eq=A, b_eq=b,
+        bounds=np.column_stack([lb, ub]),
+        method="highs",
+        options=options
+    )
+    if res.status != 0:
+        return {"status": "infeasible" if res.status == 2 else "error", "message": res.message}
+
+    values = res.x
+    node_prices = res.eqlin.marginals
+    method = "lp"
+
+    if np.abs(values - np.rint(values)).max(initial=0.0) > INTEGRALITY_TOL:
+        # LP vertex is fractional (e.g. fractional demands): solve the MIP
+        mip = milp(
+            c,
+            constraints=LinearConstraint(A, b, b),
+            integrality=np.ones(spec.num_vars),
+            bounds=Bounds(lb, ub),
+            options=options
+        )
+        if mip.status != 0 or mip.x is None:
+            return {"status": "infeasible", "message": mip.message}
+        values = mip.x
+        method = "mip"
+
+    num_src = spec.num_sources
+    num_gs = num_src + spec.num_batteries
+
+    return {
+        "status": "optimal",
+        "method": method,
+        "objective": float(c @ values),
+        "gen": values[:num_src],
+        "storage": values[num_src:num_gs],
+        "flow": values[num_gs:],
+        "node_prices": node_prices,
+        "runtime": time.perf_counter() - t0,
+    }
+
+
+def build_duals(spec, node_prices, method):
+    """Node prices for the UI payload (LP duals of the balance rows)."""
+    return {
+        "source": "lp" if method == "lp" else "lp_relaxation",
+        "node_prices": {
+            name: round(float(price), 6)
+            for name, price in zip(spec.node_names, node_prices)
+        },
+    }
+
+
+def residual_node_prices(spec, gen, storage, flow):
+    """
+    Node prices of the full model from an optimal (gen, storage, flow):
+    shortest-path distances from a ground node in the residual network.
+    None if a node has no finite price or the plan is not LP-optimal.
+    """
+    n = spec.num_nodes
+    ground = n
+    sources = np.arange(spec.num_sources)
+    batteries = spec.battery_rows
+    gen, storage, flow = (np.asarray(a, dtype=np.float64) for a in (gen, storage, flow))
+
+    # (tail, head, cost, has room): arcs forward / backward, ground -> node
+    # for more supply, node -> ground for less
+    edges = [
+        (spec.arc_tail, spec.arc_head, spec.arc_cost, flow < spec.arc_cap - RESIDUAL_TOL),
+        (spec.arc_head, spec.arc_tail, -spec.arc_cost, flow > RESIDUAL_TOL),
+        (np.full(len(sources), ground), sources, spec.source_cost, gen < spec.source_max_gen - RESIDUAL_TOL),
+        (sources, np.full(len(sources), ground), -spec.source_cost, gen > RESIDUAL_TOL),
+        (np.full(len(batteries), ground), batteries, np.zeros(len(batteries)),
+         storage > spec.battery_min_cap + RESIDUAL_TOL),
+        (batteries, np.full(len(batteries), ground), np.zeros(len(batteries)),
+         storage < spec.battery_max_cap - RESIDUAL_TOL),
+    ]
+    tail, head, cost = (np.concatenate([e[i][e[3]] for e in edges]) for i in range(3))
+
+    # Cheapest edge per node pair (csr_matrix would sum duplicates)
+    order = np.lexsort((cost, head, tail))
+    first = np.ones(len(order), dtype=bool)
+    first[1:] = (tail[order][1:] != tail[order][:-1]) | (head[order][1:] != head[order][:-1])
+    pick = order[first]
+    graph = csr_matrix((cost[pick], (tail[pick], head[pick])), shape=(n + 1, n + 1))
+
+    try:
+        dist = shortest_path(graph, method="BF", indices=ground)
+    except NegativeCycleError:  # the plan is not optimal for the LP
+        return None
+    prices = dist[:n]
+    return prices if np.isfinite(prices).all() else None
+
+
+def build_and_solve_highs(spec=SPEC):
+    """Plan from the presolved spec (no circulating flow), node prices of the full model."""
+    presolved = presolve.presolve(spec)
+    result = solve_lp(presolved.spec)
+    if result["status"] != "optimal":
+        return {"ok": False, "error": f"No optimal solution (HiGHS: {result['message']})"}
+    gen, storage, flow = presolved.postsolve(result["gen"], result["storage"], result["flow"])
+
+    method = result["method"]
+    prices = residual_node_prices(spec, gen, storage, flow) if method == "lp" else None
+    if prices is None:
+        full = solve_lp(spec)
+        if full["status"] != "optimal":
+            return {"ok": False, "error": f"No optimal solution (HiGHS: {full['message']})"}
+        prices, method = full["node_prices"], full["method"]
+
+    payload = frontend_result.build_frontend_result(spec, gen, storage, flow)
+    payload["duals"] = build_duals(spec, prices, method)
+    return payload
+
+
+# -----------------------------------------------------------
+# MAIN (debug mode)
+# -----------------------------------------------------------
+
+if __name__ == "__main__":
+    result = solve_lp()
+    print(f"Status: {result['status']} via {result['method'].upper()} ({result['runtime'] * 1000:.1f} ms)")
+    print(f"Minimal Generation Cost: ${result['objective']:,.2f}")
+    print("\nNode prices (marginal cost per extra unit of demand):")
+    for name, price in build_duals(SPEC, result["node_prices"], result["method"])["node_prices"].items():
+        print(f"  {name: <7} {price:8.3f}")
@@ -0,0 +1,289 @@
+# --- Grid Layout Engine ---
+#
+# Map positions for any node set, computed from the solved graph (the arcs
+# that carry flow) instead of hard-coded coordinates:
+#   1. layers:  sources | batteries | sinks for a GridSpec, or BFS depth
+#               from the roots for an arbitrary graph
+#   2. order:   barycenter sweeps within each layer (Sugiyama-style
+#               crossing reduction), vectorized with a sparse adjacency
+#   3. coords:  layers side by side in the WIDTH x HEIGHT map; a layer
+#               with more nodes than fit in one column wraps into several
+#
+# Layouts are cached per layout hash (node names, layers, edges). When only
+# a few nodes are new or have new neighbours, the previous order is kept
+# and just those nodes are re-inserted at their barycenter (incremental
+# relayout), so positions stay stable from one solve to the next.
+#
+# Grids with real coordinates (spec.node_xy) are scaled into the map as is.
+
+import hashlib
+import zlib
+from collections import OrderedDict
+
+import numpy as np
+import scipy.sparse as sp
+
+try:
+    from .grid_spec import SOURCE, BATTERY, SINK
+except ImportError:  # run as a script from this folder
+    from grid_spec import SOURCE, BATTERY, SINK
+
+# Map size (matches the command center's SVG viewBox)
+WIDTH = 1000.0
+HEIGHT = 700.0
+MARGIN = 40.0
+
+# Vertical distance between nodes in a column
+MIN_SPACING = 4.0
+MAX_SPACING = 100.0
+
+# Every layer gets at least this share of the width, however small it is
+MIN_LAYER_SHARE = 0.2
+
+SWEEPS = 4
+
+# Incremental relayout when at most this share of the nodes changed
+INCREMENTAL_MAX_CHANGE = 0.1
+
+# Layouts kept per process
+MAX_LAYOUTS = 64
+
+
+# -----------------------------------------------------------
+# GRAPH HELPERS
+# -----------------------------------------------------------
+
+def undirected_edges(tail, head, num_nodes):
+    """Unique (u, v) pairs with u < v, self-loops dropped."""
+    tail = np.asarray(tail, dtype=np.int64)
+    head = np.asarray(head, dtype=np.int64)
+    u, v = np.minimum(tail, head), np.maximum(tail, head)
+    keys = np.unique(u[u != v] * num_nodes + v[u != v])
+    return keys // num_nodes, keys % num_nodes
+
+
+def adjacency(u, v, num_nodes):
+    """Symmetric 0/1 adjacency matrix (CSR) of undirected edges."""
+    data = np.ones(2 * len(u))
+    return sp.csr_matrix(
+        (data, (np.concatenate([u, v]), np.concatenate([v, u]))), shape=(num_nodes, num_nodes)
+    )
+
+
+def bfs_layers(num_nodes, tail, head):
+    """Hop distance from the roots (no incoming arcs; node 0 if there are none)."""
+    tail = np.asarray(tail, dtype=np.int64)
+    head = np.asarray(head, dtype=np.int64)
+    adj = adjacency(*undirected_edges(tail, head, num_nodes), num_nodes)
+
+    layer = np.full(num_nodes, -1, dtype=np.int64)
+    frontier = np.bincount(head, minlength=num_nodes) == 0
+    if not frontier.any():
+        frontier[0] = True
+
+    depth = 0
+    while frontier.any():
+        layer[frontier] = depth
+        frontier = (adj @ frontier.astype(np.float64) > 0) & (layer < 0)
+        depth += 1
+
+    layer[layer < 0] = depth  # unreachable nodes go last
+    return layer
+
+
+def name_hashes(names):
+    """Stable 32-bit hash per node name."""
+    return np.fromiter((zlib.crc32(name.encode()) for name in names), dtype=np.float64, count=len(names))
+
+
+def within_layer_positions(layer, keys):
+    """
+    Sort each layer by `keys` (lexsort order, last key primary) and return
+    every node's normalized position in its layer, in [0, 1].
+    """
+    order = np.lexsort((*keys, layer))
+    _, starts, sizes = np.unique(layer[order], return_index=True, return_counts=True)
+    rank = np.empty(len(layer), dtype=np.int64)
+    rank[order] = np.arange(len(layer)) - np.repeat(starts, sizes)
+    size = np.empty(len(layer), dtype=np.int64)
+    size[order] = np.repeat(sizes, sizes)
+    return rank / np.maximum(size - 1, 1)
+
+
+# -----------------------------------------------------------
+# LAYOUT
+# -----------------------------------------------------------
+
+def barycenter_positions(layer, adj, sweeps=SWEEPS):
+    """Within-layer positions after `sweeps` barycenter passes."""
+    n = len(layer)
+    pos = within_layer_positions(layer, (np.arange(n),))
+    degree = np.asarray(adj.sum(axis=1)).ravel()
+    connected = degree > 0
+
+    for _ in range(sweeps):
+        bary = pos.copy()
+        bary[connected] = (adj @ pos)[connected] / degree[connected]
+        pos = within_layer_positions(layer, (pos, bary))
+    return pos
+
+
+def layer_coordinates(layer, pos):
+    """x, y for nodes given their layer and normalized position in it."""
+    layers, layer_idx, sizes = np.unique(layer, return_inverse=True, return_counts=True)
+    usable_w = WIDTH - 2 * MARGIN
+    usable_h = HEIGHT - 2 * MARGIN
+
+    # Columns per layer and rows per column
+    max_rows = int(usable_h // MIN_SPACING) + 1
+    cols = -(-sizes // max_rows)
+    rows = -(-sizes // cols)
+
+    # Horizontal bands, proportional to the columns (with a minimum share)
+    weight = np.maximum(cols, MIN_LAYER_SHARE * cols.sum())
+    band_w = usable_w * weight / weight.sum()
+    band_x = MARGIN + np.concatenate([[0.0], np.cumsum(band_w)[:-1]])
+
+    spacing = np.minimum(usable_h / np.maximum(rows - 1, 1), MAX_SPACING)
+    top = MARGIN + (usable_h - spacing * (rows - 1)) / 2
+
+    k = np.rint(pos * (sizes[layer_idx] - 1)).astype(np.int64)
+    col, row = np.divmod(k, rows[layer_idx])
+
+    x = band_x[layer_idx] + (col + 0.5) * band_w[layer_idx] / cols[layer_idx]
+    y = top[layer_idx] + row * spacing[layer_idx]
+    return x, y
+
+
+def scaled_coordinates(node_xy):
+    """Real coordinates scaled (aspect kept) into the map."""
+    xy = np.asarray(node_xy, dtype=np.float64)
+    lo = xy.min(axis=0)
+    extent = np.maximum(xy.max(axis=0) - lo, 1e-12)
+    scale = min((WIDTH - 2 * MARGIN) / extent[0], (HEIGHT - 2 * MARGIN) / extent[1])
+    offset = (np.array([WIDTH, HEIGHT]) - extent * scale) / 2
+    xy = (xy - lo) * scale + offset
+    return xy[:, 0], xy[:, 1]
+
+
+class Layout:
+
+    def __init__(self, names, layer, pos, signature, method):
+        self.names = names
+        self.layer = layer
+        self.pos = pos
+        self.signature = signature
+        self.method = method  # "full" or "incremental"
+        self.x, self.y = layer_coordinates(layer, pos)
+
+
+def layout_key(names, layer, u, v):
+    h = hashlib.sha256()
+    h.update("\x1f".join(names).encode())
+    for column in (layer, u, v):
+        column = np.ascontiguousarray(column, dtype=np.int64)
+        h.update(str(column.shape).encode())
+        h.update(column.tobytes())
+    return h.hexdigest()
+
+
+class LayoutEngine:
+    """Layered layouts, cached per layout hash, relaid out incrementally."""
+
+    def __init__(self, max_layouts=MAX_LAYOUTS):
+        self.max_layouts = max_layouts
+        self._layouts = OrderedDict()
+        self._last = None
+        self.stats = {"cached": 0, "incremental": 0, "full": 0}
+
+    def layout(self, names, tail, head, layer=None):
+        """
+        Layout of nodes `names` along arcs (tail[a], head[a]) (node indices).
+        layer defaults to the BFS depth from the roots.
+        """
+        names = list(names)
+        n = len(names)
+        layer = bfs_layers(n, tail, head) if layer is None else np.asarray(layer, dtype=np.int64)
+        u, v = undirected_edges(tail, head, n)
+
+        key = layout_key(names, layer, u, v)
+        layout = self._layouts.get(key)
+        if layout is not None:
+            self._layouts.move_to_end(key)
+            self.stats["cached"] += 1
+            return layout
+
+        adj = adjacency(u, v, n)
+        hashes = name_hashes(names)
+        signature = adj @ hashes  # changes when a node's neighbours change
+
+        layout = self._incremental(names, layer, adj, hashes, signature)
+        if layout is None:
+            layout = Layout(names, layer, barycenter_positions(layer, adj), signature, "full")
+        self.stats[layout.method] += 1
+
+        self._layouts[key] = self._last = layout
+        while len(self._layouts) > self.max_layouts:
+            self._layouts.popitem(last=False)
+        return layout
+
+    def _incremental(self, names, layer, adj, hashes, signature):
+        """Re-insert only changed nodes into the last layout's order, if few changed."""
+        prev = self._last
+        if prev is None:
+            return None
+
+        prev_index = {name: i for i, name in enumerate(prev.names)}
+        idx = np.fromiter((prev_index.get(name, -1) for name in names), dtype=np.int64, count=len(names))
+        known = idx >= 0
+        keep = known.copy()
+        keep[known] = (prev.layer[idx[known]] == layer[known]) & \
+                      (prev.signature[idx[known]] == signature[known])
+        if (~keep).sum() > INCREMENTAL_MAX_CHANGE * len(names):
+            return None
+
+        pos = np.ones(len(names))
+        pos[keep] = prev.pos[idx[keep]]
+
+        # Changed nodes: barycenter of their unchanged neighbours (end of layer if none)
+        kept = keep.astype(np.float64)
+        weight = adj @ kept
+        moved = ~keep & (weight > 0)
+        pos[moved] = (adj @ (pos * kept))[moved] / weight[moved]
+
+        if np.array_equal(np.bincount(layer), np.bincount(prev.layer)):
+            # Same layer sizes: unchanged nodes keep their slots, changed
+            # nodes take the free slots in barycenter order
+            for value in np.unique(layer):
+                changed = np.flatnonzero(~keep & (layer == value))
+                if changed.size:
+                    size = np.count_nonzero(layer == value)
+                    taken = np.rint(pos[keep & (layer == value)] * max(size - 1, 1)).astype(np.int64)
+                    free = np.setdiff1d(np.arange(size), taken)
+                    pos[changed[np.argsort(pos[changed], kind="stable")]] = free / max(size - 1, 1)
+        else:
+            pos = within_layer_positions(layer, (~keep, pos))
+        return Layout(names, layer, pos, signature, "incremental")
+
+
+LAYOUTS = LayoutEngine()
+
+
+# -----------------------------------------------------------
+# GRID SPEC LAYOUT
+# -----------------------------------------------------------
+
+def node_types(spec):
+    """Display type per node: source type, "Battery" or "Load"."""
+    return list(spec.source_type) + ["Battery"] * spec.num_batteries + ["Load"] * spec.num_sinks
+
+
+def grid_layout(spec, flow, min_flow=1):
+    """(x, y) of every spec node, laid out along the arcs carrying >= min_flow."""
+    if spec.node_xy is not None:
+        return scaled_coordinates(spec.node_xy)
+
+    used = np.asarray(flow) >= min_flow
+    layer = np.select([spec.node_kind == SOURCE, spec.node_kind == BATTERY, spec.node_kind == SINK], [0, 1, 2])
+    layout = LAYOUTS.layout(spec.node_names, spec.arc_tail[used], spec.arc_head[used], layer)
+    return layout.x, layout.y
@@ -0,0 +1,363 @@
+# --- Local Simulated-Annealing Sampler (offline stand-in for Leap) ---
+#
+# Same interface as dwave.system.LeapHybridCQMSampler (sample_cqm() with
+# time_limit / label, returns a dimod.SampleSet), no cloud access needed,
+# so the CQM and NL paths can run, be benchmarked and be regression-tested
+# offline.
+#
+# Linear CQMs only (every model in this project is one):
+#     minimize   c.x
+#     subject to A x (==, <=, >=) b,  lb <= x <= ub,  x integer / binary / real
+#
+# Constraints become a penalty: E(x) = c.x + lam * sum(violation(Ax - b)^2).
+# Many independent chains anneal at once, vectorized with NumPy:
+#   - the variables are split into color classes that share no constraint
+#     row, so all variables of a class move at once (exact Metropolis, the
+#     moves are independent); a sweep is one step per class
+#   - each move is either the penalty-optimal step (closed form for the
+#     quadratic penalty) plus noise, or a random jump, clipped to the bounds
+#   - the energy change only touches the variable's own constraint rows
+#     (columns of A padded to the same length)
+#   - the temperature falls and the penalty weight lam rises geometrically
+#     with the elapsed share of the time limit (or of num_sweeps)
+#   - every sweep, each chain keeps its best feasible state
+#
+# One sample per chain comes back; energies / feasibility are dimod's.
+
+import time
+
+import dimod
+import numpy as np
+import scipy.sparse as sp
+
+try:
+    from . import progress
+except ImportError:  # run as a script from this folder
+    import progress
+
+DEFAULT_TIME_LIMIT_SEC = 5.0
+NUM_CHAINS = 64
+
+# Penalty weight (x max |cost|) at the start and at the end of a run
+PENALTY_START = 1.0
+PENALTY_END = 20.0
+
+# Final temperature relative to the smallest non-zero |cost|
+COLD_SHARE = 0.01
+
+# Share of steps that are random jumps (the rest are penalty-optimal steps)
+JUMP_SHARE = 0.3
+
+# Max absolute constraint violation of a feasible state
+FEASIBILITY_TOL = 1e-6
+
+# Min. seconds between two progress reports
+PROGRESS_INTERVAL_SEC = 1.0
+
+EQ, LE, GE = 0, 1, 2
+SENSES = {dimod.sampleset.Sense.Eq: EQ, dimod.sampleset.Sense.Le: LE, dimod.sampleset.Sense.Ge: GE}
+
+
+# -----------------------------------------------------------
+# COLOR CLASSES
+# -----------------------------------------------------------
+
+def color_classes(A):
+    """
+    Greedy coloring of the columns of A (CSC) so that no two columns of a
+    class share a row: their moves are independent and can be evaluated
+    and applied together. Returns a list of column index arrays.
+    """
+    colors = np.zeros(A.shape[1], dtype=np.int64)
+    used = [set() for _ in range(A.shape[0])]  # colors taken per row
+    for j in range(A.shape[1]):
+        rows = A.indices[A.indptr[j]:A.indptr[j + 1]]
+        taken = set().union(*(used[i] for i in rows)) if len(rows) else set()
+        color = 0
+        while color in taken:
+            color += 1
+        colors[j] = color
+        for i in rows:
+            used[i].add(color)
+    order = np.argsort(colors, kind="stable")
+    return np.split(order, np.flatnonzero(np.diff(colors[order])) + 1)
+
+
+# -----------------------------------------------------------
+# LINEAR PROBLEM (arrays)
+# -----------------------------------------------------------
+
+class LinearProblem:
+    """min c.x + offset  s.t.  A x (sense) b,  lb <= x <= ub."""
+
+    def __init__(self, c, A, b, lb, ub, integer=True, sense=EQ, offset=0.0, labels=None):
+        self.c = np.asarray(c, dtype=np.float64)
+        self.A = sp.csc_matrix(A, dtype=np.float64)
+        self.b = np.asarray(b, dtype=np.float64)
+        self.lb = np.asarray(lb, dtype=np.float64)
+        self.ub = np.asarray(ub, dtype=np.float64)
+        self.integer = np.broadcast_to(np.asarray(integer, dtype=bool), self.c.shape).copy()
+        self.sense = np.broadcast_to(np.asarray(sense, dtype=np.int8), self.b.shape).copy()
+        self.offset = float(offset)
+        self.labels = list(range(len(self.c))) if labels is None else list(labels)
+        self.equality_only = bool((self.sense == EQ).all())
+
+        # Columns of A padded to the longest one: (n, k) rows and values
+        counts = np.diff(self.A.indptr)
+        width = max(int(counts.max(initial=0)), 1)
+        slot = np.arange(self.A.nnz) - np.repeat(self.A.indptr[:-1], counts)
+        col = np.repeat(np.arange(self.num_vars), counts)
+        self.col_rows = np.zeros((self.num_vars, width), dtype=np.int64)
+        self.col_vals = np.zeros((self.num_vars, width))
+        self.col_rows[col, slot] = self.A.indices
+        self.col_vals[col, slot] = self.A.data
+
+        self.color_classes = color_classes(self.A)
+
+    @property
+    def num_vars(self):
+        return len(self.c)
+
+    @classmethod
+    def from_cqm(cls, cqm):
+        labels = list(cqm.variables)
+        index = {v: i for i, v in enumerate(labels)}
+        n = len(labels)
+
+        if cqm.objective.num_interactions:
+            raise ValueError("The local annealer only handles linear objectives.")
+        c = np.zeros(n)
+        for v, bias in cqm.objective.linear.items():
+            c[index[v]] = bias
+
+        rows, cols, vals, b, sense = [], [], [], [], []
+        for i, comparison in enumerate(cqm.constraints.values()):
+            lhs = comparison.lhs
+            if lhs.num_interactions:
+                raise ValueError("The local annealer only handles linear constraints.")
+            for v, bias in lhs.linear.items():
+                rows.append(i)
+                cols.append(index[v])
+                vals.append(bias)
+            b.append(comparison.rhs - lhs.offset)
+            sense.append(SENSES[comparison.sense])
+
+        vartypes = [cqm.vartype(v) for v in labels]
+        if dimod.SPIN in vartypes:
+            raise ValueError("The local annealer does not handle spin variables.")
+
+        A = sp.csc_matrix((vals, (rows, cols)), shape=(len(b), n))
+        return cls(
+            c, A, b,
+            [cqm.lower_bound(v) for v in labels],
+            [cqm.upper_bound(v) for v in labels],
+            integer=[vartype is not dimod.REAL for vartype in vartypes],
+            sense=sense,
+            offset=cqm.objective.offset,
+            labels=labels,
+        )
+
+    def violation(self, residual):
+        """Constraint violation for residual = A x - b (any leading shape)."""
+        if self.equality_only:
+            return residual
+        return np.where(self.sense == EQ, residual,
+                        np.where(self.sense == LE, np.maximum(residual, 0), np.minimum(residual, 0)))
+
+    def row_violation(self, residual, rows):
+        if self.equality_only:
+            return residual
+        sense = self.sense[rows]
+        return np.where(sense == EQ, residual,
+                        np.where(sense == LE, np.maximum(residual, 0), np.minimum(residual, 0)))
+
+
+# -----------------------------------------------------------
+# ANNEALING
+# -----------------------------------------------------------
+
+class AnnealResult:
+
+    def __init__(self, samples, objective, feasible, sweeps, runtime):
+        self.samples = samples      # (chains, n), best feasible state per chain (else last state)
+        self.objective = objective  # (chains,), without offset
+        self.feasible = feasible    # (chains,)
+        self.sweeps = sweeps
+        self.runtime = runtime
+
+    @property
+    def best(self):
+        """Index of the best feasible chain (or the lowest-objective one)."""
+        score = np.where(self.feasible, self.objective, np.inf)
+        return int(np.argmin(score)) if self.feasible.any() else int(np.argmin(self.objective))
+
+
+def anneal(problem, time_limit=DEFAULT_TIME_LIMIT_SEC, num_chains=NUM_CHAINS, num_sweeps=None, seed=None):
+    """
+    Anneal `num_chains` chains for time_limit seconds, or exactly
+    num_sweeps sweeps (n steps each) when given (reproducible with a seed).
+    """
+    t0 = time.perf_counter()
+    rng = np.random.default_rng(seed)
+    n = problem.num_vars
+
+    lb = np.where(np.isfinite(problem.lb), problem.lb, 0.0)
+    ub = np.where(np.isfinite(problem.ub), problem.ub, lb + 1e6)
+    span = ub - lb
+
+    x = np.tile(np.clip(0.0, lb, ub), (num_chains, 1))
+    x[:, problem.integer] = np.ceil(x[:, problem.integer])
+    residual = (problem.A @ x.T).T - problem.b
+    objective = x @ problem.c
+    best_x = x.copy()
+    best_obj = np.full(num_chains, np.inf)
+    best_feasible = np.zeros(num_chains, dtype=bool)
+
+    cost_scale = float(np.abs(problem.c).max(initial=0.0)) or 1.0
+    nonzero = np.abs(problem.c[problem.c != 0])
+    t_cold = COLD_SHARE * (float(nonzero.min()) if nonzero.size else 1.0)
+    t_hot = max(cost_scale * float(np.median(span)) * 0.1, t_cold * 10)
+
+    sweeps = 0
+    last_report = time.perf_counter()
+    while True:
+        elapsed = time.perf_counter() - t0
+        share = sweeps / num_sweeps if num_sweeps is not None else elapsed / time_limit
+        if share >= 1:
+            break
+
+        temperature = t_hot * (t_cold / t_hot) ** share
+        lam = cost_scale * PENALTY_START * (PENALTY_END / PENALTY_START) ** share
+        sigma = np.maximum(span * (temperature / t_hot), 1.0)
+
+        for k in rng.permutation(len(problem.color_classes)):
+            v = problem.color_classes[k]
+            rows = problem.col_rows[v]            # (s, k)
+            vals = problem.col_vals[v]
+            sense = problem.sense[rows]
+            r = residual[:, rows]                 # (chains, s, k)
+
+            # Penalty-optimal step (equality-style quadratic) plus noise, or a random jump
+            weight = (problem.row_violation(r, rows) != 0) | (sense == EQ)
+            grad = problem.c[v] + 2 * lam * (vals * weight * r).sum(axis=2)
+            curvature = 2 * lam * np.maximum((vals * vals * weight).sum(axis=2), 1e-12)
+            step = -grad / curvature + rng.normal(0.0, 1.0, grad.shape) * np.sqrt(temperature / curvature)
+            jump = rng.random(grad.shape) < JUMP_SHARE
+            step = np.where(jump, rng.normal(0.0, 1.0, grad.shape) * sigma[v], step)
+
+            old = x[:, v]
+            new = np.clip(old + step, lb[v], ub[v])
+            new = np.where(problem.integer[v], np.rint(new), new)
+            delta = new - old
+
+            r_new = r + vals * delta[:, :, None]
+            d_penalty = (problem.row_violation(r_new, rows) ** 2 - problem.row_violation(r, rows) ** 2).sum(axis=2)
+            d_energy = problem.c[v] * delta + lam * d_penalty
+
+            accept = (delta != 0) & ((d_energy <= 0) | (rng.random(delta.shape) < np.exp(-np.maximum(d_energy, 0) / temperature)))
+            delta = np.where(accept, delta, 0.0)
+            x[:, v] += delta
+
+            # Rows within a class are distinct; padding entries add 0 to a real row, so skip them
+            real = vals != 0
+            residual[:, rows[real]] += (vals[None, :, :] * delta[:, :, None])[:, real]
+
+        sweeps += 1
+
+        # Best feasible state per chain (objective re-summed to avoid drift)
+        feasible = np.abs(problem.violation(residual)).max(axis=1, initial=0.0) <= FEASIBILITY_TOL
+        objective = x @ problem.c
+        better = feasible & (objective < best_obj)
+        best_x[better] = x[better]
+        best_obj[better] = objective[better]
+        best_feasible |= feasible
+
+        if time.perf_counter() - last_report >= PROGRESS_INTERVAL_SEC:
+            last_report = time.perf_counter()
+            incumbent = float(best_obj.min()) + problem.offset if best_feasible.any() else None
+            progress.report("status", message=f"Annealing: sweep {sweeps}, "
+                                              f"{int(best_feasible.sum())}/{num_chains} chains feasible",
+                            sweeps=sweeps, incumbent=incumbent)
+
+    # Chains that never were feasible return their last state
+    best_x[~best_feasible] = x[~best_feasible]
+    best_obj[~best_feasible] = (x @ problem.c)[~best_feasible]
+    return AnnealResult(best_x, best_obj, best_feasible, sweeps, time.perf_counter() - t0)
+
+
+# -----------------------------------------------------------
+# SAMPLER (LeapHybridCQMSampler interface)
+# -----------------------------------------------------------
+
+class SimulatedAnnealingCQMSampler:
+    """
+    Drop-in for LeapHybridCQMSampler: sample_cqm(cqm, time_limit, label)
+    returns a dimod.SampleSet with one sample per chain. The token and
+    other Leap client settings are accepted and ignored. With num_sweeps
+    (and a seed) every run is the same, whatever time_limit says.
+    """
+
+    display_name = "local annealer"
+
+    def __init__(self, token=None, num_chains=NUM_CHAINS, seed=None, num_sweeps=None, **config):
+        self.num_chains = num_chains
+        self.seed = seed
+        self.num_sweeps = num_sweeps
+
+    @property
+    def properties(self):
+        return {"category": "hybrid", "minimum_time_limit_s": 0.0, "quota_conversion_rate": 0}
+
+    @property
+    def parameters(self):
+        return {"time_limit": [], "label": [], "num_chains": [], "num_sweeps": [], "seed": []}
+
+    def min_time_limit(self, cqm):
+        return 0.0
+
+    def sample_cqm(self, cqm, time_limit=DEFAULT_TIME_LIMIT_SEC, label=None,
+                   num_chains=None, num_sweeps=None, seed=None):
+        problem = LinearProblem.from_cqm(cqm)
+        result = anneal(
+            problem, time_limit=time_limit,
+            num_chains=num_chains or self.num_chains, num_sweeps=num_sweeps or self.num_sweeps,
+            seed=self.seed if seed is None else seed,
+        )
+        return dimod.SampleSet.from_samples_cqm(
+            (result.samples, problem.labels), cqm,
+            info={
+                "problem_label": label,
+                "run_time": int(result.runtime * 1e6),  # microseconds, as Leap reports it
+                "sweeps": result.sweeps,
+                "num_chains": len(result.samples),
+            },
+        )
+
+    def close(self):
+        pass
+
+
+# -----------------------------------------------------------
+# MAIN (benchmark on the default grid)
+# -----------------------------------------------------------
+
+if __name__ == "__main__":
+    try:
+        from . import network_simplex
+        from .grid_spec import default_grid_spec
+    except ImportError:
+        import network_simplex
+        from grid_spec import default_grid_spec
+
+    spec = default_grid_spec()
+    lb, ub = spec.var_bounds()
+    problem = LinearProblem(spec.objective(), spec.balance_matrix(), spec.balance_rhs(), lb, ub)
+    optimum = network_simplex.solve_grid(spec).objective
+
+    print(f"{problem.num_vars} variables, optimum ${optimum:,.0f}")
+    for time_limit in (1, 2, 5, 10):
+        result = anneal(problem, time_limit=time_limit, seed=0)
+        best = result.best
+        gap = (result.objective[best] - optimum) / optimum * 100 if result.feasible[best] else float("nan")
+        print(f"{time_limit:3d}s  {result.sweeps:4d} sweeps  {int(result.feasible.sum()):3d}/{len(result.feasible)} "
+              f"feasible  best ${result.objective[best]:,.0f} (gap {gap:.2f}%)")
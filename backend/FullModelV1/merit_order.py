@@ -0,0 +1,247 @@
+# --- Merit-Order Fast Dispatcher (with optimality certificate) ---
+#
+# With uncongested zero-cost arcs the optimal plan is simply: discharge
+# the batteries (free energy), then run generators cheapest-first until
+# the demand is covered -- exactly what explain_cost_logic() describes.
+#
+#   1. Dispatch:  stable sort of all supply options by cost, O(n log n),
+#                 and fill up to the total demand.
+#   2. Routing:   north-west-corner assignment of the dispatched supply to
+#                 the sink demands, computed with cumulative sums; every
+#                 (supply node, sink) pair must have a direct arc with
+#                 enough capacity.
+#   3. Certificate: one uniform node price (the marginal unit's cost) is a
+#                 dual solution; primal feasibility plus the reduced-cost
+#                 conditions on every generator, battery and arc prove the
+#                 plan optimal for the full model.
+#
+# If routing or the certificate fails, the request is handed off to the
+# exact network simplex engine on the presolved spec (presolve.py). The
+# fast path skips presolve: it costs more than the dispatch itself, and
+# the certificate is checked on the full model anyway.
+
+import time
+
+import numpy as np
+
+try:
+    from . import frontend_result
+    from . import network_simplex
+    from . import presolve
+    from .grid_spec import default_grid_spec
+except ImportError:  # run as a script from this folder
+    import frontend_result
+    import network_simplex
+    import presolve
+    from grid_spec import default_grid_spec
+
+SPEC = default_grid_spec()
+
+# Absolute tolerance for balance / bound / reduced-cost checks
+TOLERANCE = 1e-6
+
+
+# -----------------------------------------------------------
+# 1. DISPATCH
+# -----------------------------------------------------------
+
+def merit_order_dispatch(spec=SPEC):
+    """
+    Cheapest-first dispatch of generation and battery discharge.
+    Returns (gen, discharge, price) or None when supply cannot cover demand.
+    """
+    num_src = spec.num_sources
+    discharge_cap = np.maximum(spec.battery_initial_cap - spec.battery_min_cap, 0.0)
+
+    cost = np.concatenate([spec.source_cost, np.zeros(spec.num_batteries)])
+    cap = np.concatenate([spec.source_max_gen, discharge_cap])
+
+    order = cost.argsort(kind="stable")
+    filled_before = np.concatenate([[0.0], np.cumsum(cap[order])[:-1]])
+    dispatched = np.zeros(len(cost))
+    dispatched[order] = np.clip(spec.total_demand - filled_before, 0.0, cap[order])
+
+    if dispatched.sum() < spec.total_demand - TOLERANCE:
+        return None
+
+    used = order[dispatched[order] > TOLERANCE]
+    price = float(cost[used[-1]]) if len(used) else 0.0
+
+    return dispatched[:num_src], dispatched[num_src:], price
+
+
+# -----------------------------------------------------------
+# 2. ROUTING
+# -----------------------------------------------------------
+
+def route_direct(spec, supply_nodes, supply, demand_nodes, demand):
+    """
+    North-west-corner transport of `supply` to `demand` on direct arcs.
+    Returns the spec-shaped flow array, or None if a required direct arc
+    is missing or too small.
+    """
+    cum_supply = np.cumsum(supply)
+    cum_demand = np.cumsum(demand)
+    breaks = np.unique(np.concatenate([cum_supply, cum_demand]))
+    amounts = np.diff(breaks, prepend=0.0)
+    keep = amounts > TOLERANCE
+    breaks, amounts = breaks[keep], amounts[keep]
+
+    src = supply_nodes[np.minimum(np.searchsorted(cum_supply, breaks - TOLERANCE), len(supply) - 1)]
+    dst = demand_nodes[np.minimum(np.searchsorted(cum_demand, breaks - TOLERANCE), len(demand) - 1)]
+
+    # Arc lookup by key tail * n + head
+    n = spec.num_nodes
+    arc_keys = spec.arc_tail * n + spec.arc_head
+    key_order = arc_keys.argsort()
+    wanted = src * n + dst
+    pos = np.searchsorted(arc_keys, wanted, sorter=key_order)
+    pos = np.minimum(pos, len(arc_keys) - 1)
+    arcs = key_order[pos]
+
+    if np.any(arc_keys[arcs] != wanted):
+        return None
+
+    flow = np.zeros(spec.num_arcs)
+    np.add.at(flow, arcs, amounts)
+    if np.any(flow > spec.arc_cap + TOLERANCE):
+        return None
+    return flow
+
+
+# -----------------------------------------------------------
+# 3. OPTIMALITY CERTIFICATE
+# -----------------------------------------------------------
+
+def check_certificate(spec, gen, storage, flow, node_price):
+    """
+    Verify primal feasibility and complementary slackness for node prices
+    `node_price` (marginal cost of one more unit delivered at each node).
+
+    Reduced costs:
+      generator i at node v:  cost_i - price_v
+      battery discharge at v: 0 - price_v     (discharge = initial - storage)
+      arc k -> l:             cost_kl + price_k - price_l
+    A variable at its lower bound needs rc >= 0, at its upper bound rc <= 0,
+    strictly in between rc == 0.
+    """
+    values = np.concatenate([gen, storage, flow])
+    lb, ub = spec.var_bounds()
+
+    # K @ [g; s; x] - b without assembling K: in - out + g - s - b
+    n = spec.num_nodes
+    residual = np.bincount(spec.arc_head, flow, n) - np.bincount(spec.arc_tail, flow, n)
+    residual[:spec.num_sources] += gen
+    residual[spec.battery_rows] -= storage
+    residual -= spec.balance_rhs()
+    balance_violation = float(np.abs(residual).max())
+    bound_violation = float(max((lb - values).max(), (values - ub).max(), 0.0))
+
+    # Reduced costs in the [g; s; x] column space. Storage s enters the
+    # balance with -1, so its reduced cost is +price (s up = less discharge).
+    rc = np.concatenate([
+        spec.source_cost - node_price[:spec.num_sources],
+        node_price[spec.battery_rows],
+        spec.arc_cost + node_price[spec.arc_tail] - node_price[spec.arc_head]
+    ])
+    at_lb = values <= lb + TOLERANCE
+    at_ub = values >= ub - TOLERANCE
+    violation = np.where(
+        at_lb & at_ub, 0.0,
+        np.where(at_lb, np.maximum(-rc, 0.0),
+                 np.where(at_ub, np.maximum(rc, 0.0), np.abs(rc)))
+    )
+    dual_violation = float(violation.max(initial=0.0))
+
+    return {
+        "valid": balance_violation <= TOLERANCE
+                 and bound_violation <= TOLERANCE
+                 and dual_violation <= TOLERANCE,
+        "balance_violation": balance_violation,
+        "bound_violation": bound_violation,
+        "reduced_cost_violation": dual_violation,
+        "objective": float(spec.objective() @ values),
+    }
+
+
+# -----------------------------------------------------------
+# FAST PATH + HAND-OFF
+# -----------------------------------------------------------
+
+def solve_merit_order(spec=SPEC):
+    """
+    Returns (gen, storage, flow, certificate) when the merit-order plan is
+    certified optimal, otherwise None.
+    """
+    dispatch = merit_order_dispatch(spec)
+    if dispatch is None:
+        return None
+    gen, discharge, price = dispatch
+
+    supply = np.concatenate([gen, discharge])
+    supply_nodes = np.arange(spec.num_sources + spec.num_batteries)
+    active = supply > TOLERANCE
+
+    flow = route_direct(
+        spec, supply_nodes[active], supply[active],
+        spec.sink_rows, spec.sink_demand
+    )
+    if flow is None:
+        return None
+
+    storage = spec.battery_initial_cap - discharge
+    node_price = np.full(spec.num_nodes, price)
+    certificate = check_certificate(spec, gen, storage, flow, node_price)
+    if not certificate["valid"]:
+        return None
+
+    certificate["marginal_price"] = price
+    return gen, storage, flow, certificate
+
+
+def build_and_solve_merit_order(spec=SPEC):
+    t0 = time.perf_counter()
+    fast = solve_merit_order(spec)
+
+    if fast is not None:
+        gen, storage, flow, certificate = fast
+        method = "merit_order"
+    else:
+        # Certificate failed (congestion, missing arcs, arc costs, ...)
+        presolved = presolve.presolve(spec)
+        result = network_simplex.solve_grid(presolved.spec)
+        if not result.optimal:
+            return {"ok": False, "error": "No feasible flow for the grid (merit order / network simplex)."}
+        gen, storage, flow = presolved.postsolve(result.gen, result.storage, result.flow)
+        certificate = None
+        method = "network_simplex"
+
+    solve_time = time.perf_counter() - t0
+    payload = frontend_result.build_frontend_result(spec, gen, storage, flow)
+    payload["dispatch"] = {
+        "method": method,
+        "certificate": certificate,
+        "solve_time_ms": round(solve_time * 1000, 3),
+    }
+    return payload
+
+
+# -----------------------------------------------------------
+# MAIN (debug mode)
+# -----------------------------------------------------------
+
+if __name__ == "__main__":
+    t0 = time.perf_counter()
+    fast = solve_merit_order()
+    elapsed = time.perf_counter() - t0
+
+    if fast is None:
+        print("Merit-order certificate failed; the full model is required.")
+    else:
+        gen, storage, flow, certificate = fast
+        print(f"Certified optimal in {elapsed * 1e6:.0f} us")
+        print(f"Minimal Generation Cost: ${certificate['objective']:,.2f}  "
+              f"(marginal price ${certificate['marginal_price']:.2f})")
+        view = frontend_result.SolutionView(SPEC, gen, storage, flow)
+        for line in frontend_result.explain_cost_logic(view):
+            print(" ", line)
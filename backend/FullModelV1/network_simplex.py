@@ -0,0 +1,376 @@
+# --- Network Simplex Min-Cost-Flow Engine (Local, no license) ---
+#
+# The full model is a pure minimum-cost flow problem: flow balance rows
+# on a node-arc incidence matrix plus bounded arcs. Its constraint matrix
+# is totally unimodular, so the primal network simplex below returns
+# integral flows for integral data without any MIP machinery.
+#
+# Reduction of the GridSpec model to a plain min-cost flow:
+#   - one extra "super source" node R supplying the total demand
+#   - R -> TS_Si  capacity max_gen_i,        cost = generation cost
+#   - R -> TS_Bj  capacity initial - min_cap, cost 0  (discharge)
+#   - TS_Bj -> R  capacity max_cap - initial, cost 0  (charge)
+#   - every sink TS node demands its sink demand
+#
+# Implementation: primal network simplex on a spanning tree stored as
+# parent / parent-arc / subtree-size arrays plus a depth-first thread,
+# with an artificial root and big-M artificial arcs for the initial tree.
+# Pricing scans blocks of ~sqrt(m) arcs with NumPy (Dantzig rule within
+# the block, block search across blocks).
+
+import math
+import time
+
+import numpy as np
+
+try:
+    from . import frontend_result
+    from . import presolve
+    from .grid_spec import default_grid_spec
+except ImportError:  # run as a script from this folder
+    import frontend_result
+    import presolve
+    from grid_spec import default_grid_spec
+
+SPEC = default_grid_spec()
+
+# Flows / reduced costs closer than this to zero are treated as zero
+TOLERANCE = 1e-9
+
+
+class MinCostFlowResult:
+    """Solution of solve_grid(): spec-shaped arrays plus solver status."""
+
+    def __init__(self, status, objective, gen, storage, flow, potentials, iterations, runtime):
+        self.status = status
+        self.objective = objective
+        self.gen = gen
+        self.storage = storage
+        self.flow = flow
+        self.potentials = potentials
+        self.iterations = iterations
+        self.runtime = runtime
+
+    @property
+    def optimal(self):
+        return self.status == "optimal"
+
+
+# -----------------------------------------------------------
+# GENERIC NETWORK SIMPLEX
+# -----------------------------------------------------------
+
+def solve_min_cost_flow(num_nodes, tail, head, capacity, cost, supply):
+    """
+    Minimise cost @ flow subject to
+        out(v) - in(v) == supply[v]   for every node v
+        0 <= flow <= capacity
+
+    Returns (status, flow, potentials, iterations). At optimality every
+    arc satisfies the reduced-cost conditions with
+        rc[a] = cost[a] - potentials[tail[a]] + potentials[head[a]]
+    (rc >= 0 at flow 0, rc <= 0 at capacity, rc == 0 in between).
+    status is "optimal" or "infeasible".
+    """
+    n = int(num_nodes)
+    m = len(tail)
+    supply = np.asarray(supply, dtype=np.float64)
+    if abs(supply.sum()) > TOLERANCE * max(1.0, np.abs(supply).sum()):
+        return "infeasible", np.zeros(m), np.zeros(n), 0
+
+    root = n
+    big_m = 3.0 * max(
+        np.abs(cost).sum() if m else 0.0,
+        np.asarray(capacity, dtype=np.float64).sum() if m else 0.0,
+        np.abs(supply).sum(),
+        1.0
+    )
+
+    # Real arcs 0..m-1, artificial arcs m..m+n-1 (one per node, to / from root)
+    is_source = supply >= 0
+    src = np.concatenate([np.asarray(tail, dtype=np.int64), np.where(is_source, np.arange(n), root)])
+    dst = np.concatenate([np.asarray(head, dtype=np.int64), np.where(is_source, root, np.arange(n))])
+    cap = np.concatenate([np.asarray(capacity, dtype=np.float64), np.full(n, np.inf)])
+    arc_cost = np.concatenate([np.asarray(cost, dtype=np.float64), np.full(n, big_m)])
+    x = np.concatenate([np.zeros(m), np.abs(supply)])
+
+    # Tree arcs never enter; with big-M potentials their computed reduced
+    # cost is only zero up to round-off, so the pricing tolerance scales too
+    in_tree = np.concatenate([np.zeros(m, dtype=bool), np.ones(n, dtype=bool)])
+    rc_tol = max(TOLERANCE, 16 * np.finfo(np.float64).eps * big_m)
+
+    # Potentials: reduced cost of every (artificial) tree arc is zero
+    pi = np.concatenate([np.where(is_source, big_m, -big_m), [0.0]])
+
+    # Spanning tree rooted at `root`: every node hangs off the root
+    parent = [root] * n + [-1]
+    parent_arc = list(range(m, m + n)) + [-1]
+    subtree_size = [1] * n + [n + 1]
+    next_dfs = list(range(1, n)) + [root, 0]
+    prev_dfs = [root] + list(range(0, n))
+    last_desc = list(range(n)) + [n - 1]
+
+    src_list = src.tolist()
+    dst_list = dst.tolist()
+
+    def find_apex(p, q):
+        size_p = subtree_size[p]
+        size_q = subtree_size[q]
+        while True:
+            while size_p < size_q:
+                p = parent[p]
+                size_p = subtree_size[p]
+            while size_p > size_q:
+                q = parent[q]
+                size_q = subtree_size[q]
+            if size_p == size_q:
+                if p != q:
+                    p = parent[p]
+                    size_p = subtree_size[p]
+                    q = parent[q]
+                    size_q = subtree_size[q]
+                else:
+                    return p
+
+    def trace_path(p, w):
+        nodes = [p]
+        arcs = []
+        while p != w:
+            arcs.append(parent_arc[p])
+            p = parent[p]
+            nodes.append(p)
+        return nodes, arcs
+
+    def find_cycle(i, p, q):
+        """Cycle closed by entering arc i, oriented p -> q along i."""
+        w = find_apex(p, q)
+        nodes, arcs = trace_path(p, w)
+        nodes.reverse()
+        arcs.reverse()
+        if arcs != [i]:
+            arcs.append(i)
+            nodes_q, arcs_q = trace_path(q, w)
+            del nodes_q[-1]
+            nodes += nodes_q
+            arcs += arcs_q
+        return nodes, arcs
+
+    def residual(i, p):
+        return cap[i] - x[i] if src_list[i] == p else x[i]
+
+    def trace_subtree(p):
+        nodes = [p]
+        last = last_desc[p]
+        while p != last:
+            p = next_dfs[p]
+            nodes.append(p)
+        return nodes
+
+    def remove_arc(s, t):
+        size_t = subtree_size[t]
+        prev_t = prev_dfs[t]
+        last_t = last_desc[t]
+        next_last_t = next_dfs[last_t]
+        parent[t] = -1
+        parent_arc[t] = -1
+        # Cut the subtree of t out of the thread
+        next_dfs[prev_t] = next_last_t
+        prev_dfs[next_last_t] = prev_t
+        next_dfs[last_t] = t
+        prev_dfs[t] = last_t
+        while s != -1:
+            subtree_size[s] -= size_t
+            if last_desc[s] == last_t:
+                last_desc[s] = prev_t
+            s = parent[s]
+
+    def make_root(q):
+        ancestors = []
+        while q != -1:
+            ancestors.append(q)
+            q = parent[q]
+        ancestors.reverse()
+        for p, q in zip(ancestors, ancestors[1:]):
+            size_p = subtree_size[p]
+            last_p = last_desc[p]
+            prev_q = prev_dfs[q]
+            last_q = last_desc[q]
+            next_last_q = next_dfs[last_q]
+            # Make p a child of q
+            parent[p] = q
+            parent[q] = -1
+            parent_arc[p] = parent_arc[q]
+            parent_arc[q] = -1
+            subtree_size[p] = size_p - subtree_size[q]
+            subtree_size[q] = size_p
+            # Cut the subtree of q out of the thread
+            next_dfs[prev_q] = next_last_q
+            prev_dfs[next_last_q] = prev_q
+            next_dfs[last_q] = q
+            prev_dfs[q] = last_q
+            if last_p == last_q:
+                last_desc[p] = prev_q
+                last_p = prev_q
+            # Hang the rest of p's subtree below q in the thread
+            prev_dfs[p] = last_q
+            next_dfs[last_q] = p
+            next_dfs[last_p] = q
+            prev_dfs[q] = last_p
+            last_desc[q] = last_p
+
+    def add_arc(i, p, q):
+        last_p = last_desc[p]
+        next_last_p = next_dfs[last_p]
+        size_q = subtree_size[q]
+        last_q = last_desc[q]
+        parent[q] = p
+        parent_arc[q] = i
+        # Splice the subtree of q into the thread after p's subtree
+        next_dfs[last_p] = q
+        prev_dfs[q] = last_p
+        prev_dfs[next_last_p] = last_q
+        next_dfs[last_q] = next_last_p
+        while p != -1:
+            subtree_size[p] += size_q
+            if last_desc[p] == last_p:
+                last_desc[p] = last_q
+            p = parent[p]
+
+    def update_potentials(i, p, q):
+        if q == dst_list[i]:
+            d = pi[p] - arc_cost[i] - pi[q]
+        else:
+            d = pi[p] + arc_cost[i] - pi[q]
+        pi[trace_subtree(q)] += d
+
+    # --- Block pricing over the real arcs ---
+    block = max(1, int(math.ceil(math.sqrt(m)))) if m else 1
+    num_blocks = (m + block - 1) // block if m else 0
+    start = 0
+    quiet_blocks = 0
+    iterations = 0
+
+    while m and quiet_blocks < num_blocks:
+        stop = start + block
+        if stop <= m:
+            arcs = np.arange(start, stop)
+        else:
+            stop -= m
+            arcs = np.concatenate([np.arange(start, m), np.arange(0, stop)])
+        start = stop
+
+        rc = arc_cost[arcs] - pi[src[arcs]] + pi[dst[arcs]]
+        rc = np.where(x[arcs] > TOLERANCE, -rc, rc)
+        # Arcs that are both empty and saturated (zero capacity) never enter
+        rc[(cap[arcs] <= TOLERANCE) | in_tree[arcs]] = 0.0
+        k = int(rc.argmin())
+        if rc[k] >= -rc_tol:
+            quiet_blocks += 1
+            continue
+        quiet_blocks = 0
+        iterations += 1
+
+        i = int(arcs[k])
+        if x[i] <= TOLERANCE:
+            p, q = src_list[i], dst_list[i]
+        else:
+            p, q = dst_list[i], src_list[i]
+
+        cycle_nodes, cycle_arcs = find_cycle(i, p, q)
+
+        # Leaving arc: last arc with minimum residual along the cycle
+        j, s = min(
+            zip(reversed(cycle_arcs), reversed(cycle_nodes)),
+            key=lambda arc_node: residual(*arc_node)
+        )
+        t = dst_list[j] if src_list[j] == s else src_list[j]
+
+        delta = residual(j, s)
+        if delta > 0:
+            for a, v in zip(cycle_arcs, cycle_nodes):
+                if src_list[a] == v:
+                    x[a] += delta
+                else:
+                    x[a] -= delta
+
+        if i != j:
+            if parent[t] != s:
+                s, t = t, s
+            if cycle_arcs.index(i) > cycle_arcs.index(j):
+                p, q = q, p
+            in_tree[j] = False
+            in_tree[i] = True
+            remove_arc(s, t)
+            make_root(q)
+            add_arc(i, p, q)
+            update_potentials(i, p, q)
+
+    if np.any(x[m:] > TOLERANCE * max(1.0, np.abs(supply).max())):
+        return "infeasible", x[:m], pi[:n], iterations
+
+    return "optimal", x[:m], pi[:n], iterations
+
+
+# -----------------------------------------------------------
+# GRID MODEL -> MIN-COST FLOW
+# -----------------------------------------------------------
+
+def solve_grid(spec=SPEC):
+    """Solve the GridSpec flow model; flows and potentials come back in spec order."""
+    t0 = time.perf_counter()
+
+    n = spec.num_nodes
+    root = n
+    num_src = spec.num_sources
+    num_bat = spec.num_batteries
+    sources = np.arange(num_src)
+    batteries = spec.battery_rows
+
+    discharge_cap = np.maximum(spec.battery_initial_cap - spec.battery_min_cap, 0.0)
+    charge_cap = np.maximum(spec.battery_max_cap - spec.battery_initial_cap, 0.0)
+
+    tail = np.concatenate([spec.arc_tail, np.full(num_src, root), np.full(num_bat, root), batteries])
+    head = np.concatenate([spec.arc_head, sources, batteries, np.full(num_bat, root)])
+    capacity = np.concatenate([spec.arc_cap, spec.source_max_gen, discharge_cap, charge_cap])
+    cost = np.concatenate([spec.arc_cost, spec.source_cost, np.zeros(2 * num_bat)])
+
+    supply = np.zeros(n + 1)
+    supply[spec.sink_rows] = -spec.sink_demand
+    supply[root] = spec.total_demand
+
+    status, x, pi, iterations = solve_min_cost_flow(n + 1, tail, head, capacity, cost, supply)
+
+    m = spec.num_arcs
+    flow = x[:m]
+    gen = x[m:m + num_src]
+    discharge = x[m + num_src:m + num_src + num_bat]
+    charge = x[m + num_src + num_bat:]
+    storage = spec.battery_initial_cap - discharge + charge
+    objective = float(spec.source_cost @ gen + spec.arc_cost @ flow)
+
+    return MinCostFlowResult(
+        status, objective, gen, storage, flow, pi[:n] - pi[root],
+        iterations, time.perf_counter() - t0
+    )
+
+
+def build_and_solve_network_simplex(spec=SPEC):
+    presolved = presolve.presolve(spec)
+    result = solve_grid(presolved.spec)
+    if not result.optimal:
+        return {"ok": False, "error": "No feasible flow for the grid (network simplex)."}
+    gen, storage, flow = presolved.postsolve(result.gen, result.storage, result.flow)
+    return frontend_result.build_frontend_result(spec, gen, storage, flow)
+
+
+# -----------------------------------------------------------
+# MAIN (debug mode)
+# -----------------------------------------------------------
+
+if __name__ == "__main__":
+    result = solve_grid()
+    print(f"Status: {result.status}  ({result.iterations} pivots, {result.runtime * 1000:.2f} ms)")
+    print(f"Minimal Generation Cost: ${result.objective:,.2f}")
+    view = frontend_result.SolutionView(SPEC, result.gen, result.storage, result.flow)
+    for line in frontend_result.explain_cost_logic(view):
+        print(" ", line)
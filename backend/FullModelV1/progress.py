@@ -0,0 +1,31 @@
+# --- Solver Progress Events ---
+#
+# Solvers call report(event, **data) at interesting points of a run:
+#   "status"     stage changes (building, submitted, waiting, complete)
+#   "incumbent"  new MIP solution (objective + generator / battery state)
+#   "bound"      MIP bound, gap and node count
+#   "energy"     one QAOA evaluation (iteration, params, energy)
+#
+# Nobody listens by default. A job worker (backend/jobs.py) installs a
+# reporter that forwards events to the web server, which streams them to
+# the browser as Server-Sent Events.
+
+import time
+
+_reporter = None
+
+
+def set_reporter(reporter):
+    """reporter(event, data) is called for every report(); None disables."""
+    global _reporter
+    _reporter = reporter
+
+
+def enabled():
+    return _reporter is not None
+
+
+def report(event, **data):
+    if _reporter is not None:
+        data.setdefault("time", time.time())
+        _reporter(event, data)
@@ -0,0 +1,308 @@
+# --- Rolling-Horizon Multi-Period Dispatch (Gurobi) ---
+#
+# The snapshot model moves every battery once, from initial_cap to s[j].
+# Over T periods (24 h ... 8760 h) the state of charge is carried from one
+# period to the next, with per-period demand and generation limits:
+#     battery rows:  in_t - out_t - s_t + s_{t-1} = 0     (s_{-1} = start SOC)
+#
+# One monolithic model grows with T. Instead a window of W periods is
+# solved, its first `step` periods are committed, and the window moves
+# forward by `step` with the committed SOC as its new start:
+#   - the window model is built once (the structure never changes); a
+#     shift only rewrites generation bounds and the balance RHS
+#   - every window is warm-started from the previous solution shifted by
+#     `step` periods (MIP start)
+#   - memory is one window model, time is ~T / step window solves, i.e.
+#     linear in T
+# Past the end of the horizon the window sees the last period repeated.
+#
+# The frontend runner plans on the hub arcs (arc_selection.sparsify,
+# 400 columns per period), so a 4-period window stays within size-limited
+# Gurobi licenses (2,000 variables). Checked against one monolithic model
+# on a 5-hour hub grid: equal cost at W = T, +0.2% at W = 1.
+
+import importlib
+import time
+
+import gurobipy as gp
+import numpy as np
+import scipy.sparse as sp
+from gurobipy import GRB
+
+try:
+    from . import frontend_result
+    from . import progress
+    from .arc_selection import sparsify
+    from .grid_spec import default_grid_spec
+    gurobi_local = importlib.import_module(".15KNodeGurobiLocal", __package__)
+except ImportError:  # run as a script from this folder
+    import frontend_result
+    import progress
+    from arc_selection import sparsify
+    from grid_spec import default_grid_spec
+    gurobi_local = importlib.import_module("15KNodeGurobiLocal")
+
+SPEC = default_grid_spec()
+
+DEFAULT_HOURS = 24
+WINDOW = 4   # periods per window
+STEP = 1     # periods committed per window
+ARC_STRATEGY = "hub"  # arcs of the frontend runner (arc_selection.sparsify)
+
+# Per unit and arc, in the window objective only (reported costs use
+# spec.objective()): with free arcs an optimal window may circulate flow.
+# Far below the smallest cost difference between sources (0.10)
+FLOW_COST = 1e-3
+
+
+# -----------------------------------------------------------
+# PROFILES
+# -----------------------------------------------------------
+
+def daily_profiles(spec=SPEC, hours=DEFAULT_HOURS, seed=0):
+    """
+    Synthetic hourly profiles: demand (hours, sinks) on a daily curve
+    between 35% and 60% of the snapshot demand (whole units, the flows are
+    integer) and max generation (hours, sources) with solar following
+    daylight, wind between 50% and 100% of capacity, the rest flat.
+    """
+    hour = np.arange(hours) % 24
+    rng = np.random.default_rng(seed)
+
+    day_curve = 0.5 - 0.5 * np.cos(2 * np.pi * (hour - 6) / 24)  # low at 06:00, peak at 18:00
+    demand = np.rint(spec.sink_demand[None, :] * (0.35 + 0.25 * day_curve)[:, None])
+
+    factor = np.ones((hours, spec.num_sources))
+    solar = spec.source_type == "Solar"
+    wind = spec.source_type == "Wind"
+    factor[:, solar] = np.clip(np.sin(np.pi * (hour - 6) / 12), 0, None)[:, None]
+    factor[:, wind] = rng.uniform(0.5, 1.0, (hours, int(wind.sum())))
+
+    return demand, spec.source_max_gen[None, :] * factor
+
+
+# -----------------------------------------------------------
+# WINDOW MODEL
+# -----------------------------------------------------------
+
+class WindowModel:
+    """
+    W periods of [g_t; s_t; x_t] in one MVar, period after period. Built
+    once per (spec topology, W); update() loads a window's data. Arcs
+    carry FLOW_COST on top of their cost, so no flow circulates.
+    """
+
+    def __init__(self, spec, window, env=None, vtype=GRB.INTEGER):
+        self.spec = spec
+        self.window = window
+        m, n = spec.num_vars, spec.num_nodes
+        num_b = spec.num_batteries
+
+        # s_{t-1} enters the battery rows of period t with +1
+        carry = sp.csr_matrix(
+            (np.ones(num_b), (spec.battery_rows, spec.num_sources + np.arange(num_b))), shape=(n, m)
+        )
+        matrix = sp.kron(sp.identity(window), spec.balance_matrix()) + \
+            sp.kron(sp.eye(window, k=-1), carry)
+
+        lb, ub = spec.var_bounds()
+        self.ub = np.tile(ub, (window, 1))
+        self.rhs = np.zeros((window, n))
+
+        self.model = gp.Model("Rolling_Horizon_Window", env=env or gurobi_local.get_env())
+        self.model.Params.OutputFlag = 0
+        self.v = self.model.addMVar(window * m, vtype=vtype, lb=np.tile(lb, window), ub=self.ub.ravel())
+        objective = spec.objective()
+        objective[spec.num_sources + num_b:] += FLOW_COST
+        self.model.setObjective(np.tile(objective, window) @ self.v, GRB.MINIMIZE)
+        self.balance = self.model.addMConstr(matrix.tocsr(), self.v, "=", self.rhs.ravel())
+
+    def update(self, soc_start, demand, max_gen):
+        """Start SOC (batteries,), demand (W, sinks), max generation (W, sources)."""
+        spec = self.spec
+        self.ub[:, :spec.num_sources] = max_gen
+        self.rhs[:, spec.sink_rows] = demand
+        self.rhs[0, spec.battery_rows] = -np.asarray(soc_start)
+        self.v.UB = self.ub.ravel()
+        self.balance.RHS = self.rhs.ravel()
+
+    def solve(self, start=None):
+        """Optimize (warm from `start`, shape (W, m)); values as (W, m), or None."""
+        if start is not None:
+            self.v.Start = start.ravel()
+        self.model.optimize()
+        if self.model.Status != GRB.OPTIMAL:
+            return None
+        return self.v.X.reshape(self.window, self.spec.num_vars)
+
+    def dispose(self):
+        self.model.dispose()
+
+
+def shifted(values, step):
+    """Warm start for the next window: drop `step` periods, repeat the last one."""
+    return np.concatenate([values[step:], np.repeat(values[-1:], step, axis=0)])
+
+
+def padded(profile, extra):
+    return np.concatenate([profile, np.repeat(profile[-1:], extra, axis=0)])
+
+
+# -----------------------------------------------------------
+# ROLLING HORIZON
+# -----------------------------------------------------------
+
+class RollingHorizonResult:
+
+    def __init__(self, status, gen, soc, flow, cost, windows, runtime):
+        self.status = status
+        self.gen = gen        # (T, sources)
+        self.soc = soc        # (T, batteries), end of each period
+        self.flow = flow      # (T, arcs) float32, or None
+        self.cost = cost      # (T,)
+        self.windows = windows
+        self.runtime = runtime
+
+    @property
+    def optimal(self):
+        return self.status == "optimal"
+
+    @property
+    def objective(self):
+        return float(self.cost.sum())
+
+
+def rolling_horizon(spec, demand, max_gen, window=WINDOW, step=STEP, soc_start=None,
+                    keep_flows=False, vtype=GRB.INTEGER):
+    """
+    Dispatch T = len(demand) periods in windows of `window` periods,
+    committing `step` per window. keep_flows=False keeps only the
+    generation / SOC / cost columns (memory independent of arcs x T).
+    """
+    if not 1 <= step <= window:
+        raise ValueError("Need 1 <= step <= window.")
+
+    t0 = time.perf_counter()
+    hours = len(demand)
+    num_s, num_b = spec.num_sources, spec.num_batteries
+    objective = spec.objective()
+
+    demand = padded(np.asarray(demand, dtype=np.float64), window)
+    max_gen = padded(np.asarray(max_gen, dtype=np.float64), window)
+
+    gen = np.zeros((hours, num_s))
+    soc = np.zeros((hours, num_b))
+    cost = np.zeros(hours)
+    flow = np.zeros((hours, spec.num_arcs), dtype=np.float32) if keep_flows else None
+
+    model = WindowModel(spec, window, vtype=vtype)
+    state = spec.battery_initial_cap if soc_start is None else np.asarray(soc_start, dtype=np.float64)
+    start = None
+    num_windows = -(-hours // step)
+    status = "optimal"
+
+    try:
+        for w, t in enumerate(range(0, hours, step)):
+            progress.report("status", message=f"Window {w + 1}/{num_windows}: periods {t}-{t + window - 1}")
+            model.update(state, demand[t:t + window], max_gen[t:t + window])
+            values = model.solve(start)
+            if values is None:
+                status = f"infeasible at period {t}"
+                break
+
+            commit = values[:min(step, hours - t)]
+            end = t + len(commit)
+            gen[t:end] = commit[:, :num_s]
+            soc[t:end] = commit[:, num_s:num_s + num_b]
+            cost[t:end] = commit @ objective
+            if keep_flows:
+                flow[t:end] = commit[:, num_s + num_b:]
+
+            state = commit[-1, num_s:num_s + num_b]
+            start = shifted(values, step)
+    finally:
+        model.dispose()
+
+    return RollingHorizonResult(status, gen, soc, flow, cost, num_windows, time.perf_counter() - t0)
+
+
+def solve_monolithic(spec, demand, max_gen, soc_start=None, vtype=GRB.INTEGER):
+    """All T periods in one model (reference for the rolling horizon)."""
+    t0 = time.perf_counter()
+    hours = len(demand)
+    model = WindowModel(spec, hours, vtype=vtype)
+    try:
+        model.update(spec.battery_initial_cap if soc_start is None else soc_start, demand, max_gen)
+        values = model.solve()
+    finally:
+        model.dispose()
+    if values is None:
+        return None, time.perf_counter() - t0
+    return float((values @ spec.objective()).sum()), time.perf_counter() - t0
+
+
+# -----------------------------------------------------------
+# FRONTEND PAYLOAD
+# -----------------------------------------------------------
+
+def build_and_solve_rolling_horizon_payload(spec=None, hours=DEFAULT_HOURS, window=WINDOW, step=STEP):
+    """
+    Payload of the first period (the decision executed now) plus the
+    committed schedule of the whole horizon. spec defaults to the hub arcs
+    of the default grid.
+    """
+    if spec is None:
+        spec = sparsify(SPEC, ARC_STRATEGY)
+    demand, max_gen = daily_profiles(spec, hours)
+    try:
+        result = rolling_horizon(spec, demand, max_gen, window, step, keep_flows=True)
+    except gp.GurobiError as e:  # e.g. window model too large for the license
+        return {"ok": False, "error": f"Rolling horizon failed (Gurobi: {e})."}
+    if not result.optimal:
+        return {"ok": False, "error": f"No feasible schedule (rolling horizon: {result.status})."}
+
+    first = spec.with_data(source_max_gen=max_gen[0], sink_demand=demand[0])
+    payload = frontend_result.build_frontend_result(first, result.gen[0], result.soc[0], result.flow[0])
+    payload["schedule"] = {
+        "hours": hours,
+        "window": window,
+        "step": step,
+        "windows": result.windows,
+        "total_cost": round(result.objective, 2),
+        "solve_time_ms": round(result.runtime * 1000, 3),
+        "demand": np.rint(demand.sum(axis=1)).astype(int).tolist(),
+        "generation": np.rint(result.gen.sum(axis=1)).astype(int).tolist(),
+        "soc_pct": np.round(result.soc.sum(axis=1) / spec.battery_max_cap.sum() * 100, 1).tolist(),
+        "cost": np.round(result.cost, 2).tolist(),
+    }
+    return payload
+
+
+# -----------------------------------------------------------
+# MAIN (benchmark: rolling horizon vs one monolithic model)
+# -----------------------------------------------------------
+
+if __name__ == "__main__":
+    # Hub arcs and 4-period windows keep the window model small enough
+    # for size-limited licenses
+    spec = sparsify(SPEC, ARC_STRATEGY)
+
+    # Short horizon: one window of W = T periods is the monolithic model
+    demand, max_gen = daily_profiles(spec, 5)
+    mono, _ = solve_monolithic(spec, demand, max_gen)
+    for window in (5, 1):
+        rolling = rolling_horizon(spec, demand, max_gen, window=window, step=1)
+        print(f"   5 h  W={window}  rolling ${rolling.objective:,.0f}   monolithic ${mono:,.0f}   "
+              f"({(rolling.objective / mono - 1) * 100:+.2f}%)")
+
+    for hours in (24, 96, 384):
+        demand, max_gen = daily_profiles(spec, hours)
+        rolling = rolling_horizon(spec, demand, max_gen, window=WINDOW, step=2)
+        line = (f"{hours:4d} h  rolling ${rolling.objective:,.0f} in {rolling.runtime:.2f}s "
+                f"({rolling.windows} windows, {rolling.status})")
+        try:
+            mono, mono_time = solve_monolithic(spec, demand, max_gen)
+            line += f"   monolithic ${mono:,.0f} in {mono_time:.2f}s"
+        except gp.GurobiError as e:  # e.g. model too large for the license
+            line += f"   monolithic: {e}"
+        print(line)
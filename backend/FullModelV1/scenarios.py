@@ -0,0 +1,139 @@
+# --- Demand / Cost Scenarios ---
+#
+# A scenario is the default grid with scaled data:
+#   demand_scale   factor on every sink demand (whole units, flows are integer)
+#   cost_scale     {source type or "S<i>": factor} on the generation cost
+#
+# Only the balance RHS (demand) and the objective (cost) change, never the
+# topology, so the Gurobi backend re-uses the worker's pooled model
+# template (ModelTemplate.update rewrites RHS / objective, reoptimizes
+# warm) and a sweep of N scenarios builds the model once per worker.
+# Both backends solve the presolved spec (presolve.py); its arcs only
+# change when a scenario switches a supply or demand on or off.
+#
+# solve_scenario() returns one result row: cost, generation per source
+# type and battery use. backend/sweeps.py collects the rows into columns.
+
+import importlib
+import time
+
+import numpy as np
+
+try:
+    from . import network_simplex
+    from . import presolve
+    from .grid_spec import default_grid_spec
+except ImportError:  # run as a script from this folder
+    import network_simplex
+    import presolve
+    from grid_spec import default_grid_spec
+
+SPEC = default_grid_spec()
+
+
+# -----------------------------------------------------------
+# SCENARIO -> SPEC
+# -----------------------------------------------------------
+
+def source_mask(spec, key):
+    """Sources selected by a cost_scale key: a source type or one source id "S<i>"."""
+    if key in set(spec.source_type):
+        return spec.source_type == key
+    if key.startswith("S") and key[1:].isdigit() and int(key[1:]) < spec.num_sources:
+        return np.arange(spec.num_sources) == int(key[1:])
+    raise ValueError(f"Unknown source type or id: {key!r}")
+
+
+def scenario_spec(spec, scenario):
+    """spec with the scenario's demand and cost applied (same topology)."""
+    demand = np.rint(spec.sink_demand * float(scenario.get("demand_scale", 1.0)))
+
+    cost = spec.source_cost.copy()
+    for key, factor in scenario.get("cost_scale", {}).items():
+        cost[source_mask(spec, key)] *= float(factor)
+
+    return spec.with_data(sink_demand=demand, source_cost=cost)
+
+
+# -----------------------------------------------------------
+# RESULT ROW
+# -----------------------------------------------------------
+
+def source_types(spec=SPEC):
+    """Source types in first-seen order (the generation mix columns)."""
+    return list(dict.fromkeys(spec.source_type))
+
+
+def scenario_row(spec, status, gen=None, storage=None, objective=None):
+    """One sweep row; gen / storage None for a scenario without a solution."""
+    row = {"ok": True, "status": status, "demand": int(round(spec.total_demand))}
+    if gen is None:
+        return row
+
+    gen = np.rint(np.asarray(gen, dtype=np.float64))
+    delta = np.rint(np.asarray(storage, dtype=np.float64)) - spec.battery_initial_cap
+    row.update({
+        "cost": round(float(objective), 2),
+        "generation": {
+            typ: int(gen[spec.source_type == typ].sum()) for typ in source_types(spec)
+        },
+        "battery_discharge": int(np.maximum(-delta, 0).sum()),
+        "battery_charge": int(np.maximum(delta, 0).sum()),
+        "soc_pct": round(float((spec.battery_initial_cap + delta).sum() / spec.battery_max_cap.sum() * 100), 1),
+    })
+    return row
+
+
+# -----------------------------------------------------------
+# SOLVE
+# -----------------------------------------------------------
+
+def solve_with_gurobi(spec):
+    """(status, gen, storage, flow) for the presolved spec, mapped back; arrays None without a solution."""
+    gurobi_local = importlib.import_module(".15KNodeGurobiLocal", __package__) \
+        if __package__ else importlib.import_module("15KNodeGurobiLocal")
+    from gurobipy import GRB
+
+    presolved = presolve.presolve(spec)
+    status, view = gurobi_local.solve_gurobi(presolved.spec)
+    if status != GRB.OPTIMAL or view is None:
+        return "infeasible" if status == GRB.INFEASIBLE else f"gurobi status {status}", None, None, None
+    return ("optimal", *presolved.postsolve(view.gen, view.storage, view.flow))
+
+
+def solve_with_network_simplex(spec):
+    presolved = presolve.presolve(spec)
+    result = network_simplex.solve_grid(presolved.spec)
+    if not result.optimal:
+        return result.status, None, None, None
+    return ("optimal", *presolved.postsolve(result.gen, result.storage, result.flow))
+
+
+# Solvers that can run a scenario: spec -> (status, gen, storage, flow)
+SCENARIO_SOLVERS = {
+    "gurobi": solve_with_gurobi,
+    "netsimplex": solve_with_network_simplex,
+}
+
+
+def solve_scenario(solver, scenario, spec=SPEC):
+    if solver not in SCENARIO_SOLVERS:
+        raise ValueError(f"Solver {solver!r} does not run scenarios.")
+    t0 = time.perf_counter()
+    spec = scenario_spec(spec, scenario)
+    status, gen, storage, flow = SCENARIO_SOLVERS[solver](spec)
+    objective = None if gen is None else spec.objective() @ np.concatenate([gen, storage, flow])
+    row = scenario_row(spec, status, gen, storage, objective)
+    row["solve_time_ms"] = round((time.perf_counter() - t0) * 1000, 3)
+    return row
+
+
+# -----------------------------------------------------------
+# MAIN (debug mode)
+# -----------------------------------------------------------
+
+if __name__ == "__main__":
+    for demand_scale in (0.6, 0.8, 1.0, 1.2):
+        for thermal in (1.0, 2.0):
+            row = solve_scenario("netsimplex", {"demand_scale": demand_scale, "cost_scale": {"Thermal": thermal}})
+            print(f"demand x{demand_scale:.1f} thermal cost x{thermal:.1f}: {row}")
@@ -0,0 +1,123 @@
+# --- Dual Prices and Sensitivity Ranges (instant what-ifs) ---
+#
+# The flow model is an LP in disguise (totally unimodular balance matrix),
+# so the LP relaxation of a solved model has the same optimal cost and
+# provides, per balance row and per generator:
+#   node price   Pi: d(total cost) / d(withdrawal at the node); for sinks
+#                the LMP-style marginal cost of one more unit of demand
+#   RHS range    SARHSLow / SARHSUp: the withdrawal range in which the
+#                optimal basis, and so the price, stays valid
+#   cost range   SAObjLow / SAObjUp: generator cost range in which the
+#                dispatch stays optimal
+#
+# These are stored with the solution (payload["duals"], cached with it),
+# so a what-if that stays inside its range is answered by arithmetic:
+#     demand at node n + delta   ->  cost + price[n] * delta
+#     cost of source i + delta   ->  cost + gen[i] * delta
+# Outside the range the answer needs a re-solve (e.g. a /sweeps scenario).
+# Ranges hold for one change at a time.
+
+# Relative slack on range checks
+RANGE_TOL = 1e-9
+
+# GRB.INFINITY (the what-if side runs in the web process, without gurobipy)
+INFINITY = 1e100
+
+
+def finite(value):
+    """None for Gurobi's +-infinity (not representable in JSON)."""
+    return None if abs(value) >= INFINITY else value
+
+
+# -----------------------------------------------------------
+# EXTRACTION
+# -----------------------------------------------------------
+
+def gurobi_duals(spec, model):
+    """
+    Duals block for a solved model whose columns are [g; s; x] and rows
+    the balance rows (LP relaxation re-solved from the same data).
+    """
+    from gurobipy import GRB
+
+    relaxed = model.relax()
+    try:
+        relaxed.Params.OutputFlag = 0
+        relaxed.optimize()
+        if relaxed.Status != GRB.OPTIMAL:
+            return None
+
+        rows = relaxed.getConstrs()
+        gen_vars = relaxed.getVars()[:spec.num_sources]
+        rhs = spec.balance_rhs()
+        return build_duals(
+            spec,
+            relaxed.ObjVal,
+            relaxed.getAttr("Pi", rows),
+            [low - b for low, b in zip(relaxed.getAttr("SARHSLow", rows), rhs.tolist())],
+            [up - b for up, b in zip(relaxed.getAttr("SARHSUp", rows), rhs.tolist())],
+            relaxed.getAttr("X", gen_vars),
+            [low - c for low, c in zip(relaxed.getAttr("SAObjLow", gen_vars), spec.source_cost.tolist())],
+            [up - c for up, c in zip(relaxed.getAttr("SAObjUp", gen_vars), spec.source_cost.tolist())],
+        )
+    finally:
+        relaxed.dispose()
+
+
+def build_duals(spec, objective, node_prices, demand_low, demand_up, gen, cost_low, cost_up):
+    """
+    Payload block. Ranges are stored as allowed changes [min, max] around
+    the current value (None = unbounded).
+    """
+    node_names = spec.node_names
+    source_ids = [f"S{i}" for i in range(spec.num_sources)]
+    return {
+        "source": "lp_relaxation",
+        "objective": round(objective, 6),
+        "node_prices": {
+            name: round(price, 6) for name, price in zip(node_names, node_prices)
+        },
+        "demand_range": {
+            name: [finite(low), finite(up)] for name, low, up in zip(node_names, demand_low, demand_up)
+        },
+        "generation": dict(zip(source_ids, gen)),
+        "cost_range": {
+            sid: [finite(low), finite(up)] for sid, low, up in zip(source_ids, cost_low, cost_up)
+        },
+    }
+
+
+# -----------------------------------------------------------
+# WHAT-IF
+# -----------------------------------------------------------
+
+def within(delta, allowed):
+    low, up = allowed
+    tol = RANGE_TOL * max(1.0, abs(delta))
+    return (low is None or delta >= low - tol) and (up is None or delta <= up + tol)
+
+
+def what_if_answer(duals, delta, allowed, rate, **fields):
+    answer = {**fields, "delta": delta, "allowed_delta": allowed, "within_range": within(delta, allowed)}
+    if answer["within_range"]:
+        answer["cost_change"] = rate * delta
+        answer["objective"] = duals["objective"] + rate * delta
+    else:
+        answer["requires_resolve"] = True
+    return answer
+
+
+def what_if_demand(duals, node, delta):
+    """Cost after the demand (withdrawal) at `node` changes by delta units."""
+    if node not in duals["node_prices"]:
+        raise KeyError(f"Unknown node: {node}")
+    price = duals["node_prices"][node]
+    return what_if_answer(duals, delta, duals["demand_range"][node], price, node=node, price=price)
+
+
+def what_if_cost(duals, source, delta):
+    """Cost after the unit cost of generator `source` ("S<i>") changes by delta."""
+    if source not in duals["generation"]:
+        raise KeyError(f"Unknown source: {source}")
+    gen = duals["generation"][source]
+    return what_if_answer(duals, delta, duals["cost_range"][source], gen, source=source, generation=gen)
@@ -0,0 +1,165 @@
+# --- Hierarchical Plans (aggregated grid + per-cluster distribution) ---
+#
+# POST /hierarchical runs the two-level solve of FullModelV1/hierarchical.py
+# on the job pool (backend/jobs.py):
+#   1. one job solves the aggregated grid (params {"top_level": true})
+#   2. once it is done, one job per sink cluster (params {"cluster": task},
+#      its supply being the cluster's inflow from step 1) goes to the same
+#      pool, so clusters run in parallel up to JOBS_MAX_WORKERS and are
+#      cached like any other solve
+#   3. cluster results stream as they finish (/hierarchical/<id>/events)
+#
+# The job workers are daemon processes and cannot start a pool of their
+# own, hence the fan-out from here rather than inside one job.
+
+import threading
+import time
+import uuid
+from collections import OrderedDict
+
+from backend import solver_registry
+from backend.jobs import CANCELLED, DONE, FINISHED
+from backend.node_calc import solution_key
+
+# Engine of the cluster subproblems (network_simplex.solve_min_cost_flow)
+CLUSTER_SOLVER = "netsimplex"
+
+# Plans kept for /hierarchical/<id> before the oldest are forgotten
+MAX_PLANS = 20
+
+
+class Plan:
+
+    def __init__(self, solver, top):
+        self.id = uuid.uuid4().hex
+        self.solver = solver
+        self.top = top          # job solving the aggregated grid
+        self.clusters = None    # one job per cluster once the top level is done
+        self.cancelled = False
+        self.ready = threading.Event()  # set once `clusters` is final
+        self.submitted = time.time()
+        self.lock = threading.Lock()
+
+    def cluster_row(self, index, include_flows=True):
+        """Result of one cluster (its job status until it is done)."""
+        job = self.clusters[index]
+        if job.status == DONE:
+            row = {key: value for key, value in job.result.items() if key != "ok"}
+            if not include_flows:
+                row.pop("flows", None)
+            row["cached"] = job.cached
+            return row
+        row = {"cluster": index, "status": job.status}
+        if job.error is not None:
+            row["error"] = job.error
+        return row
+
+    @property
+    def status(self):
+        if self.cancelled:
+            return CANCELLED
+        if self.top.status != DONE:
+            return "top_level" if self.top.status not in FINISHED else self.top.status
+        if self.clusters is None:
+            return "top_level"
+        if not self.clusters:
+            return "done"  # top level without a solution: nothing to distribute
+        return "done" if all(job.status in FINISHED for job in self.clusters) else "running"
+
+    def summary(self):
+        rows = [job.result for job in self.clusters or [] if job.status == DONE and "served" in job.result]
+        return {
+            "sinks": sum(row["sinks"] for row in rows),
+            "served": round(sum(row["served"] for row in rows), 6),
+            "unserved": round(sum(row["unserved"] for row in rows), 6),
+            "loss_proxy": round(sum(row["loss_proxy"] for row in rows), 3),
+        }
+
+    def to_dict(self, include_clusters=True, include_flows=False):
+        data = {
+            "plan_id": self.id,
+            "solver": self.solver,
+            "status": self.status,
+            "submitted": self.submitted,
+        }
+        if self.top.status == DONE:
+            data["top"] = {key: value for key, value in self.top.result.items() if key not in ("ok", "clusters")}
+        elif self.top.error is not None:
+            data["error"] = self.top.error
+        if self.clusters is not None:
+            data["clusters"] = len(self.clusters)
+            data["finished"] = sum(1 for job in self.clusters if job.status in FINISHED)
+            data["summary"] = self.summary()
+            if include_clusters:
+                data["rows"] = [self.cluster_row(i, include_flows) for i in range(len(self.clusters))]
+        return data
+
+
+class HierarchyManager:
+    """Two-level plans on top of a JobManager; keeps the MAX_PLANS most recent."""
+
+    def __init__(self, jobs, max_plans=MAX_PLANS):
+        self.jobs = jobs
+        self.max_plans = max_plans
+        self._plans = OrderedDict()
+        self._lock = threading.Lock()
+
+    def submit(self, solver, use_cache=True):
+        if solver not in solver_registry.names("scenarios"):
+            raise ValueError(f"Solver {solver!r} cannot solve the top level "
+                             f"(use one of: {', '.join(solver_registry.names('scenarios'))}).")
+        params = {"top_level": True}
+        top = self.jobs.submit(solver, key=solution_key(solver, params), use_cache=use_cache, params=params)
+        plan = Plan(solver, top)
+        with self._lock:
+            self._plans[plan.id] = plan
+            while len(self._plans) > self.max_plans:
+                self._plans.popitem(last=False)
+
+        threading.Thread(target=self._expand, args=(plan, use_cache), daemon=True).start()
+        return plan
+
+    def _expand(self, plan, use_cache):
+        """Wait for the top level, then submit one job per cluster."""
+        self.jobs.wait_finished([plan.top], set())
+        tasks = plan.top.result.get("clusters", []) if plan.top.status == DONE else []
+        with plan.lock:
+            if not plan.cancelled:
+                plan.clusters = [
+                    self.jobs.submit(CLUSTER_SOLVER, key=solution_key(CLUSTER_SOLVER, {"cluster": task}),
+                                     use_cache=use_cache, params={"cluster": task})
+                    for task in tasks
+                ]
+            else:
+                plan.clusters = []
+            plan.ready.set()
+
+    def get(self, plan_id):
+        return self._plans.get(plan_id)
+
+    def wait_top(self, plan, timeout=None):
+        """Block until the clusters are submitted (or timeout). True when they are."""
+        return plan.ready.wait(timeout)
+
+    def wait_clusters(self, plan, seen, timeout=None):
+        """
+        Block until clusters not in `seen` (a set of indices, updated in
+        place) have finished (or timeout). Returns their rows.
+        """
+        pending = [job for i, job in enumerate(plan.clusters) if i not in seen]
+        done_ids = {job.id for job in self.jobs.wait_finished(pending, set(), timeout)}
+        indices = [i for i, job in enumerate(plan.clusters) if i not in seen and job.id in done_ids]
+        seen.update(indices)
+        return [plan.cluster_row(i) for i in indices]
+
+    def cancel(self, plan_id):
+        """Cancel the top level and every unfinished cluster. Returns the plan, or None if unknown."""
+        plan = self.get(plan_id)
+        if plan is None:
+            return None
+        with plan.lock:
+            plan.cancelled = True
+            for job in [plan.top, *(plan.clusters or [])]:
+                if job.status not in FINISHED:
+                    self.jobs.cancel(job.id)
+        return plan
@@ -0,0 +1,366 @@
+# --- Solver Job Queue (bounded worker-process pool) ---
+#
+# /run-solver no longer solves inside the HTTP request: it submits a job
+# and returns its id. Jobs run in a fixed-size pool of long-lived worker
+# processes, one job per worker at a time:
+#   - the pool size bounds total CPU / memory use (JOBS_MAX_WORKERS)
+#   - per-solver limits bound the expensive or rate-limited backends,
+#     e.g. one D-Wave job at a time (JOBS_CONCURRENCY="cqm=1,gurobi=2")
+#   - a queued job is cancelled by dropping it; a running job by
+#     terminating its worker process, which is then replaced
+#   - jobs submitted with a solution key are answered from the solution
+#     cache when possible, and an identical job already queued or running
+#     is shared instead of solving twice
+#
+# Worker <-> manager messages go over one Pipe per worker:
+#   manager -> worker:  (job_id, solver, params)    or None to shut down
+#   worker -> manager:  ("progress", job_id, event)   any number of times
+#                       ("result", job_id, payload)
+#                       ("error",  job_id, message)
+#
+# Progress events come from FullModelV1/progress.py; each job keeps them
+# in order so /jobs/<id>/events can stream them (Server-Sent Events).
+
+import multiprocessing
+import os
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from multiprocessing.connection import wait
+
+# Default per-solver concurrency; solvers not listed use DEFAULT_LIMIT
+SOLVER_CONCURRENCY = {
+    "gurobi": 2,   # license seats
+    "rolling": 1,  # Gurobi too, one window model per job
+    "cqm": 1,      # D-Wave Leap hybrid, blocks for TIME_LIMIT_SEC
+    "nlq": 1,
+    "iqm": 1,      # QAOA on hardware, several jobs per solve
+    "ionq": 1,
+}
+DEFAULT_LIMIT = 4
+
+MAX_WORKERS = min(4, os.cpu_count() or 1)
+
+# Finished jobs kept for /jobs/<id> before the oldest are forgotten
+MAX_FINISHED_JOBS = 200
+
+# Progress events kept per job (older ones are dropped first)
+MAX_EVENTS_PER_JOB = 1000
+
+QUEUED = "queued"
+RUNNING = "running"
+DONE = "done"
+FAILED = "failed"
+CANCELLED = "cancelled"
+
+FINISHED = (DONE, FAILED, CANCELLED)
+
+
+def parse_concurrency(text):
+    """'cqm=1,gurobi=2' -> {'cqm': 1, 'gurobi': 2}"""
+    limits = {}
+    for item in filter(None, (part.strip() for part in (text or "").split(","))):
+        name, _, value = item.partition("=")
+        limits[name.strip()] = int(value)
+    return limits
+
+
+# -----------------------------------------------------------
+# WORKER PROCESS
+# -----------------------------------------------------------
+
+def worker_main(conn):
+    from backend.FullModelV1 import progress
+    from backend.node_calc import run_job
+
+    while True:
+        msg = conn.recv()
+        if msg is None:
+            break
+        job_id, solver, params = msg
+        progress.set_reporter(
+            lambda event, data, job_id=job_id: conn.send(("progress", job_id, {"event": event, **data}))
+        )
+        try:
+            conn.send(("result", job_id, run_job(solver, params)))
+        except Exception as e:
+            conn.send(("error", job_id, str(e)))
+
+
+class Worker:
+
+    def __init__(self, ctx):
+        self.conn, child_conn = ctx.Pipe()
+        self.process = ctx.Process(target=worker_main, args=(child_conn,), daemon=True)
+        self.process.start()
+        child_conn.close()
+        self.job = None
+
+    def kill(self):
+        self.process.terminate()
+        self.process.join(5)
+        self.conn.close()
+
+
+# -----------------------------------------------------------
+# JOBS
+# -----------------------------------------------------------
+
+class Job:
+
+    def __init__(self, solver, key=None, params=None):
+        self.id = uuid.uuid4().hex
+        self.solver = solver
+        self.key = key
+        self.params = params
+        self.cached = False
+        self.status = QUEUED
+        self.submitted = time.time()
+        self.started = None
+        self.finished = None
+        self.result = None
+        self.error = None
+        self.events = []
+        self.events_dropped = 0  # sequence number of events[0]
+
+    def add_event(self, event):
+        self.events.append(event)
+        if len(self.events) > MAX_EVENTS_PER_JOB:
+            drop = len(self.events) - MAX_EVENTS_PER_JOB
+            del self.events[:drop]
+            self.events_dropped += drop
+
+    def events_since(self, seq):
+        """Events with sequence number >= seq, and the next sequence number."""
+        start = max(seq - self.events_dropped, 0)
+        return self.events[start:], self.events_dropped + len(self.events)
+
+    def to_dict(self, include_result=True):
+        data = {
+            "job_id": self.id,
+            "solver": self.solver,
+            "status": self.status,
+            "cached": self.cached,
+            "submitted": self.submitted,
+            "started": self.started,
+            "finished": self.finished,
+        }
+        if self.error is not None:
+            data["error"] = self.error
+        if include_result and self.result is not None:
+            data["result"] = self.result
+        return data
+
+
+class JobManager:
+    """Queue + bounded pool. Workers are started lazily on first use."""
+
+    def __init__(self, max_workers=MAX_WORKERS, concurrency=None, default_limit=DEFAULT_LIMIT,
+                 cache=None):
+        self.max_workers = max_workers
+        self.concurrency = dict(SOLVER_CONCURRENCY, **(concurrency or {}))
+        self.default_limit = default_limit
+        self.cache = cache
+
+        self._ctx = multiprocessing.get_context("spawn")
+        self._lock = threading.Lock()
+        self._changed = threading.Condition(self._lock)
+        self._jobs = OrderedDict()
+        self._queue = []
+        self._workers = []
+        self._listener = None
+        # Wakes the listener when a worker is added to the pool
+        self._wake_recv, self._wake_send = self._ctx.Pipe(duplex=False)
+
+    @classmethod
+    def from_env(cls, cache=None):
+        return cls(
+            max_workers=int(os.environ.get("JOBS_MAX_WORKERS", MAX_WORKERS)),
+            concurrency=parse_concurrency(os.environ.get("JOBS_CONCURRENCY")),
+            cache=cache,
+        )
+
+    # -------------------------------------------------------
+    # PUBLIC API
+    # -------------------------------------------------------
+
+    def submit(self, solver, key=None, use_cache=True, params=None):
+        """
+        Queue a solve (params go to node_calc.run_job). With a solution
+        `key`, a cached payload finishes the job immediately and an
+        identical unfinished job is returned as is; use_cache=False forces
+        a fresh solve (its result still refreshes the cache).
+        """
+        job = Job(solver, key, params)
+
+        if key is not None and use_cache and self.cache is not None:
+            payload = self.cache.get(key)
+            if payload is not None:
+                job.cached = True
+                job.started = job.submitted
+                with self._lock:
+                    self._jobs[job.id] = job
+                    self._finish(job, DONE, result=payload)
+                return job
+
+        with self._lock:
+            if key is not None and use_cache:
+                for other in self._jobs.values():
+                    if other.key == key and other.status not in FINISHED:
+                        return other
+
+            self._jobs[job.id] = job
+            self._queue.append(job)
+            self._schedule()
+        return job
+
+    def get(self, job_id):
+        return self._jobs.get(job_id)
+
+    def wait_events(self, job, seq=0, timeout=None):
+        """
+        Block until `job` has events past `seq` or is finished (or timeout).
+        Returns (events, next_seq, finished).
+        """
+        with self._changed:
+            self._changed.wait_for(
+                lambda: job.status in FINISHED or job.events_since(seq)[0], timeout
+            )
+            events, next_seq = job.events_since(seq)
+            return events, next_seq, job.status in FINISHED
+
+    def wait_finished(self, jobs, seen, timeout=None):
+        """
+        Block until one of `jobs` not in `seen` (a set of job ids) is
+        finished (or timeout). Returns the newly finished jobs.
+        """
+        def finished():
+            return [job for job in jobs if job.status in FINISHED and job.id not in seen]
+
+        with self._changed:
+            self._changed.wait_for(finished, timeout)
+            return finished()
+
+    def cancel(self, job_id):
+        """Cancel a queued or running job. Returns the job, or None if unknown."""
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job is None or job.status in FINISHED:
+                return job
+
+            if job.status == QUEUED:
+                self._queue.remove(job)
+            else:
+                worker = next(w for w in self._workers if w.job is job)
+                self._workers.remove(worker)
+                worker.kill()
+
+            self._finish(job, CANCELLED)
+            self._schedule()
+            return job
+
+    def shutdown(self):
+        with self._lock:
+            for worker in self._workers:
+                worker.kill()
+            self._workers = []
+
+    # -------------------------------------------------------
+    # SCHEDULING (caller holds the lock)
+    # -------------------------------------------------------
+
+    def limit(self, solver):
+        return self.concurrency.get(solver, self.default_limit)
+
+    def _running(self, solver):
+        return sum(1 for w in self._workers if w.job is not None and w.job.solver == solver)
+
+    def _schedule(self):
+        for job in list(self._queue):
+            if self._running(job.solver) >= self.limit(job.solver):
+                continue
+
+            worker = next((w for w in self._workers if w.job is None), None)
+            if worker is None:
+                if len(self._workers) >= self.max_workers:
+                    break
+                worker = Worker(self._ctx)
+                self._workers.append(worker)
+                self._wake_send.send(None)
+
+            self._queue.remove(job)
+            job.status = RUNNING
+            job.started = time.time()
+            worker.job = job
+            worker.conn.send((job.id, job.solver, job.params))
+
+        if self._workers and self._listener is None:
+            self._listener = threading.Thread(target=self._listen, daemon=True)
+            self._listener.start()
+
+    def _finish(self, job, status, result=None, error=None):
+        job.status = status
+        job.result = result
+        job.error = error
+        job.finished = time.time()
+        self._changed.notify_all()
+
+        finished = [j for j in self._jobs.values() if j.status in FINISHED]
+        for old in finished[:max(0, len(finished) - MAX_FINISHED_JOBS)]:
+            del self._jobs[old.id]
+
+    # -------------------------------------------------------
+    # RESULT LISTENER
+    # -------------------------------------------------------
+
+    def _listen(self):
+        while True:
+            with self._lock:
+                waitables = {w.conn: w for w in self._workers}
+                waitables.update({w.process.sentinel: w for w in self._workers})
+
+            try:
+                ready_list = wait([self._wake_recv, *waitables], timeout=1.0)
+            except (OSError, ValueError):
+                continue  # a worker was killed while we waited
+
+            for ready in ready_list:
+                if ready is self._wake_recv:
+                    self._wake_recv.recv()
+                    continue
+                with self._lock:
+                    self._handle(waitables[ready], ready)
+
+    def _handle(self, worker, ready):
+        if worker not in self._workers:
+            return  # killed by cancel() / shutdown() in the meantime
+
+        if ready is worker.conn:
+            try:
+                kind, job_id, data = worker.conn.recv()
+            except (EOFError, OSError):
+                return  # the sentinel reports the dead worker
+            job = worker.job
+            if job is None or job.id != job_id:
+                return
+            if kind == "progress":
+                job.add_event(data)
+                self._changed.notify_all()
+                return
+
+            worker.job = None
+            if kind == "result":
+                self._finish(job, DONE, result=data)
+                if job.key is not None and self.cache is not None and data.get("ok"):
+                    self.cache.set(job.key, data)
+            else:
+                self._finish(job, FAILED, error=data)
+        elif not worker.process.is_alive():
+            # Crashed (segfault, OOM kill, ...): fail its job, drop the worker
+            self._workers.remove(worker)
+            worker.conn.close()
+            if worker.job is not None:
+                self._finish(worker.job, FAILED, error="Solver process exited unexpectedly.")
+
+        self._schedule()
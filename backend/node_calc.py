@@ -1,46 +1,83 @@
 import sys
-import importlib
 from pathlib import Path
 
 # Ensure backend path is added
 repo_src = Path(__file__).resolve().parent
 sys.path.insert(0, str(repo_src))
 
+from backend import solver_registry
 
-# ====== LOCAL GUROBI SOLVER JSON OUTPUT ======
-def run_gurobi_output():
-    solver = importlib.import_module("backend.FullModelV1.15KNodeGurobiLocal")
 
-    model, g, s, x = solver.build_and_solve_gurobi()
+# ====== FALLBACK ======
+def run_dummy_output():
+    return {"ok": True, "actions": ["Dummy solver ran."], "nodes": {}, "flows": []}
 
-    if model.Status != 2:
-        return {"ok": False, "error": "No optimal solution"}
 
-    # Return JSON suitable for frontend
-    return solver.build_frontend_result(model, g, s, x)
+# ====== SOLVER DISPATCH ======
+# Session solver name -> plugin (backend/solver_registry.py). The plugin
+# imports its module on the first run in this worker and keeps it, so
+# model templates / envs (Gurobi) and provider imports (dwave, qiskit)
+# are paid once per worker, not per request.
+def run_solver_output(solver):
+    plugin = solver_registry.get(solver)
+    if plugin is None or not plugin.supports("payload"):
+        return run_dummy_output()
+    if not plugin.available:
+        raise RuntimeError(f"Solver {solver!r} needs packages that are not installed: {', '.join(plugin.missing())}")
+    return plugin.run()
 
 
-# ====== D-WAVE HYBRID CQM SOLVER ======
-def run_cqm_output():
-    solver = importlib.import_module("backend.FullModelV1.15KNodeCQM")
-    return solver.main()
+# ====== SCENARIO SWEEPS ======
+# One scenario (demand / cost scaling) of a sweep (backend/sweeps.py); the
+# Gurobi backend re-uses the worker's pooled model, changing only RHS and
+# objective. Returns one result row, not a frontend payload. Like the
+# plugins, the module is imported on first use and kept (sys.modules).
+def run_scenario_output(solver, scenario):
+    from backend.FullModelV1 import scenarios
+    return scenarios.solve_scenario(solver, scenario)
 
 
-# ====== D-WAVE NLSAMPLER SOLVER ======
-def run_nlq_output():
-    solver = importlib.import_module("backend.FullModelV1.15KNodeOnNLSampler")
-    return solver.main()
+# ====== HIERARCHICAL SOLVE ======
+# Level 1 (aggregated grid, returns one task per sink cluster) and level 2
+# (one cluster's distribution network) of a hierarchical plan
+# (backend/hierarchy.py). Not frontend payloads either.
+def run_top_level_output(solver):
+    from backend.FullModelV1 import hierarchical
+    return hierarchical.solve_top_level(solver)
 
-#IQM SOLVER
-def run_iqm_output():
-    solver = importlib.import_module("backend.solver_5node.run_5node_iqm")
-    return solver.main()
 
-#IonQ SOLVER
-def run_ionq_output():
-    solver = importlib.import_module("backend.solver_5node.run_5node_ionq")
-    return solver.main()
+def run_cluster_output(task):
+    from backend.FullModelV1 import hierarchical
+    return hierarchical.solve_cluster(task)
 
-# ====== FALLBACK ======
-def run_dummy_output():
-    return {"ok": True, "actions": ["Dummy solver ran."], "nodes": {}, "flows": []}
+
+def run_job(solver, params=None):
+    """Job worker entry point: a scenario row / hierarchy level if params has one, else the payload."""
+    if params and "scenario" in params:
+        return run_scenario_output(solver, params["scenario"])
+    if params and params.get("top_level"):
+        return run_top_level_output(solver)
+    if params and "cluster" in params:
+        return run_cluster_output(params["cluster"])
+    return run_solver_output(solver)
+
+
+# ====== SOLUTION CACHE KEY ======
+# Every runner solves the default grid, so the key is grid fingerprint +
+# solver name + params (e.g. a sweep scenario) + the runner's settings
+# from the environment (solver_registry) + PAYLOAD_VERSION. The disk tier
+# survives restarts: bump PAYLOAD_VERSION whenever a payload gains or
+# changes fields or a runner's built-in settings change, so results from
+# older code are solved again instead of served.
+PAYLOAD_VERSION = 5
+
+
+def solution_key(solver, params=None):
+    plugin = solver_registry.get(solver)
+    if plugin is None:
+        return None
+
+    from backend.FullModelV1.grid_spec import default_grid_spec
+    from backend.solution_cache import solution_key as content_key
+    key_params = {**(params or {}), "payload_version": PAYLOAD_VERSION, "settings": plugin.settings()}
+    return content_key(default_grid_spec().fingerprint(), solver, key_params)
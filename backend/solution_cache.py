@@ -0,0 +1,109 @@
+# --- Content-Addressed Solution Cache ---
+#
+# Solver payloads are cached under a key derived only from what determines
+# the answer:
+#     sha256(grid fingerprint, solver name, canonical JSON of parameters)
+# so the same grid solved with the same solver and settings is served
+# from the cache instead of being solved again, for every user.
+#
+# Two tiers:
+#   1. in-process LRU (OrderedDict), a few hundred payloads, no I/O
+#   2. diskcache.Cache on disk, shared by all processes, bounded by size
+#      (least-recently-used eviction); hits are promoted to tier 1
+
+import hashlib
+import json
+import os
+import threading
+from collections import OrderedDict
+
+import diskcache
+
+DEFAULT_DIRECTORY = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), ".solution_cache")
+
+# Tier 1: number of payloads kept in memory
+MEMORY_ITEMS = 256
+
+# Tier 2: total size on disk
+DISK_SIZE_LIMIT = 512 * 1024 * 1024
+
+
+def solution_key(grid_fingerprint, solver, params=None):
+    """Canonical content hash of one solve request."""
+    canonical = json.dumps(
+        {"grid": grid_fingerprint, "solver": solver, "params": params or {}},
+        sort_keys=True, separators=(",", ":"), default=str
+    )
+    return hashlib.sha256(canonical.encode()).hexdigest()
+
+
+class SolutionCache:
+
+    def __init__(self, directory=DEFAULT_DIRECTORY, memory_items=MEMORY_ITEMS,
+                 disk_size_limit=DISK_SIZE_LIMIT):
+        self.memory_items = memory_items
+        self._memory = OrderedDict()
+        self._lock = threading.Lock()
+
+        self._disk = None
+        if directory:
+            self._disk = diskcache.Cache(
+                directory,
+                size_limit=disk_size_limit,
+                eviction_policy="least-recently-used",
+            )
+
+        self.hits = 0
+        self.misses = 0
+
+    @classmethod
+    def from_env(cls):
+        return cls(
+            directory=os.environ.get("SOLUTION_CACHE_DIR", DEFAULT_DIRECTORY),
+            memory_items=int(os.environ.get("SOLUTION_CACHE_ITEMS", MEMORY_ITEMS)),
+            disk_size_limit=int(os.environ.get("SOLUTION_CACHE_SIZE_MB", DISK_SIZE_LIMIT >> 20)) << 20,
+        )
+
+    def _remember(self, key, payload):
+        self._memory[key] = payload
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.memory_items:
+            self._memory.popitem(last=False)
+
+    def get(self, key):
+        with self._lock:
+            if key in self._memory:
+                self._memory.move_to_end(key)
+                self.hits += 1
+                return self._memory[key]
+
+        payload = self._disk.get(key) if self._disk is not None else None
+
+        with self._lock:
+            if payload is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+                self._remember(key, payload)
+        return payload
+
+    def set(self, key, payload):
+        with self._lock:
+            self._remember(key, payload)
+        if self._disk is not None:
+            self._disk.set(key, payload)
+
+    def clear(self):
+        with self._lock:
+            self._memory.clear()
+        if self._disk is not None:
+            self._disk.clear()
+
+    def stats(self):
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "memory_items": len(self._memory),
+            "disk_items": len(self._disk) if self._disk is not None else 0,
+            "disk_bytes": self._disk.volume() if self._disk is not None else 0,
+        }
@@ -1,15 +1,33 @@
 import os
-import itertools
 from dotenv import load_dotenv
 from scipy.optimize import minimize
-import dimod
+
+try:
+    from backend.FullModelV1 import progress
+except ImportError:  # run as a script from this folder: no progress stream
+    progress = None
+
+try:
+    from backend.solver_5node import qaoa_sim
+    from backend.solver_5node import qubo
+except ImportError:  # run as a script from this folder
+    import qaoa_sim
+    import qubo
 
 load_dotenv()
 
 # CONFIGURATION
 IONQ_API_KEY = os.getenv("IONQ_API_KEY")
-if not IONQ_API_KEY:
-    raise RuntimeError("Set IONQ_API_KEY in .env file")
+IONQ_BACKEND = "ionq_simulator"
+# IONQ_BACKEND = "ionq_qpu"      # Uncomment for real hardware
+
+# "remote" (IonQ), "local" (NumPy statevector simulator, qaoa_sim.py) or
+# "auto" (local without an API key)
+QAOA_BACKEND = os.getenv("QAOA_BACKEND", "auto")
+LOCAL = QAOA_BACKEND == "local" or (QAOA_BACKEND == "auto" and not IONQ_API_KEY)
+LOCAL_MAXITER = 200  # exact local evaluations are cheap, so optimize fully
+REMOTE_MAXITER = 6   # every evaluation is a circuit run on IonQ
+LOCAL_SEED = 0       # fixed final shot sample: a local run is reproducible (cached by key)
 
 # Problem definition
 sources = ['A', 'B']
@@ -26,182 +44,222 @@ valid_arcs = [
 
 var_names = [f"f_{i}_{j}" for (i, j) in valid_arcs]
 n_vars = len(var_names)
-print(f"Problem: {n_vars} binary variables")
-print(f"Variables: {var_names}\n")
-
-# BUILD QUBO
 penalty = 8.0
-linear = {}
-quadratic = {}
-
-# Source costs
-for v in var_names:
-    src = v.split('_')[1]
-    if src in sources:
-        linear[v] = linear.get(v, 0.0) + cost[src]
-
-# Demand constraints
-for sink, demand in sinks.items():
-    incoming = [v for v in var_names if v.endswith(f"_{sink}")]
-    for v in incoming:
-        linear[v] = linear.get(v, 0.0) + penalty - 2.0 * penalty * demand
-    for v1, v2 in itertools.combinations(incoming, 2):
-        k = tuple(sorted([v1, v2]))
-        quadratic[k] = quadratic.get(k, 0.0) + 2.0 * penalty
-
-# Capacity constraints
-for src in sources:
-    outgoing = [v for v in var_names if v.startswith(f"f_{src}_")]
-    for v in outgoing:
-        linear[v] = linear.get(v, 0.0) + penalty - 2.0 * penalty * Gmax[src]
-    for v1, v2 in itertools.combinations(outgoing, 2):
-        k = tuple(sorted([v1, v2]))
-        quadratic[k] = quadratic.get(k, 0.0) + 2.0 * penalty
-
-# Build BQM
-bqm = dimod.BinaryQuadraticModel(linear, quadratic, 0.0, dimod.BINARY)
-print(f"Built BQM: {len(bqm.linear)} linear, {len(bqm.quadratic)} quadratic terms\n")
-
-# CONNECT TO IONQ
-from qiskit_ionq import IonQProvider
-from qiskit import QuantumCircuit, transpile
-
-provider = IonQProvider(token=IONQ_API_KEY)
-backend = provider.get_backend("ionq_simulator") 
-# backend = provider.get_backend("ionq_qpu")      # Uncomment for real hardware
-
-print(f"Connected to: {backend.name}\n")
 
-# BUILD QAOA CIRCUIT
-var_to_idx = {v: i for i, v in enumerate(var_names)}
-n_qubits = n_vars
+n_qubits = n_vars  # qubit i = var_names[i]
 shots = 512
-p = 1 
+p = 1
+
+
+# BUILD QUBO (vectorized, qubo.py)
+def build_qubo():
+    return qubo.compile_flow_qubo(
+        nodes, valid_arcs,
+        source_cost=cost,   # Source costs
+        demand=sinks,       # Demand constraints
+        capacity=Gmax,      # Capacity constraints
+        penalty=penalty,
+    )
+
+
+# CONNECT TO IONQ (credentials are checked and qiskit imported only here)
+def connect_ionq():
+    if not IONQ_API_KEY:
+        raise RuntimeError("Set IONQ_API_KEY in .env file")
+    from qiskit_ionq import IonQProvider
+
+    provider = IonQProvider(token=IONQ_API_KEY)
+    backend = provider.get_backend(IONQ_BACKEND)
+
+    print(f"Connected to: {backend.name}\n")
+    return backend
+
 
-def build_qaoa_circuit(params):
+# BUILD QAOA CIRCUIT
+def build_qaoa_circuit(compiled, params):
     """Build QAOA ansatz circuit"""
+    from qiskit import QuantumCircuit
+
+    rows, cols, biases = compiled.quadratic()
     gammas = params[:p]
     betas = params[p:2*p]
-    
+
     qc = QuantumCircuit(n_qubits)
-    
+
     # Initial superposition
     qc.h(range(n_qubits))
-    
+
     for level in range(p):
         gamma = float(gammas[level])
-        
+
         # Apply problem Hamiltonian (quadratic terms)
-        for (u, v), coeff in bqm.quadratic.items():
-            q1 = var_to_idx[u]
-            q2 = var_to_idx[v]
+        for q1, q2, coeff in zip(rows.tolist(), cols.tolist(), biases.tolist()):
             angle = -2.0 * gamma * coeff
             qc.cx(q1, q2)
             qc.rz(angle, q2)
             qc.cx(q1, q2)
-        
+
         # Apply problem Hamiltonian (linear terms)
-        for vname, coeff in bqm.linear.items():
-            q = var_to_idx[vname]
+        for q, coeff in enumerate(compiled.linear().tolist()):
             angle = -gamma * coeff
             qc.rz(angle, q)
-        
+
         # Apply mixer Hamiltonian
         beta = float(betas[level])
         for q in range(n_qubits):
             qc.rx(2.0 * beta, q)
-    
+
     qc.measure_all()
     return qc
 
-# ENERGY EVALUATION ON IONQ
-def energy_from_counts(counts):
-    """Calculate expected energy from measurement counts"""
-    total = sum(counts.values())
-    avg_energy = 0.0
-    for bitstr, cnt in counts.items():
-        # Convert bitstring to variable assignment
-        sample = {v: int(bitstr[i]) for i, v in enumerate(var_names)}
-        e = bqm.energy(sample)
-        avg_energy += (cnt / total) * e
-    return avg_energy
-
-def hardware_eval(params):
-    """Evaluate energy on IonQ hardware"""
-    qc = build_qaoa_circuit(params)
-    
+
+def run_on_ionq(backend, compiled, params):
+    """Measurement counts of the QAOA circuit for params on IonQ"""
+    from qiskit import transpile
+
     # Transpile for IonQ
-    qc_transpiled = transpile(qc, backend=backend, optimization_level=1)
-    
+    qc_transpiled = transpile(build_qaoa_circuit(compiled, params), backend=backend, optimization_level=1)
+
     # Run on IonQ
     job = backend.run(qc_transpiled, shots=shots)
-    result = job.result()
-    counts = result.get_counts()
-    
-    energy = energy_from_counts(counts)
-    print(f"  params: {[round(float(x), 4) for x in params]} -> energy: {round(energy, 4)}")
-    return energy
-
-# RUN OPTIMIZATION
-print("Starting QAOA optimization on IonQ...")
-print("(Each iteration runs a quantum circuit on hardware)\n")
-
-init_params = [0.5] * (2 * p)
-result = minimize(
-    hardware_eval,
-    x0=init_params,
-    method='COBYLA',
-    options={'maxiter': 6}
-)
-
-print(f"\nOptimization complete!")
-print(f"Best parameters: {[round(x, 4) for x in result.x]}\n")
-
-# FINAL RUN WITH BEST PARAMETERS
-print("Running final circuit with optimized parameters...")
-best_params = result.x
-final_qc = build_qaoa_circuit(best_params)
-final_qc_transpiled = transpile(final_qc, backend=backend, optimization_level=1)
-
-job = backend.run(final_qc_transpiled, shots=shots)
-final_result = job.result()
-counts = final_result.get_counts()
-
-print(f"Final counts: {counts}\n")
-
-# Get best bitstring
-best_bitstring = max(counts, key=counts.get)
-best_sample = {v: int(best_bitstring[i]) for i, v in enumerate(var_names)}
-best_energy = bqm.energy(best_sample)
-
-# DISPLAY RESULTS
-print("="*70)
-print("SOLUTION")
-print("="*70)
-print(f"\nBest bitstring: {best_bitstring}")
-print(f"Energy: {best_energy:.2f}\n")
-
-print("Active flows:")
-total_cost = 0.0
-for v in var_names:
-    if best_sample[v] == 1:
-        src, dst = v.split('_')[1], v.split('_')[2]
+    return job.result().get_counts()
+
+
+# FRONTEND PAYLOAD
+def node_positions():
+    """Sources, battery and sinks in three columns"""
+    columns = [("Source", sources), ("Battery", [battery]), ("Load", list(sinks))]
+    return {
+        n: {"x": 200.0 * c, "y": 150.0 * r, "type": typ}
+        for c, (typ, members) in enumerate(columns) for r, n in enumerate(members)
+    }
+
+
+def build_payload(compiled, counts, best_bitstring, x, evaluations, backend_name):
+    """Active arcs as flows, cost and checks as actions"""
+    flows, actions = [], []
+    for src, dst in compiled.active_arcs(x):
+        flows.append({"src": src, "dst": dst, "flow": 1})
+        actions.append(f"Flow {src} -> {dst}")
+    outflow = compiled.outflow(x)
+    total_cost = float(sum(cost[src] * outflow[nodes.index(src)] for src in sources))
+    actions.append(f"Total cost: {total_cost:.2f}")
+    inflow = compiled.inflow(x)
+    for sink, demand in sinks.items():
+        received = int(inflow[nodes.index(sink)])
+        actions.append(f"Demand {sink}: {received}/{demand} {'met' if received >= demand else 'NOT met'}")
+    for src in sources:
+        generated = int(outflow[nodes.index(src)])
+        actions.append(f"Capacity {src}: {generated}/{Gmax[src]} {'ok' if generated <= Gmax[src] else 'EXCEEDED'}")
+
+    return {
+        "ok": True,
+        "backend": backend_name,
+        "bitstring": best_bitstring,
+        "energy": float(compiled.energies(x)[0]),
+        "cost": total_cost,
+        "evaluations": len(evaluations),
+        "counts": counts,
+        "nodes": node_positions(),
+        "flows": flows,
+        "actions": actions,
+    }
+
+
+def main():
+    """Build the QUBO, run QAOA on IonQ (or locally) and return the frontend payload"""
+    print(f"Problem: {n_vars} binary variables")
+    print(f"Variables: {var_names}\n")
+
+    compiled = build_qubo()
+    print(f"Built QUBO: {n_vars} linear, {len(compiled.quadratic()[0])} quadratic terms\n")
+
+    # CONNECT TO IONQ (or simulate locally: qubit i = var_names[i]; the
+    # cost diagonal is every basis state scored as one bit matrix)
+    if LOCAL:
+        simulator = qaoa_sim.QAOASimulator(compiled.energies(qaoa_sim.basis_bits(n_qubits)))
+        backend, backend_name = None, "local statevector simulator"
+        print("Connected to: local statevector simulator\n")
+    else:
+        backend = connect_ionq()
+        backend_name = backend.name
+
+    evaluations = []  # energy per hardware_eval() call, in order
+
+    def hardware_eval(params):
+        """Evaluate energy on IonQ hardware (exact expectation when LOCAL)"""
+        if LOCAL:
+            energy = simulator.expectation(params)
+        else:
+            energy = compiled.energy_from_counts(run_on_ionq(backend, compiled, params))
+        print(f"  params: {[round(float(x), 4) for x in params]} -> energy: {round(energy, 4)}")
+        evaluations.append(energy)
+        if progress is not None:
+            progress.report("energy", iteration=len(evaluations),
+                            params=[float(x) for x in params], energy=float(energy))
+        return energy
+
+    # RUN OPTIMIZATION
+    print("Starting QAOA optimization on IonQ...")
+    print("(Each iteration runs a quantum circuit on hardware)\n")
+
+    init_params = [0.5] * (2 * p)
+    result = minimize(
+        hardware_eval,
+        x0=init_params,
+        method='COBYLA',
+        options={'maxiter': LOCAL_MAXITER if LOCAL else REMOTE_MAXITER}
+    )
+
+    print(f"\nOptimization complete!")
+    print(f"Best parameters: {[round(x, 4) for x in result.x]}\n")
+
+    # FINAL RUN WITH BEST PARAMETERS
+    print("Running final circuit with optimized parameters...")
+    best_params = result.x
+    if LOCAL:
+        counts = simulator.sample_counts(best_params, shots, seed=LOCAL_SEED)
+    else:
+        counts = run_on_ionq(backend, compiled, best_params)
+
+    print(f"Final counts: {counts}\n")
+
+    # Get best bitstring
+    best_bitstring = max(counts, key=counts.get)
+    x = compiled.bits_from_counts({best_bitstring: 1})[0][0]
+    best_energy = compiled.energies(x)[0]
+
+    # DISPLAY RESULTS
+    print("="*70)
+    print("SOLUTION")
+    print("="*70)
+    print(f"\nBest bitstring: {best_bitstring}")
+    print(f"Energy: {best_energy:.2f}\n")
+
+    print("Active flows:")
+    for src, dst in compiled.active_arcs(x):
         print(f"  {src} → {dst}")
-        if src in sources:
-            total_cost += cost[src]
+    inflow, outflow = compiled.inflow(x), compiled.outflow(x)
+    total_cost = sum(cost[src] * outflow[nodes.index(src)] for src in sources)
+
+    print(f"\nTotal cost: {total_cost:.2f}\n")
+
+    print("Demand checks:")
+    for sink, demand in sinks.items():
+        received = int(inflow[nodes.index(sink)])
+        status = "✓" if received >= demand else "✗"
+        print(f"  {status} {sink}: {received}/{demand}")
+
+    print("\nCapacity checks:")
+    for src in sources:
+        generated = int(outflow[nodes.index(src)])
+        status = "✓" if generated <= Gmax[src] else "✗"
+        print(f"  {status} {src}: {generated}/{Gmax[src]}")
 
-print(f"\nTotal cost: {total_cost:.2f}\n")
+    print("\n" + "="*70)
 
-print("Demand checks:")
-for sink, demand in sinks.items():
-    received = sum(best_sample[v] for v in var_names if v.endswith(f"_{sink}"))
-    status = "✓" if received >= demand else "✗"
-    print(f"  {status} {sink}: {received}/{demand}")
+    return build_payload(compiled, counts, best_bitstring, x, evaluations, backend_name)
 
-print("\nCapacity checks:")
-for src in sources:
-    generated = sum(best_sample[v] for v in var_names if v.startswith(f"f_{src}_"))
-    status = "✓" if generated <= Gmax[src] else "✗"
-    print(f"  {status} {src}: {generated}/{Gmax[src]}")
 
-print("\n" + "="*70)
\ No newline at end of file
+if __name__ == "__main__":
+    main()
@@ -1,16 +1,32 @@
 import os
-import itertools
 import time
 from dotenv import load_dotenv
 from scipy.optimize import minimize
 
+try:
+    from backend.FullModelV1 import progress
+except ImportError:  # run as a script from this folder: no progress stream
+    progress = None
+
+try:
+    from backend.solver_5node import qaoa_sim
+    from backend.solver_5node import qubo
+except ImportError:  # run as a script from this folder
+    import qaoa_sim
+    import qubo
+
 load_dotenv()
 
 IQM_SERVER_URL = os.getenv("IQM_SERVER_URL") or os.getenv("SERVER_URL")
 IQM_API_TOKEN = os.getenv("IQM_API_TOKEN") or os.getenv("RESONANCE_API_TOKEN")
 
-if not IQM_SERVER_URL or not IQM_API_TOKEN:
-    raise RuntimeError("Set IQM_SERVER_URL and IQM_API_TOKEN in .env or environment.")
+# "remote" (IQM), "local" (NumPy statevector simulator, qaoa_sim.py) or
+# "auto" (local without IQM credentials)
+QAOA_BACKEND = os.getenv("QAOA_BACKEND", "auto")
+LOCAL = QAOA_BACKEND == "local" or (QAOA_BACKEND == "auto" and not (IQM_SERVER_URL and IQM_API_TOKEN))
+LOCAL_MAXITER = 200  # exact local evaluations are cheap, so optimize fully
+REMOTE_MAXITER = 6   # every evaluation is a hardware run
+LOCAL_SEED = 0       # fixed final shot sample: a local run is reproducible (cached by key)
 
 # Problem definition
 sources = ['A', 'B']
@@ -34,90 +50,57 @@ valid_arcs = [
 
 var_names = [f"f_{i}_{j}" for (i, j) in valid_arcs]
 n_vars = len(var_names)
-print(f"Problem uses {n_vars} binary variables:\n  {var_names}")
-
-# Build QUBO with penalty terms (same idea as earlier)
-import dimod
 penalty = 8.0
 
-linear = {}
-quadratic = {}
-
-# source cost terms
-for v in var_names:
-    src = v.split('_')[1]
-    if src in sources:
-        linear[v] = linear.get(v, 0.0) + cost[src]
-
-# sink demand constraints
-for sink, demand in sinks.items():
-    incoming = [v for v in var_names if v.endswith("_" + sink)]
-    for v in incoming:
-        linear[v] = linear.get(v, 0.0) + penalty - 2.0 * penalty * demand
-    for v1, v2 in itertools.combinations(incoming, 2):
-        quadratic[tuple(sorted([v1, v2]))] = quadratic.get(tuple(sorted([v1, v2])), 0.0) + 2.0 * penalty
-
-# source generation limits
-for src in sources:
-    outgoing = [v for v in var_names if v.startswith(f"f_{src}_")]
-    gmax = Gmax[src]
-    for v in outgoing:
-        linear[v] = linear.get(v, 0.0) + penalty - 2.0 * penalty * gmax
-    for v1, v2 in itertools.combinations(outgoing, 2):
-        quadratic[tuple(sorted([v1, v2]))] = quadratic.get(tuple(sorted([v1, v2])), 0.0) + 2.0 * penalty
-
-# battery SOC balancing (pull SOC toward target_soc)
-incoming_to_bat = [v for v in var_names if v.endswith("_E")]
-outgoing_from_bat = [v for v in var_names if v.startswith("f_E_")]
-target_soc = 0.5 * battery_capacity
-
-for v in incoming_to_bat + outgoing_from_bat:
-    coeff = 1.0 if v in incoming_to_bat else -1.0
-    linear[v] = linear.get(v, 0.0) + penalty * (coeff**2) - 2.0 * penalty * target_soc * coeff
-
-for v1, v2 in itertools.combinations(incoming_to_bat + outgoing_from_bat, 2):
-    coeff1 = 1.0 if v1 in incoming_to_bat else -1.0
-    coeff2 = 1.0 if v2 in incoming_to_bat else -1.0
-    quadratic[tuple(sorted([v1, v2]))] = (
-        quadratic.get(tuple(sorted([v1, v2])), 0.0) + 2.0 * penalty * (coeff1 * coeff2)
+# qubit i = variable i (var_names[i])
+n_qubits = n_vars
+shots = 512
+
+# QAOA depth
+p = 1
+
+
+# Build QUBO with penalty terms (vectorized, qubo.py)
+def build_qubo():
+    return qubo.compile_flow_qubo(
+        nodes, valid_arcs,
+        source_cost=cost,                                   # source cost terms
+        demand=sinks,                                       # sink demand constraints
+        capacity=Gmax,                                      # source generation limits
+        battery_target={battery: 0.5 * battery_capacity},  # battery SOC balancing (pull SOC toward half capacity)
+        penalty=penalty,
     )
 
-bqm = dimod.BinaryQuadraticModel(linear, quadratic, 0.0, dimod.BINARY)
-print("Built BQM:", len(bqm.linear), "linear terms;", len(bqm.quadratic), "quadratic terms")
 
-# IQM connection
-from iqm.qiskit_iqm import IQMProvider, transpile_to_IQM
-from qiskit import QuantumCircuit
+# IQM connection (credentials are checked and qiskit imported only here)
+def connect_iqm():
+    if not IQM_SERVER_URL or not IQM_API_TOKEN:
+        raise RuntimeError("Set IQM_SERVER_URL and IQM_API_TOKEN in .env or environment.")
+    from iqm.qiskit_iqm import IQMProvider
 
-provider = IQMProvider(IQM_SERVER_URL, token=IQM_API_TOKEN)
-backend = provider.get_backend()
-print("Connected to IQM backend:", backend.name, "  qubits:", getattr(backend, "num_qubits", "unknown"))
+    provider = IQMProvider(IQM_SERVER_URL, token=IQM_API_TOKEN)
+    backend = provider.get_backend()
+    print("Connected to IQM backend:", backend.name, "  qubits:", getattr(backend, "num_qubits", "unknown"))
+    return backend
 
-# mapping var->qubit index
-var_to_idx = {v: i for i, v in enumerate(var_names)}
-n_qubits = n_vars
-shots = 512  
 
 # build QAOA-like ansatz (parametrized)
-p = 1
+def build_qaoa_circuit(compiled, params):
+    from qiskit import QuantumCircuit
 
-def build_qaoa_circuit(params):
+    rows, cols, biases = compiled.quadratic()
     gammas = params[:p]
     betas = params[p:2*p]
     qc = QuantumCircuit(n_qubits)
     qc.h(range(n_qubits))
     for level in range(p):
         gamma = float(gammas[level])
-        for (label, coeff) in [(k, v) for k, v in list(bqm.quadratic.items())]:
-            u, vv = label
-            q1 = var_to_idx[u]
-            q2 = var_to_idx[vv]
+        for q1, q2, coeff in zip(rows.tolist(), cols.tolist(), biases.tolist()):
             angle = -2.0 * gamma * coeff
             qc.cx(q1, q2)
             qc.rz(angle, q2)
             qc.cx(q1, q2)
-        for vname, coeff in bqm.linear.items():
-            q = var_to_idx[vname]
+        for q, coeff in enumerate(compiled.linear().tolist()):
             angle = -gamma * coeff
             qc.rz(angle, q)
         beta = float(betas[level])
@@ -126,60 +109,121 @@ def build_qaoa_circuit(params):
     qc.measure_all()
     return qc
 
-# energy estimation function using hardware counts
-def energy_from_counts(counts):
-    total = sum(counts.values())
-    avg = 0.0
-    for bitstr, cnt in counts.items():
-        sample = {v: int(bitstr[i]) for i, v in enumerate(var_names)}
-        e = bqm.energy(sample)
-        avg += (cnt / total) * e
-    return avg
-
-def hardware_eval(params):
-    qc = build_qaoa_circuit(params)
-    qc_iqm = transpile_to_IQM(qc, backend)
+
+def run_on_iqm(backend, compiled, params):
+    """Measurement counts of the QAOA circuit for params on the IQM backend."""
+    from iqm.qiskit_iqm import transpile_to_IQM
+
+    qc_iqm = transpile_to_IQM(build_qaoa_circuit(compiled, params), backend)
     job = backend.run(qc_iqm, shots=shots)
-    res = job.result()
-    counts = res.get_counts()
-    e = energy_from_counts(counts)
-    print("params:", [round(float(x), 4) for x in params], "-> energy:", round(e, 4))
-    return e
-
-# classical outer optimization (COBYLA)
-init = [0.5] * (2 * p)
-print("Starting optimization on IQM (this will run hardware multiple times).")
-t0 = time.time()
-res = minimize(hardware_eval, x0=init, method='COBYLA', options={'maxiter': 6})
-t1 = time.time()
-print("Optimization finished in", round(t1 - t0, 1), "s; result:", res)
-
-# final run with best params and output processing
-best_params = res.x
-final_qc = build_qaoa_circuit(best_params)
-final_qc_iqm = transpile_to_IQM(final_qc, backend)
-job = backend.run(final_qc_iqm, shots=shots)
-res_final = job.result()
-counts = res_final.get_counts()
-print("\nFinal counts:", counts)
-
-best_bs = max(counts, key=counts.get)
-best_sample = {v: int(best_bs[i]) for i, v in enumerate(var_names)}
-print("\nBest measured bitstring:", best_bs)
-print("Energy:", bqm.energy(best_sample))
-
-print("\nActive flows (1 == flow on arc):")
-for v in var_names:
-    if best_sample[v] == 1:
-        src, dst = v.split('_')[1], v.split('_')[2]
+    return job.result().get_counts()
+
+
+def node_positions():
+    """Sources, battery and sinks in three columns."""
+    columns = [("Source", sources), ("Battery", [battery]), ("Load", list(sinks))]
+    return {
+        n: {"x": 200.0 * c, "y": 150.0 * r, "type": typ}
+        for c, (typ, members) in enumerate(columns) for r, n in enumerate(members)
+    }
+
+
+def build_payload(compiled, counts, best_bs, x, evaluations, backend_name):
+    """Frontend payload: active arcs as flows, the checks as actions."""
+    flows, actions = [], []
+    for src, dst in compiled.active_arcs(x):
+        flows.append({"src": src, "dst": dst, "flow": 1})
+        actions.append(f"Flow {src} -> {dst}")
+    inflow, outflow = compiled.inflow(x), compiled.outflow(x)
+    for sink_node, demand in sinks.items():
+        received = int(inflow[nodes.index(sink_node)])
+        actions.append(f"Demand {sink_node}: {received}/{demand} {'met' if received >= demand else 'NOT met'}")
+    for s in sources:
+        gen = int(outflow[nodes.index(s)])
+        actions.append(f"Source {s}: {gen}/{Gmax[s]} {'within cap' if gen <= Gmax[s] else 'OVER cap'}")
+
+    return {
+        "ok": True,
+        "backend": backend_name,
+        "bitstring": best_bs,
+        "energy": float(compiled.energies(x)[0]),
+        "evaluations": len(evaluations),
+        "counts": counts,
+        "nodes": node_positions(),
+        "flows": flows,
+        "actions": actions,
+    }
+
+
+def main():
+    """Build the QUBO, run QAOA (IQM, or locally) and return the frontend payload."""
+    print(f"Problem uses {n_vars} binary variables:\n  {var_names}")
+    compiled = build_qubo()
+    print("Built QUBO:", n_vars, "linear terms;", len(compiled.quadratic()[0]), "quadratic terms")
+
+    # IQM connection (or simulate locally: qubit i = var_names[i]; the
+    # cost diagonal is every basis state scored as one bit matrix)
+    if LOCAL:
+        simulator = qaoa_sim.QAOASimulator(compiled.energies(qaoa_sim.basis_bits(n_qubits)))
+        backend, backend_name = None, "local statevector simulator"
+        print("Connected to local statevector simulator   qubits:", simulator.num_qubits)
+    else:
+        backend = connect_iqm()
+        backend_name = backend.name
+
+    evaluations = []  # energy per hardware_eval() call, in order
+
+    def hardware_eval(params):
+        if LOCAL:
+            e = simulator.expectation(params)  # exact, no shot noise
+        else:
+            e = compiled.energy_from_counts(run_on_iqm(backend, compiled, params))
+        print("params:", [round(float(x), 4) for x in params], "-> energy:", round(e, 4))
+        evaluations.append(e)
+        if progress is not None:
+            progress.report("energy", iteration=len(evaluations),
+                            params=[float(x) for x in params], energy=float(e))
+        return e
+
+    # classical outer optimization (COBYLA)
+    init = [0.5] * (2 * p)
+    print("Starting optimization " + ("locally." if LOCAL else "on IQM (this will run hardware multiple times)."))
+    t0 = time.time()
+    res = minimize(hardware_eval, x0=init, method='COBYLA',
+                   options={'maxiter': LOCAL_MAXITER if LOCAL else REMOTE_MAXITER})
+    t1 = time.time()
+    print("Optimization finished in", round(t1 - t0, 1), "s; result:", res)
+
+    # final run with best params and output processing
+    best_params = res.x
+    if LOCAL:
+        counts = simulator.sample_counts(best_params, shots, seed=LOCAL_SEED)
+    else:
+        counts = run_on_iqm(backend, compiled, best_params)
+    print("\nFinal counts:", counts)
+
+    best_bs = max(counts, key=counts.get)
+    x = compiled.bits_from_counts({best_bs: 1})[0][0]
+    print("\nBest measured bitstring:", best_bs)
+    print("Energy:", compiled.energies(x)[0])
+
+    print("\nActive flows (1 == flow on arc):")
+    for src, dst in compiled.active_arcs(x):
         print(f"  {src} -> {dst}")
 
-print("\nDemand checks:")
-for sink_node, demand in sinks.items():
-    received = sum(best_sample[v] for v in var_names if v.endswith("_" + sink_node))
-    print(f"  {sink_node}: {received}/{demand} {'✓' if received >= demand else '✗'}")
+    inflow, outflow = compiled.inflow(x), compiled.outflow(x)
+    print("\nDemand checks:")
+    for sink_node, demand in sinks.items():
+        received = int(inflow[nodes.index(sink_node)])
+        print(f"  {sink_node}: {received}/{demand} {'✓' if received >= demand else '✗'}")
+
+    print("\nSource caps:")
+    for s in sources:
+        gen = int(outflow[nodes.index(s)])
+        print(f"  {s}: {gen}/{Gmax[s]} {'✓' if gen <= Gmax[s] else '✗'}")
+
+    return build_payload(compiled, counts, best_bs, x, evaluations, backend_name)
+
 
-print("\nSource caps:")
-for s in sources:
-    gen = sum(best_sample[v] for v in var_names if v.startswith(f"f_{s}_"))
-    print(f"  {s}: {gen}/{Gmax[s]} {'✓' if gen <= Gmax[s] else '✗'}")
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,259 @@
+# --- Solver Registry (lazy backend plugins) ---
+#
+# Every solver backend is declared here once: its session name, label,
+# module and entry function, what it can do (capabilities) and which
+# packages it needs (requires; optional ones only for some modes, e.g.
+# the remote quantum providers). Nothing is imported on registration:
+#
+#   available()   checks the requirements with importlib.util.find_spec,
+#                 i.e. without importing gurobipy / dwave / qiskit
+#   load()        imports the module on first use and keeps it, so the
+#                 heavy imports happen once per (worker) process
+#   run()         calls the entry function of the loaded module
+#
+# The web app (settings page, GET /solvers) only ever reads the
+# declarations; the job workers (node_calc.run_job) load and run them.
+#
+# settings() returns the choices a run depends on that come from the
+# environment rather than the code (presolve on / off, local or cloud
+# sampler / QAOA backend, ...), read the way the solver module reads them
+# (.env included) but without importing it. They are part of the solution
+# cache key (node_calc.solution_key).
+#
+# Capabilities:
+#   payload        returns the frontend payload (POST /run-solver)
+#   scenarios      solves a spec for sweeps and hierarchical top levels
+#                  (FullModelV1/scenarios.SCENARIO_SOLVERS)
+#   sensitivity    payload carries duals / ranges for what-if queries
+#   duals          payload carries node prices
+#   progress       streams events over FullModelV1/progress.py
+#   multi_period   plans more than one period
+#   remote         solves on a cloud service when credentials are set
+#   offline        runs without credentials (local fallback)
+
+import functools
+import importlib
+import importlib.util
+import os
+import threading
+
+CAPABILITIES = (
+    "payload", "scenarios", "sensitivity", "duals", "progress", "multi_period", "remote", "offline",
+)
+
+
+def installed(module_name):
+    """True if module_name can be imported (parents are imported, the module itself is not)."""
+    try:
+        return importlib.util.find_spec(module_name) is not None
+    except (ImportError, ValueError):  # a missing parent package
+        return False
+
+
+@functools.lru_cache(maxsize=None)
+def load_env():
+    """Load .env once, as the solver modules do on import (no-op without python-dotenv)."""
+    try:
+        from dotenv import load_dotenv
+    except ImportError:
+        return False
+    return load_dotenv()
+
+
+def presolve_settings():
+    """GRID_PRESOLVE, as presolve.ENABLED reads it."""
+    return {"presolve": os.getenv("GRID_PRESOLVE", "on") != "off"}
+
+
+def dwave_settings(token_env):
+    """
+    Settings of a D-Wave runner: presolve and the sampler it picks,
+    "local" (annealer) for DWAVE_SAMPLER=local or auto without a token in
+    token_env, else "leap".
+    """
+    def settings():
+        load_env()
+        mode = os.getenv("DWAVE_SAMPLER", "auto")
+        local = mode == "local" or (mode == "auto" and not os.getenv(token_env))
+        return {**presolve_settings(), "sampler": "local" if local else "leap"}
+    return settings
+
+
+def qaoa_settings(*credentials):
+    """
+    Settings of a QAOA runner: the backend it picks, "local" (simulator)
+    for QAOA_BACKEND=local or auto without every credential, else
+    "remote". Each credential is a tuple of alternative env names.
+    """
+    def settings():
+        load_env()
+        mode = os.getenv("QAOA_BACKEND", "auto")
+        configured = all(any(os.getenv(name) for name in names) for names in credentials)
+        local = mode == "local" or (mode == "auto" and not configured)
+        return {"backend": "local" if local else "remote"}
+    return settings
+
+
+class SolverPlugin:
+
+    def __init__(self, name, label, module, entry, capabilities=(), requires=(), optional=(), settings=None):
+        unknown = set(capabilities) - set(CAPABILITIES)
+        if unknown:
+            raise ValueError(f"Unknown capabilities for {name!r}: {', '.join(sorted(unknown))}")
+        self.name = name
+        self.label = label
+        self.module = module
+        self.entry = entry
+        self.capabilities = frozenset(capabilities)
+        self.requires = tuple(requires)
+        self.optional = tuple(optional)
+        self._settings = settings
+        self._module = None
+        self._lock = threading.Lock()
+
+    def supports(self, capability):
+        return capability in self.capabilities
+
+    def missing(self, optional=False):
+        """Required (or optional) packages that are not installed."""
+        return [name for name in (self.optional if optional else self.requires) if not installed(name)]
+
+    def settings(self):
+        """Environment-dependent settings of a run (JSON-serializable)."""
+        return self._settings() if self._settings is not None else {}
+
+    @property
+    def available(self):
+        return not self.missing()
+
+    @property
+    def loaded(self):
+        return self._module is not None
+
+    def load(self):
+        """Import the solver module (first call only; most module names start with a digit, hence importlib)."""
+        if self._module is None:
+            with self._lock:
+                if self._module is None:
+                    self._module = importlib.import_module(self.module)
+        return self._module
+
+    def run(self, *args, **kwargs):
+        return getattr(self.load(), self.entry)(*args, **kwargs)
+
+    def to_dict(self):
+        return {
+            "name": self.name,
+            "label": self.label,
+            "capabilities": sorted(self.capabilities),
+            "requires": list(self.requires),
+            "optional": list(self.optional),
+            "available": self.available,
+            "missing": self.missing(),
+            "missing_optional": self.missing(optional=True),
+            "settings": self.settings(),
+        }
+
+
+# -----------------------------------------------------------
+# REGISTRY
+# -----------------------------------------------------------
+
+_PLUGINS = {}
+
+
+def register(plugin):
+    if plugin.name in _PLUGINS:
+        raise ValueError(f"Solver {plugin.name!r} is already registered.")
+    _PLUGINS[plugin.name] = plugin
+    return plugin
+
+
+def get(name):
+    """The plugin registered as name, or None."""
+    return _PLUGINS.get(name)
+
+
+def plugins(capability=None):
+    """Registered plugins in registration order (the settings page order), optionally filtered."""
+    return [p for p in _PLUGINS.values() if capability is None or p.supports(capability)]
+
+
+def names(capability=None):
+    return [p.name for p in plugins(capability)]
+
+
+# -----------------------------------------------------------
+# BUILT-IN BACKENDS
+# -----------------------------------------------------------
+
+register(SolverPlugin(
+    "gurobi", "Local Gurobi (CPU)",
+    "backend.FullModelV1.15KNodeGurobiLocal", "build_and_solve_gurobi_payload",
+    capabilities=("payload", "scenarios", "sensitivity", "progress", "offline"),
+    requires=("gurobipy", "numpy"),
+    settings=presolve_settings,
+))
+register(SolverPlugin(
+    "netsimplex", "Network Simplex (CPU, no license)",
+    "backend.FullModelV1.network_simplex", "build_and_solve_network_simplex",
+    capabilities=("payload", "scenarios", "offline"),
+    requires=("numpy", "scipy"),
+    settings=presolve_settings,
+))
+register(SolverPlugin(
+    "highs", "HiGHS LP (CPU, no license)",
+    "backend.FullModelV1.highs_lp", "build_and_solve_highs",
+    capabilities=("payload", "duals", "offline"),
+    requires=("numpy", "scipy"),
+    settings=presolve_settings,
+))
+register(SolverPlugin(
+    "merit", "Merit-Order Dispatch (instant, certified)",
+    "backend.FullModelV1.merit_order", "build_and_solve_merit_order",
+    capabilities=("payload", "offline"),
+    requires=("numpy", "scipy"),
+    settings=presolve_settings,  # network simplex fallback
+))
+register(SolverPlugin(
+    "colgen", "Sparse Arcs + Column Generation (large grids)",
+    "backend.FullModelV1.arc_selection", "build_and_solve_column_generation",
+    capabilities=("payload", "offline"),
+    requires=("numpy", "scipy"),
+))
+register(SolverPlugin(
+    "rolling", "Rolling Horizon 24 h (Gurobi, multi-period)",
+    "backend.FullModelV1.rolling_horizon", "build_and_solve_rolling_horizon_payload",
+    capabilities=("payload", "multi_period", "progress", "offline"),
+    requires=("gurobipy", "numpy", "scipy"),
+))
+register(SolverPlugin(
+    "cqm", "D-Wave CQM (Hybrid Cloud)",
+    "backend.FullModelV1.15KNodeCQM", "main",
+    capabilities=("payload", "progress", "remote", "offline"),
+    requires=("dimod", "dwave.system", "dotenv", "numpy", "scipy"),
+    settings=dwave_settings("DWAVE_API_KEY"),
+))
+register(SolverPlugin(
+    "nlq", "D-Wave Quantum Annealing",
+    "backend.FullModelV1.15KNodeOnNLSampler", "main",
+    capabilities=("payload", "progress", "remote", "offline"),
+    requires=("dimod", "dwave.optimization", "dwave.system", "dotenv", "numpy", "scipy"),
+    settings=dwave_settings("DWAVE_API_TOKEN"),
+))
+register(SolverPlugin(
+    "iqm", "IQM-solver",
+    "backend.solver_5node.run_5node_iqm", "main",
+    capabilities=("payload", "progress", "remote", "offline"),
+    requires=("dotenv", "numpy", "scipy"),
+    optional=("qiskit", "iqm.qiskit_iqm"),
+    settings=qaoa_settings(("IQM_SERVER_URL", "SERVER_URL"), ("IQM_API_TOKEN", "RESONANCE_API_TOKEN")),
+))
+register(SolverPlugin(
+    "ionq", "IonQ-solver",
+    "backend.solver_5node.run_5node_ionq", "main",
+    capabilities=("payload", "progress", "remote", "offline"),
+    requires=("dotenv", "numpy", "scipy"),
+    optional=("qiskit", "qiskit_ionq"),
+    settings=qaoa_settings(("IONQ_API_KEY",)),
+))
@@ -0,0 +1,233 @@
+# --- Scenario Sweeps (demand / cost sensitivity) ---
+#
+# POST /sweeps takes a scenario matrix and fans it out over the job pool
+# (backend/jobs.py), one job per scenario:
+#   {"solver": "gurobi",
+#    "matrix": {"demand_scale": [0.8, 1.0, 1.2],
+#               "cost_scale": {"Thermal": [1.0, 1.5], "Hydro": [1.0, 2.0]}}}
+# is the cartesian product (12 scenarios); "scenarios": [{...}, ...] lists
+# them explicitly instead (FullModelV1/scenarios.py has the fields).
+#
+#   - workers are long-lived and keep their Gurobi model templates, so
+#     each scenario only rewrites the balance RHS and the objective
+#   - per-solver limits and the solution cache apply per scenario;
+#     identical scenarios are solved once
+#   - rows stream as scenarios finish (/sweeps/<id>/events), and the
+#     whole sweep reads back as a columnar table: one list per column
+#     (cost, generation per source type, battery use, ...)
+
+import importlib
+import itertools
+import threading
+import time
+import uuid
+from collections import OrderedDict
+
+from backend import solver_registry
+from backend.jobs import DONE, FINISHED
+from backend.node_calc import solution_key
+
+# Scenarios per sweep
+MAX_SCENARIOS = 500
+
+# Sweeps kept for /sweeps/<id> before the oldest are forgotten
+MAX_SWEEPS = 50
+
+
+# -----------------------------------------------------------
+# SCENARIO MATRIX
+# -----------------------------------------------------------
+
+def scenario_model():
+    """FullModelV1/scenarios.py, imported on first use (it pulls in scipy, not needed at app start)."""
+    return importlib.import_module("backend.FullModelV1.scenarios")
+
+
+def scale(value, what):
+    try:
+        value = float(value)
+    except (TypeError, ValueError):
+        raise ValueError(f"{what} must be a number.") from None
+    if not value >= 0:
+        raise ValueError(f"{what} must be >= 0.")
+    return value
+
+
+def normalized_scenario(item):
+    """(name, scenario) with the fields validated and the defaults filled in."""
+    if not isinstance(item, dict):
+        raise ValueError("Each scenario must be an object.")
+
+    demand_scale = scale(item.get("demand_scale", 1.0), "demand_scale")
+    cost_scale = item.get("cost_scale") or {}
+    if not isinstance(cost_scale, dict):
+        raise ValueError("cost_scale must map source types (or ids) to factors.")
+    cost_scale = {str(key): scale(value, f"cost_scale[{key}]") for key, value in sorted(cost_scale.items())}
+    for key in cost_scale:
+        scenario_model().source_mask(scenario_model().SPEC, key)  # ValueError for unknown sources
+
+    name = item.get("name") or ", ".join(
+        [f"demand x{demand_scale:g}"] + [f"{key} cost x{value:g}" for key, value in cost_scale.items()]
+    )
+    return str(name), {"demand_scale": demand_scale, "cost_scale": cost_scale}
+
+
+def matrix_scenarios(matrix):
+    """Cartesian product of {"demand_scale": [...], "cost_scale": {key: [...]}}."""
+    if not isinstance(matrix, dict):
+        raise ValueError("matrix must be an object.")
+
+    def levels(values, what):
+        values = values if isinstance(values, list) else [values]
+        if not values:
+            raise ValueError(f"{what} needs at least one value.")
+        return values
+
+    cost_scale = matrix.get("cost_scale") or {}
+    if not isinstance(cost_scale, dict):
+        raise ValueError("matrix.cost_scale must map source types (or ids) to lists of factors.")
+    keys = sorted(cost_scale)
+    axes = [levels(matrix.get("demand_scale", [1.0]), "demand_scale")]
+    axes += [levels(cost_scale[key], f"cost_scale[{key}]") for key in keys]
+
+    return [
+        {"demand_scale": combo[0], "cost_scale": dict(zip(keys, combo[1:]))}
+        for combo in itertools.product(*axes)
+    ]
+
+
+def parse_sweep(body, default_solver="gurobi"):
+    """Request body -> (solver, [(name, scenario), ...]). Raises ValueError."""
+    if not isinstance(body, dict):
+        raise ValueError("Expected a JSON object.")
+
+    solver = body.get("solver") or default_solver
+    if solver not in solver_registry.names("scenarios"):
+        raise ValueError(f"Solver {solver!r} does not run scenarios "
+                         f"(use one of: {', '.join(solver_registry.names('scenarios'))}).")
+
+    if "scenarios" in body:
+        items = body["scenarios"]
+        if not isinstance(items, list):
+            raise ValueError("scenarios must be a list.")
+    elif "matrix" in body:
+        items = matrix_scenarios(body["matrix"])
+    else:
+        raise ValueError("Expected 'matrix' or 'scenarios'.")
+
+    if not items:
+        raise ValueError("The sweep has no scenarios.")
+    if len(items) > MAX_SCENARIOS:
+        raise ValueError(f"At most {MAX_SCENARIOS} scenarios per sweep ({len(items)} given).")
+
+    return solver, [normalized_scenario(item) for item in items]
+
+
+# -----------------------------------------------------------
+# SWEEPS
+# -----------------------------------------------------------
+
+class Sweep:
+
+    def __init__(self, solver, names, scenarios, jobs):
+        self.id = uuid.uuid4().hex
+        self.solver = solver
+        self.names = names
+        self.scenarios = scenarios
+        self.jobs = jobs  # one per scenario (shared by identical scenarios)
+        self.submitted = time.time()
+
+    def row(self, index):
+        """Result row of one scenario (its job status until it is done)."""
+        job = self.jobs[index]
+        row = {"index": index, "scenario": self.names[index], **self.scenarios[index]}
+        if job.status == DONE:
+            row.update({key: value for key, value in job.result.items() if key != "ok"})
+            row["cached"] = job.cached
+        else:
+            row["status"] = job.status
+            if job.error is not None:
+                row["error"] = job.error
+        return row
+
+    def table(self):
+        """Columnar results: {column: [value per scenario]} (None where missing)."""
+        rows = [self.row(i) for i in range(len(self.jobs))]
+        cost_keys = sorted({key for scenario in self.scenarios for key in scenario["cost_scale"]})
+
+        columns = {
+            "scenario": self.names,
+            "demand_scale": [s["demand_scale"] for s in self.scenarios],
+            **{f"cost_scale_{key}": [s["cost_scale"].get(key, 1.0) for s in self.scenarios] for key in cost_keys},
+        }
+        for column in ("status", "demand", "cost"):
+            columns[column] = [row.get(column) for row in rows]
+        for typ in scenario_model().source_types():
+            columns[f"gen_{typ}"] = [row.get("generation", {}).get(typ) for row in rows]
+        for column in ("battery_discharge", "battery_charge", "soc_pct", "solve_time_ms", "cached"):
+            columns[column] = [row.get(column) for row in rows]
+        return columns
+
+    def to_dict(self, include_table=True):
+        done = sum(1 for job in self.jobs if job.status in FINISHED)
+        data = {
+            "sweep_id": self.id,
+            "solver": self.solver,
+            "status": "done" if done == len(self.jobs) else "running",
+            "scenarios": len(self.jobs),
+            "finished": done,
+            "submitted": self.submitted,
+        }
+        if include_table:
+            table = self.table()
+            data["columns"] = list(table)  # column order (JSON objects are unordered)
+            data["table"] = table
+        return data
+
+
+class SweepManager:
+    """Sweeps on top of a JobManager; keeps the MAX_SWEEPS most recent."""
+
+    def __init__(self, jobs, max_sweeps=MAX_SWEEPS):
+        self.jobs = jobs
+        self.max_sweeps = max_sweeps
+        self._sweeps = OrderedDict()
+        self._lock = threading.Lock()
+
+    def submit(self, solver, named_scenarios, use_cache=True):
+        names = [name for name, _ in named_scenarios]
+        scenarios = [scenario for _, scenario in named_scenarios]
+        jobs = [
+            self.jobs.submit(solver, key=solution_key(solver, {"scenario": scenario}),
+                             use_cache=use_cache, params={"scenario": scenario})
+            for scenario in scenarios
+        ]
+        sweep = Sweep(solver, names, scenarios, jobs)
+        with self._lock:
+            self._sweeps[sweep.id] = sweep
+            while len(self._sweeps) > self.max_sweeps:
+                self._sweeps.popitem(last=False)
+        return sweep
+
+    def get(self, sweep_id):
+        return self._sweeps.get(sweep_id)
+
+    def wait_rows(self, sweep, seen, timeout=None):
+        """
+        Block until scenarios not in `seen` (a set of indices, updated in
+        place) have finished (or timeout). Returns their rows.
+        """
+        pending = [job for i, job in enumerate(sweep.jobs) if i not in seen]
+        done_ids = {job.id for job in self.jobs.wait_finished(pending, set(), timeout)}
+        indices = [i for i, job in enumerate(sweep.jobs) if i not in seen and job.id in done_ids]
+        seen.update(indices)
+        return [sweep.row(i) for i in indices]
+
+    def cancel(self, sweep_id):
+        """Cancel every unfinished scenario. Returns the sweep, or None if unknown."""
+        sweep = self.get(sweep_id)
+        if sweep is not None:
+            for job in sweep.jobs:
+                if job.status not in FINISHED:
+                    self.jobs.cancel(job.id)
+        return sweep
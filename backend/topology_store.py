@@ -0,0 +1,86 @@
+# --- Server-Side Topology Store (SQLite) ---
+#
+# The latest solved grid (nodes + flows) used to live in the Flask
+# session, i.e. in a signed cookie sent with every request and capped at
+# 4 KB. Now it is stored once in SQLite and the session only keeps its
+# version id.
+#
+# The version id is the SHA-256 of the response body, so it doubles as
+# the ETag: identical topologies share one row and an unchanged topology
+# is answered with 304 Not Modified. Bodies are stored gzip-compressed
+# and sent as-is to clients that accept gzip.
+
+import gzip
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+
+DEFAULT_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), ".topology_store.sqlite3")
+
+# Versions kept before the least recently saved are pruned
+MAX_VERSIONS = 500
+
+
+class TopologyStore:
+
+    def __init__(self, path=DEFAULT_PATH, max_versions=MAX_VERSIONS):
+        self.path = path
+        self.max_versions = max_versions
+        self._local = threading.local()
+
+        with self._connect() as db:
+            db.execute("PRAGMA journal_mode=WAL")
+            db.execute(
+                "CREATE TABLE IF NOT EXISTS topologies ("
+                " version TEXT PRIMARY KEY,"
+                " saved REAL NOT NULL,"
+                " body_gzip BLOB NOT NULL)"
+            )
+            db.execute("CREATE INDEX IF NOT EXISTS topologies_saved ON topologies (saved)")
+
+    @classmethod
+    def from_env(cls):
+        return cls(path=os.environ.get("TOPOLOGY_DB", DEFAULT_PATH))
+
+    def _connect(self):
+        # One connection per thread (sqlite3 connections are not shareable)
+        db = getattr(self._local, "db", None)
+        if db is None:
+            db = sqlite3.connect(self.path, timeout=10)
+            self._local.db = db
+        return db
+
+    def save(self, topology):
+        """Store a {"nodes", "flows"} topology; returns its version id."""
+        body = json.dumps({"ok": True, **topology}, sort_keys=True, separators=(",", ":")).encode()
+        version = hashlib.sha256(body).hexdigest()
+
+        with self._connect() as db:
+            updated = db.execute(
+                "UPDATE topologies SET saved = ? WHERE version = ?", (time.time(), version)
+            ).rowcount
+            if not updated:
+                db.execute(
+                    "INSERT OR REPLACE INTO topologies (version, saved, body_gzip) VALUES (?, ?, ?)",
+                    (version, time.time(), gzip.compress(body, compresslevel=6))
+                )
+                db.execute(
+                    "DELETE FROM topologies WHERE version NOT IN"
+                    " (SELECT version FROM topologies ORDER BY saved DESC LIMIT ?)",
+                    (self.max_versions,)
+                )
+        return version
+
+    def load_gzip(self, version):
+        """Gzip-compressed JSON body of `version`, or None if unknown / pruned."""
+        row = self._connect().execute(
+            "SELECT body_gzip FROM topologies WHERE version = ?", (version,)
+        ).fetchone()
+        return row[0] if row else None
+
+    def load(self, version):
+        body = self.load_gzip(version)
+        return None if body is None else json.loads(gzip.decompress(body))
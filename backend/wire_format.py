@@ -0,0 +1,122 @@
+# --- Binary Columnar Wire Format (opt-in) ---
+#
+# Solver payloads and topologies carry nodes as a dict of dicts and flows
+# as a list of {"src", "dst", "flow"} objects; at 15k nodes that is
+# megabytes of repeated keys. With ?format=binary the same data is sent as
+# a node-name dictionary plus packed little-endian columns:
+#
+#   offset  content
+#   0       b"GRDB"                       magic
+#   4       uint32  version (1)
+#   8       uint32  header length H (padding included)
+#   12      header  UTF-8 JSON: {"names", "types", "num_nodes", "num_flows",
+#                                "payload": every other payload field},
+#                   padded with spaces (JSON whitespace) so 12 + H is a
+#                   multiple of 4
+#           float32 node_x[num_nodes]       (NaN if missing)
+#           float32 node_y[num_nodes]
+#           int32   node_type[num_nodes]    index into "types" (-1 if missing)
+#           int32   flow_src[num_flows]     index into "names"
+#           int32   flow_dst[num_flows]
+#           float32 flow_value[num_flows]
+#
+# names[:num_nodes] are the node keys in payload order; flow endpoints that
+# are not drawn as nodes follow. The body is gzip-compressed on the wire
+# (Content-Encoding), so the browser inflates it before the typed-array
+# decoder in static/js/script.js sees it. JSON stays the default.
+
+import json
+import struct
+
+import numpy as np
+
+MAGIC = b"GRDB"
+VERSION = 1
+MIMETYPE = "application/vnd.grid-columnar"
+
+_PREFIX = struct.Struct("<4sII")
+
+
+def encode_grid_binary(payload):
+    """Pack a payload with "nodes" / "flows" into the columnar format."""
+    nodes = payload.get("nodes") or {}
+    flows = payload.get("flows") or []
+
+    names = list(nodes)
+    index = {name: i for i, name in enumerate(names)}
+    types = {}
+
+    node_x = np.full(len(names), np.nan, dtype="<f4")
+    node_y = np.full(len(names), np.nan, dtype="<f4")
+    node_type = np.full(len(names), -1, dtype="<i4")
+    for i, node in enumerate(nodes.values()):
+        if node.get("x") is not None:
+            node_x[i] = node["x"]
+        if node.get("y") is not None:
+            node_y[i] = node["y"]
+        if node.get("type") is not None:
+            node_type[i] = types.setdefault(node["type"], len(types))
+
+    def name_index(name):
+        i = index.get(name)
+        if i is None:
+            i = index[name] = len(names)
+            names.append(name)
+        return i
+
+    flow_src = np.fromiter((name_index(f["src"]) for f in flows), dtype="<i4", count=len(flows))
+    flow_dst = np.fromiter((name_index(f["dst"]) for f in flows), dtype="<i4", count=len(flows))
+    flow_value = np.fromiter((f["flow"] for f in flows), dtype="<f4", count=len(flows))
+
+    header = json.dumps({
+        "names": names,
+        "types": list(types),
+        "num_nodes": len(nodes),
+        "num_flows": len(flows),
+        "payload": {k: v for k, v in payload.items() if k not in ("nodes", "flows")},
+    }, separators=(",", ":")).encode()
+    header += b" " * (-(_PREFIX.size + len(header)) % 4)
+
+    return b"".join([
+        _PREFIX.pack(MAGIC, VERSION, len(header)), header,
+        node_x.tobytes(), node_y.tobytes(), node_type.tobytes(),
+        flow_src.tobytes(), flow_dst.tobytes(), flow_value.tobytes(),
+    ])
+
+
+def decode_grid_binary(data):
+    """Inverse of encode_grid_binary() (for Python clients and checks)."""
+    magic, version, header_length = _PREFIX.unpack_from(data)
+    if magic != MAGIC or version != VERSION:
+        raise ValueError("Not a grid columnar payload (version %d)." % version)
+
+    offset = _PREFIX.size + header_length
+    header = json.loads(data[_PREFIX.size:offset])
+    names, types = header["names"], header["types"]
+    n, f = header["num_nodes"], header["num_flows"]
+
+    def column(dtype, count):
+        nonlocal offset
+        values = np.frombuffer(data, dtype=dtype, count=count, offset=offset)
+        offset += values.nbytes
+        return values
+
+    node_x, node_y, node_type = column("<f4", n), column("<f4", n), column("<i4", n)
+    flow_src, flow_dst, flow_value = column("<i4", f), column("<i4", f), column("<f4", f)
+
+    nodes = {}
+    for i in range(n):
+        node = {}
+        if not np.isnan(node_x[i]):
+            node["x"] = float(node_x[i])
+        if not np.isnan(node_y[i]):
+            node["y"] = float(node_y[i])
+        if node_type[i] >= 0:
+            node["type"] = types[node_type[i]]
+        nodes[names[i]] = node
+
+    flows = [
+        {"src": names[s], "dst": names[d], "flow": float(v)}
+        for s, d, v in zip(flow_src.tolist(), flow_dst.tolist(), flow_value.tolist())
+    ]
+    return {**header["payload"], "nodes": nodes, "flows": flows}
@@ -0,0 +1,112 @@
+# --- D-Wave CQM build benchmark ---
+#
+# Compares the per-variable loop builder (one dimod.Integer per arc,
+# quicksum per node) against the bulk builder (variables in runs, each
+# constraint from label / coefficient lists) for growing numbers of TS
+# nodes: build time and peak memory (RSS growth during the build; dimod
+# allocates in C++, so tracemalloc would miss most of it). Every build
+# runs in a fresh process. Where both builders run, the CQMs are checked
+# to be identical (variables, order, bounds, objective, constraints).
+#
+# Usage (from the repository root):
+#   python benchmarks/bench_cqm_build.py
+#   python benchmarks/bench_cqm_build.py --sizes 25 250 2500 --legacy-max 250
+
+import argparse
+import importlib
+import multiprocessing
+import resource
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+DEFAULT_SIZES = [25, 250, 2500]
+
+MODULE = "backend.FullModelV1.15KNodeCQM"
+
+
+def build_spec(num_ts_nodes):
+    from backend.FullModelV1.grid_spec import build_grid_spec
+    solver = importlib.import_module(MODULE)
+    spec = build_grid_spec(num_ts_nodes - solver.NUM_SOURCES - solver.NUM_BATTERIES)
+    spec.incidence_matrix()  # shared input, not part of the build
+    return solver, spec
+
+
+def measure(builder_name, num_ts_nodes, conn):
+    """Child process: build once, send (seconds, peak MB above the pre-build RSS, num variables)."""
+    solver, spec = build_spec(num_ts_nodes)
+    builder = getattr(solver, builder_name)
+
+    before = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    t0 = time.perf_counter()
+    cqm, _ = builder(spec)
+    elapsed = time.perf_counter() - t0
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss  # KiB on Linux
+    conn.send((elapsed, (peak - before) / 1024, len(cqm.variables)))
+
+
+def run(builder_name, num_ts_nodes):
+    ctx = multiprocessing.get_context("spawn")
+    recv, send = ctx.Pipe(duplex=False)
+    process = ctx.Process(target=measure, args=(builder_name, num_ts_nodes, send))
+    process.start()
+    send.close()
+    try:
+        result = recv.recv()
+    except EOFError:  # the child died, e.g. killed for running out of memory
+        result = None
+    process.join()
+    return result
+
+
+def identical(a, b):
+    """Same variables (order, vartype, bounds), objective and constraints (term order included)."""
+    if list(a.variables) != list(b.variables):
+        return False
+    for v in a.variables:
+        if (a.vartype(v), a.lower_bound(v), a.upper_bound(v)) != (b.vartype(v), b.lower_bound(v), b.upper_bound(v)):
+            return False
+    if not a.is_equal(b) or list(a.constraints) != list(b.constraints):
+        return False
+    return all(
+        list(c.lhs.linear.items()) == list(b.constraints[label].lhs.linear.items())
+        for label, c in a.constraints.items()
+    )
+
+
+def check_identical(num_ts_nodes):
+    solver, spec = build_spec(num_ts_nodes)
+    return identical(solver.build_large_cqm(spec)[0], solver.build_large_cqm_loop(spec)[0])
+
+
+def main():
+    parser = argparse.ArgumentParser(description="D-Wave CQM build benchmark")
+    parser.add_argument("--sizes", type=int, nargs="+", default=DEFAULT_SIZES,
+                        help="TS node counts to benchmark")
+    parser.add_argument("--legacy-max", type=int, default=250,
+                        help="largest TS node count to run the loop builder for")
+    args = parser.parse_args()
+
+    print(f"{'TS nodes':>9} {'variables':>11} {'loop [s]':>9} {'loop [MB]':>10} "
+          f"{'bulk [s]':>9} {'bulk [MB]':>10} {'speedup':>8} {'identical':>10}")
+    for n in args.sizes:
+        bulk = run("build_large_cqm", n)
+        if bulk is None:
+            print(f"{n:>9,}   build failed (out of memory?)")
+            continue
+        t_bulk, mem_bulk, num_vars = bulk
+        if n <= args.legacy_max:
+            t_loop, mem_loop, _ = run("build_large_cqm_loop", n) or (float("nan"),) * 3
+            same = "yes" if check_identical(n) else "NO"
+            print(f"{n:>9,} {num_vars:>11,} {t_loop:>9.3f} {mem_loop:>10.1f} "
+                  f"{t_bulk:>9.3f} {mem_bulk:>10.1f} {t_loop / t_bulk:>7.1f}x {same:>10}")
+        else:
+            print(f"{n:>9,} {num_vars:>11,} {'-':>9} {'-':>10} "
+                  f"{t_bulk:>9.3f} {mem_bulk:>10.1f} {'-':>8} {'-':>10}")
+
+
+if __name__ == "__main__":
+    main()
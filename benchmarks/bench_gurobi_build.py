@@ -0,0 +1,60 @@
+# --- Gurobi model build-time benchmark ---
+#
+# Compares the per-variable loop builder against the matrix-form builder
+# (sparse incidence matrix + addMVar) for growing numbers of TS nodes.
+# Only model construction is timed (up to model.update()), not the solve.
+#
+# Usage (from the repository root):
+#   python benchmarks/bench_gurobi_build.py
+#   python benchmarks/bench_gurobi_build.py --sizes 25 250 2500 5000 --legacy-max 1000
+
+import argparse
+import gc
+import importlib
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from backend.FullModelV1.grid_spec import build_grid_spec
+
+solver = importlib.import_module("backend.FullModelV1.15KNodeGurobiLocal")
+
+DEFAULT_SIZES = [25, 100, 250, 1000, 2500, 5000]
+
+
+def time_build(builder, num_ts_nodes):
+    spec = build_grid_spec(num_ts_nodes - solver.NUM_SOURCES - solver.NUM_BATTERIES)
+    gc.collect()
+    t0 = time.perf_counter()
+    model = builder(spec)[0]
+    model.update()
+    elapsed = time.perf_counter() - t0
+    num_vars = model.NumVars
+    model.dispose()
+    return elapsed, num_vars
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Gurobi model build-time benchmark")
+    parser.add_argument("--sizes", type=int, nargs="+", default=DEFAULT_SIZES,
+                        help="TS node counts to benchmark")
+    parser.add_argument("--legacy-max", type=int, default=250,
+                        help="largest TS node count to run the loop builder for")
+    args = parser.parse_args()
+
+    print(f"{'TS nodes':>9} {'arcs':>12} {'loop [s]':>10} {'matrix [s]':>11} {'speedup':>8}")
+    for n in args.sizes:
+        t_matrix, num_vars = time_build(solver.build_gurobi_model, n)
+        num_arcs = num_vars - solver.NUM_SOURCES - solver.NUM_BATTERIES
+
+        if n <= args.legacy_max:
+            t_loop, _ = time_build(solver.build_gurobi_model_loop, n)
+            print(f"{n:>9,} {num_arcs:>12,} {t_loop:>10.3f} {t_matrix:>11.3f} {t_loop / t_matrix:>7.1f}x")
+        else:
+            print(f"{n:>9,} {num_arcs:>12,} {'-':>10} {t_matrix:>11.3f} {'-':>8}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,3 +1,466 @@
+// ==========================================================================
+// BINARY COLUMNAR PAYLOADS (?format=binary, see backend/wire_format.py)
+// ==========================================================================
+// Typed-array views straight over the response buffer. `grid` holds the
+// columns; `nodes` / `flows` build the classic object shapes on first use.
+const GRID_MAGIC = 0x42445247;  // "GRDB" little-endian
+
+function decodeGridBinary(buffer) {
+    const view = new DataView(buffer);
+    if (view.getUint32(0, true) !== GRID_MAGIC || view.getUint32(4, true) !== 1) {
+        throw new Error("Not a grid columnar payload.");
+    }
+    const headerLength = view.getUint32(8, true);
+    const header = JSON.parse(new TextDecoder().decode(new Uint8Array(buffer, 12, headerLength)));
+    const n = header.num_nodes, f = header.num_flows;
+
+    let offset = 12 + headerLength;
+    const column = (Type, count) => {
+        const values = new Type(buffer, offset, count);
+        offset += values.byteLength;
+        return values;
+    };
+
+    const grid = {
+        names: header.names,
+        types: header.types,
+        x: column(Float32Array, n),
+        y: column(Float32Array, n),
+        type: column(Int32Array, n),
+        src: column(Int32Array, f),
+        dst: column(Int32Array, f),
+        flow: column(Float32Array, f),
+    };
+
+    let nodes = null, flows = null;
+    return Object.defineProperties({ ...header.payload, grid }, {
+        nodes: {
+            enumerable: true,
+            get() {
+                if (!nodes) {
+                    nodes = {};
+                    for (let i = 0; i < n; i++) {
+                        const node = {};
+                        if (!Number.isNaN(grid.x[i])) node.x = grid.x[i];
+                        if (!Number.isNaN(grid.y[i])) node.y = grid.y[i];
+                        if (grid.type[i] >= 0) node.type = grid.types[grid.type[i]];
+                        nodes[grid.names[i]] = node;
+                    }
+                }
+                return nodes;
+            },
+        },
+        flows: {
+            enumerable: true,
+            get() {
+                if (!flows) {
+                    flows = new Array(f);
+                    for (let i = 0; i < f; i++) {
+                        flows[i] = { src: grid.names[grid.src[i]], dst: grid.names[grid.dst[i]], flow: grid.flow[i] };
+                    }
+                }
+                return flows;
+            },
+        },
+    });
+}
+
+// GET `url` in the binary format; JSON error replies are passed through
+async function fetchGridBinary(url) {
+    const res = await fetch(url + (url.includes("?") ? "&" : "?") + "format=binary");
+    if ((res.headers.get("Content-Type") || "").includes("json")) return res.json();
+    return decodeGridBinary(await res.arrayBuffer());
+}
+
+// ==========================================================================
+// CANVAS GRID RENDERER (large grids)
+// ==========================================================================
+// The SVG renderer creates elements and listeners per node, which stops
+// being usable beyond a few thousand nodes. The canvas renderer draws
+// straight from typed arrays:
+//   - viewport culling: only nodes / edges inside the view are drawn
+//   - level of detail: labels only when zoomed in with few nodes on
+//     screen; one clustered dot per screen cell when zoomed out
+//   - tooltip hit testing through a quadtree instead of per-node listeners
+//   - redraws coalesced into one requestAnimationFrame
+const CANVAS_MIN_NODES = 1000;   // "auto" switches to canvas from this many nodes
+const LABEL_MIN_SCALE = 1.5;     // labels only at this zoom or closer...
+const LABEL_MAX_NODES = 1500;    // ...with at most this many nodes on screen
+const MAX_DOTS = 6000;           // more nodes on screen -> clustered dots
+const CLUSTER_CELL_PX = 8;       // cluster cell size on screen
+const HIT_RADIUS_PX = 8;
+const ZOOM_STEP = 1.1;
+
+// Renderer setting (Settings page): "auto", "svg" or "canvas"
+function useCanvasRenderer(numNodes) {
+    const mode = localStorage.getItem("gridRenderer") || "auto";
+    return mode === "canvas" || (mode === "auto" && numNodes >= CANVAS_MIN_NODES);
+}
+
+function gridNodeColor(type) {
+    switch (type) {
+        case "Solar": return "#f4d03f";
+        case "Wind": return "#5dade2";
+        case "Nuclear": return "#a569bd";
+        case "Thermal": return "#e67e22";
+        case "Hydro": return "#2e86c1";
+        case "Battery": return "#ff9800";
+        case "Load": return "#7f8c8d";
+        case "Bus": return "#58d68d";
+        case "Railway": return "#16a085";
+        case "Factory": return "#c0392b";
+        case "Residential": return "#7f8c8d";
+        default: return "#000";
+    }
+}
+
+// {name: {x, y, type}} -> the column layout of decodeGridBinary().grid
+function gridColumns(nodes) {
+    const names = Object.keys(nodes);
+    const types = [], typeIndex = new Map();
+    const x = new Float32Array(names.length);
+    const y = new Float32Array(names.length);
+    const type = new Int32Array(names.length);
+
+    names.forEach((name, i) => {
+        const n = nodes[name];
+        x[i] = n.x;
+        y[i] = n.y;
+        if (!typeIndex.has(n.type)) {
+            typeIndex.set(n.type, types.length);
+            types.push(n.type);
+        }
+        type[i] = typeIndex.get(n.type);
+    });
+    return { names, types, x, y, type };
+}
+
+// [[src, dst], ...] by node name -> {src, dst} index columns
+function edgeColumns(grid, pairs) {
+    const index = new Map(grid.names.map((name, i) => [name, i]));
+    const src = [], dst = [];
+    for (const [s, d] of pairs || []) {
+        if (index.has(s) && index.has(d)) {
+            src.push(index.get(s));
+            dst.push(index.get(d));
+        }
+    }
+    return { src: Int32Array.from(src), dst: Int32Array.from(dst) };
+}
+
+// Static point quadtree over node positions (range queries + nearest node)
+class PointQuadtree {
+
+    constructor(x, y, capacity = 16) {
+        this.x = x;
+        this.y = y;
+        this.capacity = capacity;
+
+        let x0 = Infinity, y0 = Infinity, x1 = -Infinity, y1 = -Infinity;
+        const items = [];
+        for (let i = 0; i < x.length; i++) {
+            if (Number.isNaN(x[i]) || Number.isNaN(y[i])) continue;
+            x0 = Math.min(x0, x[i]); x1 = Math.max(x1, x[i]);
+            y0 = Math.min(y0, y[i]); y1 = Math.max(y1, y[i]);
+            items.push(i);
+        }
+        this.bounds = items.length ? { x0, y0, x1, y1 } : { x0: 0, y0: 0, x1: 1, y1: 1 };
+        this.root = this.build(Int32Array.from(items), x0, y0, x1, y1, 0);
+    }
+
+    build(items, x0, y0, x1, y1, depth) {
+        const node = { x0, y0, x1, y1, items: null, children: null };
+        if (items.length <= this.capacity || depth >= 20) {
+            node.items = items;
+            return node;
+        }
+
+        const mx = (x0 + x1) / 2, my = (y0 + y1) / 2;
+        const parts = [[], [], [], []];
+        for (const i of items) {
+            parts[(this.x[i] >= mx ? 1 : 0) + (this.y[i] >= my ? 2 : 0)].push(i);
+        }
+        node.children = [
+            this.build(Int32Array.from(parts[0]), x0, y0, mx, my, depth + 1),
+            this.build(Int32Array.from(parts[1]), mx, y0, x1, my, depth + 1),
+            this.build(Int32Array.from(parts[2]), x0, my, mx, y1, depth + 1),
+            this.build(Int32Array.from(parts[3]), mx, my, x1, y1, depth + 1),
+        ];
+        return node;
+    }
+
+    // Indices of the nodes inside [x0, x1] x [y0, y1], appended to `out`
+    query(x0, y0, x1, y1, out = []) {
+        const stack = [this.root];
+        while (stack.length) {
+            const node = stack.pop();
+            if (node.x1 < x0 || node.x0 > x1 || node.y1 < y0 || node.y0 > y1) continue;
+            if (node.children) {
+                stack.push(...node.children);
+                continue;
+            }
+            const inside = node.x0 >= x0 && node.x1 <= x1 && node.y0 >= y0 && node.y1 <= y1;
+            for (const i of node.items) {
+                if (inside || (this.x[i] >= x0 && this.x[i] <= x1 && this.y[i] >= y0 && this.y[i] <= y1)) {
+                    out.push(i);
+                }
+            }
+        }
+        return out;
+    }
+
+    // Nearest node within `radius` of (px, py), or -1
+    nearest(px, py, radius) {
+        let best = -1, bestDist = radius * radius;
+        for (const i of this.query(px - radius, py - radius, px + radius, py + radius)) {
+            const d = (this.x[i] - px) ** 2 + (this.y[i] - py) ** 2;
+            if (d <= bestDist) {
+                best = i;
+                bestDist = d;
+            }
+        }
+        return best;
+    }
+}
+
+// Draw `grid` (gridColumns() / decodeGridBinary().grid) with `edges`
+// ({src, dst} index columns) into `container`. Returns {redraw, destroy}.
+function renderGridCanvas(container, grid, edges, colorOf = gridNodeColor) {
+    const n = grid.x.length;
+    const tree = new PointQuadtree(grid.x, grid.y);
+    const typeColors = grid.types.map(colorOf);
+    const clusterLevels = new Map();
+
+    container.innerHTML = "";
+    container.style.position = "relative";
+
+    const canvas = document.createElement("canvas");
+    canvas.style.width = "100%";
+    canvas.style.height = "100%";
+    canvas.style.display = "block";
+    canvas.style.cursor = "grab";
+    container.appendChild(canvas);
+    const ctx = canvas.getContext("2d");
+
+    const tooltip = document.createElement("div");
+    tooltip.className = "grid-tooltip";
+    container.appendChild(tooltip);
+
+    // screen = world * scale + (tx, ty), in CSS pixels
+    const view = { scale: 1, tx: 0, ty: 0 };
+    let width = 0, height = 0, frame = 0, fitted = false;
+
+    function fit() {
+        const b = tree.bounds, pad = 40;
+        view.scale = Math.min(
+            (width - 2 * pad) / Math.max(b.x1 - b.x0, 1),
+            (height - 2 * pad) / Math.max(b.y1 - b.y0, 1)
+        );
+        view.tx = (width - (b.x1 - b.x0) * view.scale) / 2 - b.x0 * view.scale;
+        view.ty = (height - (b.y1 - b.y0) * view.scale) / 2 - b.y0 * view.scale;
+    }
+
+    function resize() {
+        const dpr = window.devicePixelRatio || 1;
+        width = canvas.clientWidth;
+        height = canvas.clientHeight;
+        canvas.width = Math.round(width * dpr);
+        canvas.height = Math.round(height * dpr);
+        ctx.setTransform(dpr, 0, 0, dpr, 0, 0);
+        if (!fitted && width && height) {
+            fit();
+            fitted = true;
+        }
+        redraw();
+    }
+
+    function redraw() {
+        if (!frame) frame = requestAnimationFrame(draw);
+    }
+
+    // Clusters for a power-of-two world cell size, built once per level
+    function clusters(level) {
+        if (clusterLevels.has(level)) return clusterLevels.get(level);
+
+        const cell = 2 ** level, cells = new Map();
+        const cx = [], cy = [], count = [], type = [];
+        for (let i = 0; i < n; i++) {
+            if (Number.isNaN(grid.x[i])) continue;
+            const key = Math.floor(grid.x[i] / cell) * 1e7 + Math.floor(grid.y[i] / cell);
+            let c = cells.get(key);
+            if (c === undefined) {
+                c = count.length;
+                cells.set(key, c);
+                cx.push(0); cy.push(0); count.push(0); type.push(grid.type[i]);
+            }
+            cx[c] += grid.x[i];
+            cy[c] += grid.y[i];
+            count[c] += 1;
+        }
+        for (let c = 0; c < count.length; c++) {
+            cx[c] /= count[c];
+            cy[c] /= count[c];
+        }
+
+        const result = { x: Float32Array.from(cx), y: Float32Array.from(cy), count: Int32Array.from(count), type };
+        clusterLevels.set(level, result);
+        return result;
+    }
+
+    function draw() {
+        frame = 0;
+        const { scale, tx, ty } = view;
+        ctx.clearRect(0, 0, width, height);
+
+        // Visible world rectangle (plus a node radius of slack)
+        const margin = 12 / scale;
+        const wx0 = -tx / scale - margin, wy0 = -ty / scale - margin;
+        const wx1 = (width - tx) / scale + margin, wy1 = (height - ty) / scale + margin;
+
+        // ---- EDGES (one path, culled by bounding box) ----
+        if (edges && edges.src.length) {
+            ctx.beginPath();
+            for (let e = 0; e < edges.src.length; e++) {
+                const s = edges.src[e], d = edges.dst[e];
+                if (s >= n || d >= n) continue;
+                const x0 = grid.x[s], y0 = grid.y[s], x1 = grid.x[d], y1 = grid.y[d];
+                if (Math.max(x0, x1) < wx0 || Math.min(x0, x1) > wx1
+                    || Math.max(y0, y1) < wy0 || Math.min(y0, y1) > wy1) continue;
+                ctx.moveTo(x0 * scale + tx, y0 * scale + ty);
+                ctx.lineTo(x1 * scale + tx, y1 * scale + ty);
+            }
+            ctx.strokeStyle = "#999";
+            ctx.globalAlpha = edges.src.length > MAX_DOTS ? 0.35 : 1;
+            ctx.lineWidth = Math.max(0.5, Math.min(3, 3 * scale));
+            ctx.stroke();
+            ctx.globalAlpha = 1;
+        }
+
+        const visible = tree.query(wx0, wy0, wx1, wy1);
+
+        // ---- ZOOMED OUT: clustered dots ----
+        if (visible.length > MAX_DOTS) {
+            const level = Math.ceil(Math.log2(CLUSTER_CELL_PX / scale));
+            const c = clusters(level);
+            const byType = grid.types.map(() => new Path2D());
+            for (let k = 0; k < c.count.length; k++) {
+                if (c.x[k] < wx0 || c.x[k] > wx1 || c.y[k] < wy0 || c.y[k] > wy1) continue;
+                const r = Math.min(CLUSTER_CELL_PX / 2, 1.5 + Math.log2(c.count[k]) / 2);
+                const sx = c.x[k] * scale + tx, sy = c.y[k] * scale + ty;
+                byType[c.type[k]].rect(sx - r, sy - r, 2 * r, 2 * r);
+            }
+            byType.forEach((path, t) => {
+                ctx.fillStyle = typeColors[t];
+                ctx.fill(path);
+            });
+            return;
+        }
+
+        // ---- NODES (one path per type) ----
+        const r = Math.max(2, Math.min(12, 12 * scale));
+        const byType = grid.types.map(() => new Path2D());
+        for (const i of visible) {
+            const sx = grid.x[i] * scale + tx, sy = grid.y[i] * scale + ty;
+            if (r < 4) {
+                byType[grid.type[i]].rect(sx - r, sy - r, 2 * r, 2 * r);
+            } else {
+                byType[grid.type[i]].moveTo(sx + r, sy);
+                byType[grid.type[i]].arc(sx, sy, r, 0, 2 * Math.PI);
+            }
+        }
+        ctx.strokeStyle = "#222";
+        ctx.lineWidth = 2;
+        byType.forEach((path, t) => {
+            ctx.fillStyle = typeColors[t];
+            ctx.fill(path);
+            if (r >= 4) ctx.stroke(path);
+        });
+
+        // ---- LABELS (zoomed in only) ----
+        if (scale >= LABEL_MIN_SCALE && visible.length <= LABEL_MAX_NODES) {
+            ctx.fillStyle = getComputedStyle(container).color || "#000";
+            ctx.font = "12px sans-serif";
+            for (const i of visible) {
+                ctx.fillText(grid.names[i], grid.x[i] * scale + tx + r + 6, grid.y[i] * scale + ty + 4);
+            }
+        }
+    }
+
+    // ---- PAN + ZOOM ----
+    let panning = null;
+
+    function onMouseDown(e) {
+        panning = { x: e.clientX, y: e.clientY };
+        canvas.style.cursor = "grabbing";
+        tooltip.style.display = "none";
+    }
+
+    function onMouseMove(e) {
+        if (panning) {
+            view.tx += e.clientX - panning.x;
+            view.ty += e.clientY - panning.y;
+            panning = { x: e.clientX, y: e.clientY };
+            redraw();
+            return;
+        }
+        if (e.target !== canvas) return;
+
+        // Tooltip: nearest node under the cursor (quadtree)
+        const i = tree.nearest(
+            (e.offsetX - view.tx) / view.scale,
+            (e.offsetY - view.ty) / view.scale,
+            Math.max(HIT_RADIUS_PX, 12 * Math.min(view.scale, 1)) / view.scale
+        );
+        if (i < 0) {
+            tooltip.style.display = "none";
+            return;
+        }
+        tooltip.style.display = "block";
+        tooltip.style.left = (e.offsetX + 15) + "px";
+        tooltip.style.top = (e.offsetY + 15) + "px";
+        tooltip.innerHTML = `
+            <b>${grid.names[i]}</b><br>
+            Type: ${grid.types[grid.type[i]]}<br>
+            Position: (${+grid.x[i].toFixed(1)}, ${+grid.y[i].toFixed(1)})
+        `;
+    }
+
+    function onMouseUp() {
+        panning = null;
+        canvas.style.cursor = "grab";
+    }
+
+    function onWheel(e) {
+        e.preventDefault();
+        const z = e.deltaY < 0 ? ZOOM_STEP : 1 / ZOOM_STEP;
+        view.tx = e.offsetX - (e.offsetX - view.tx) * z;
+        view.ty = e.offsetY - (e.offsetY - view.ty) * z;
+        view.scale *= z;
+        redraw();
+    }
+
+    canvas.addEventListener("mousedown", onMouseDown);
+    canvas.addEventListener("mouseleave", () => { tooltip.style.display = "none"; });
+    canvas.addEventListener("wheel", onWheel, { passive: false });
+    window.addEventListener("mousemove", onMouseMove);
+    window.addEventListener("mouseup", onMouseUp);
+
+    const observer = new ResizeObserver(resize);
+    observer.observe(container);
+    resize();
+
+    return {
+        redraw,
+        destroy() {
+            observer.disconnect();
+            window.removeEventListener("mousemove", onMouseMove);
+            window.removeEventListener("mouseup", onMouseUp);
+            if (frame) cancelAnimationFrame(frame);
+            container.innerHTML = "";
+        },
+    };
+}
+
 document.addEventListener("DOMContentLoaded", () => {
 
     // ======================================================================
@@ -60,6 +523,15 @@ document.addEventListener("DOMContentLoaded", () => {
         });
     }
 
+    // Grid map renderer (see CANVAS GRID RENDERER above)
+    const rendererSelector = document.getElementById("rendererSelector");
+    if (rendererSelector) {
+        rendererSelector.value = localStorage.getItem("gridRenderer") || "auto";
+        rendererSelector.addEventListener("change", () => {
+            localStorage.setItem("gridRenderer", rendererSelector.value);
+        });
+    }
+
  // ======================================================================
 // 5. SOLVER SELECTOR — load current solver from data attribute if needed
 // ======================================================================
@@ -82,6 +554,7 @@ if (solverSelector) {
     // 6. EXECUTE SOLVER BUTTON
     // ======================================================================
     const execBtn = document.getElementById("executeBtn");
+    const cancelBtn = document.getElementById("cancelBtn");
     const execOutput = document.getElementById("execOutput");
     const mapBox = document.getElementById("gridMap");
 
@@ -89,12 +562,101 @@ if (solverSelector) {
     const batBody = document.getElementById("batBody");
     const summaryList = document.getElementById("summaryList");
 
+    const POLL_MS = 500;
+    let currentJob = null;
+
+    const sleep = (ms) => new Promise(resolve => setTimeout(resolve, ms));
+
+    // Latest progress line(s) from the event stream, shown under the job status
+    let progressLines = [];
+
+    function showProgress(line, append = false) {
+        progressLines = append ? progressLines.concat(line).slice(-8) : [line];
+    }
+
+    // Live solver events (Server-Sent Events): update the tables as soon
+    // as the solver has an incumbent, before the final result arrives
+    function followJobEvents(jobId) {
+        if (!window.EventSource) return null;
+        const source = new EventSource(`/jobs/${jobId}/events`);
+
+        source.addEventListener("status", (e) => {
+            showProgress(JSON.parse(e.data).message);
+        });
+
+        source.addEventListener("incumbent", (e) => {
+            const d = JSON.parse(e.data);
+            const gap = d.gap === null ? "-" : `${(d.gap * 100).toFixed(2)}%`;
+            showProgress(`Incumbent $${Math.round(d.objective).toLocaleString()}`
+                + ` (gap ${gap}, ${d.nodes.toLocaleString()} nodes)`);
+            renderGenerators(d.generators);
+            renderBatteries(d.batteries);
+            renderSummary(d.summary);
+        });
+
+        source.addEventListener("bound", (e) => {
+            const d = JSON.parse(e.data);
+            const best = d.incumbent === null ? "none yet" : `$${Math.round(d.incumbent).toLocaleString()}`;
+            const gap = d.gap === null ? "-" : `${(d.gap * 100).toFixed(2)}%`;
+            showProgress(`Best ${best}, bound $${Math.round(d.bound).toLocaleString()},`
+                + ` gap ${gap}, ${d.nodes.toLocaleString()} nodes`);
+        });
+
+        source.addEventListener("energy", (e) => {
+            const d = JSON.parse(e.data);
+            showProgress(`QAOA iteration ${d.iteration}: energy ${d.energy.toFixed(4)}`, true);
+        });
+
+        source.addEventListener("end", () => source.close());
+        return source;
+    }
+
+    // Submit the job, then poll /jobs/<id> until it finishes
+    async function runSolverJob() {
+        const res = await fetch("/run-solver", { method: "POST" });
+        let job = await res.json();
+        if (!job.ok) return job;
+
+        currentJob = job.job_id;
+        progressLines = [];
+        if (cancelBtn) cancelBtn.style.display = "inline-block";
+        const events = followJobEvents(job.job_id);
+
+        try {
+            while (job.status === "queued" || job.status === "running") {
+                const since = job.started || job.submitted;
+                const secs = Math.max(0, Date.now() / 1000 - since).toFixed(0);
+                execOutput.textContent = (job.status === "queued"
+                    ? `Queued (${secs}s)...`
+                    : `Running solver (${secs}s)...`)
+                    + progressLines.map(line => "\n" + line).join("");
+
+                await sleep(POLL_MS);
+                job = await (await fetch(`/jobs/${job.job_id}?result=0`)).json();
+                if (!job.ok) return job;
+            }
+        } finally {
+            currentJob = null;
+            if (events) events.close();
+            if (cancelBtn) cancelBtn.style.display = "none";
+        }
+
+        if (job.status === "done") return job.result || fetchGridBinary(`/jobs/${job.job_id}/result`);
+        if (job.status === "cancelled") return { ok: false, error: "Solver run cancelled." };
+        return { ok: false, error: job.error || "Solver failed." };
+    }
+
+    if (cancelBtn) {
+        cancelBtn.addEventListener("click", async () => {
+            if (currentJob) await fetch(`/jobs/${currentJob}/cancel`, { method: "POST" });
+        });
+    }
+
     if (execBtn) {
         execBtn.addEventListener("click", async () => {
-            execOutput.textContent = "Running solver...";
+            execOutput.textContent = "Submitting solver job...";
 
-            const res = await fetch("/run-solver", { method: "POST" });
-            const data = await res.json();
+            const data = await runSolverJob();
 
             if (!data.ok) {
                 execOutput.textContent = "Error: " + data.error;
@@ -106,51 +668,75 @@ if (solverSelector) {
                 execOutput.innerHTML = data.actions.map(a => "• " + a).join("<br>");
             }
 
-            // ---- GENERATOR TABLE ----
-            if (genBody && data.generators) {
-                genBody.innerHTML = data.generators.map(g => `
-                    <tr>
-                        <td>${g.id}</td>
-                        <td>${g.type}</td>
-                        <td>${g.gen.toLocaleString()} / ${g.max_gen.toLocaleString()}</td>
-                        <td>${g.util_pct.toFixed(1)}%</td>
-                        <td>${g.status}</td>
-                    </tr>
-                `).join("");
-            }
-
-            // ---- BATTERY TABLE ----
-            if (batBody && data.batteries) {
-                batBody.innerHTML = data.batteries.map(b => `
-                    <tr>
-                        <td>${b.id}</td>
-                        <td>${b.soc_pct.toFixed(1)}%</td>
-                        <td>${b.delta.toLocaleString()}</td>
-                        <td>${b.action}</td>
-                    </tr>
-                `).join("");
-            }
-
-            // ---- SUMMARY ----
-            if (summaryList && data.summary) {
-                const s = data.summary;
-                summaryList.innerHTML = `
-                    <li>Total Generation: ${s.total_generation.toLocaleString()}</li>
-                    <li>Total Discharge: ${s.total_discharge.toLocaleString()}</li>
-                    <li>Total Supply: ${s.total_supply.toLocaleString()}</li>
-                    <li>Total Demand: ${s.total_demand.toLocaleString()}</li>
-                    <li>Surplus / Deficit: ${s.surplus.toLocaleString()}</li>
-                `;
-            }
+            // ---- TABLES ----
+            renderGenerators(data.generators);
+            renderBatteries(data.batteries);
+            renderSummary(data.summary);
 
             // ---- DRAW GRID ----
-            renderGridSVG(data.nodes, data.primary_edges);
+            renderGrid(data);
         });
     }
 
+    // ---- GENERATOR TABLE ----
+    function renderGenerators(generators) {
+        if (!genBody || !generators) return;
+        genBody.innerHTML = generators.map(g => `
+            <tr>
+                <td>${g.id}</td>
+                <td>${g.type}</td>
+                <td>${g.gen.toLocaleString()} / ${g.max_gen.toLocaleString()}</td>
+                <td>${g.util_pct.toFixed(1)}%</td>
+                <td>${g.status}</td>
+            </tr>
+        `).join("");
+    }
+
+    // ---- BATTERY TABLE ----
+    function renderBatteries(batteries) {
+        if (!batBody || !batteries) return;
+        batBody.innerHTML = batteries.map(b => `
+            <tr>
+                <td>${b.id}</td>
+                <td>${b.soc_pct.toFixed(1)}%</td>
+                <td>${b.delta.toLocaleString()}</td>
+                <td>${b.action}</td>
+            </tr>
+        `).join("");
+    }
+
+    // ---- SUMMARY ----
+    function renderSummary(s) {
+        if (!summaryList || !s) return;
+        summaryList.innerHTML = `
+            <li>Total Generation: ${s.total_generation.toLocaleString()}</li>
+            <li>Total Discharge: ${s.total_discharge.toLocaleString()}</li>
+            <li>Total Supply: ${s.total_supply.toLocaleString()}</li>
+            <li>Total Demand: ${s.total_demand.toLocaleString()}</li>
+            <li>Surplus / Deficit: ${s.surplus.toLocaleString()}</li>
+        `;
+    }
+
     // ======================================================================
-    // 7. COLORED + INTERACTIVE SVG RENDERER
+    // 7. COLORED + INTERACTIVE SVG RENDERER (canvas for large grids)
     // ======================================================================
+    let gridCanvas = null;
+
+    function renderGrid(data) {
+        if (!mapBox || !data.nodes) return;
+        if (gridCanvas) {
+            gridCanvas.destroy();
+            gridCanvas = null;
+        }
+
+        const grid = data.grid || gridColumns(data.nodes);
+        if (useCanvasRenderer(grid.x.length)) {
+            gridCanvas = renderGridCanvas(mapBox, grid, edgeColumns(grid, data.primary_edges));
+        } else {
+            renderGridSVG(data.nodes, data.primary_edges);
+        }
+    }
+
     function renderGridSVG(nodes, edges) {
         if (!mapBox || !nodes) return;
 
@@ -179,21 +765,6 @@ if (solverSelector) {
         mapBox.style.position = "relative";
         mapBox.appendChild(tooltip);
 
-        // Node color logic
-        function getNodeColor(type) {
-            switch (type) {
-                case "Solar": return "#f4d03f";
-                case "Wind": return "#5dade2";
-                case "Nuclear": return "#a569bd";
-                case "Thermal": return "#e67e22";
-                case "Bus": return "#58d68d";
-                case "Railway": return "#16a085";
-                case "Factory": return "#c0392b";
-                case "Residential": return "#7f8c8d";
-                default: return "#000";
-            }
-        }
-
         // Edges
         edges.forEach(([src, dst]) => {
             const s = nodes[src];
@@ -214,7 +785,7 @@ if (solverSelector) {
         // Nodes
         for (const id in nodes) {
             const n = nodes[id];
-            const color = getNodeColor(n.type);
+            const color = gridNodeColor(n.type);
 
             const circle = document.createElementNS("http://www.w3.org/2000/svg", "circle");
             circle.setAttribute("cx", n.x);